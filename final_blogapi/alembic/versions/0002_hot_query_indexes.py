@@ -0,0 +1,41 @@
+"""composite indexes for hot queries
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_init
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+
+revision = "0002_hot_query_indexes"
+down_revision = "0001_init"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_posts_status_created_at", "posts", ["status", "created_at"]),
+    ("ix_reactions_post_id_reaction_type", "reactions", ["post_id", "reaction_type"]),
+    ("ix_favorites_post_id", "favorites", ["post_id"]),
+    ("ix_favorites_user_id_saved_at", "favorites", ["user_id", "saved_at"]),
+    ("ix_subscriptions_target_user_id", "subscriptions", ["target_user_id"]),
+    ("ix_post_categories_category_id_post_id", "post_categories", ["category_id", "post_id"]),
+    (
+        "ix_comments_post_id_approved_created_at",
+        "comments",
+        ["post_id", "is_approved", "created_at"],
+    ),
+]
+
+
+def upgrade() -> None:
+    # 0001 runs create_all with the current models, so fresh databases already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
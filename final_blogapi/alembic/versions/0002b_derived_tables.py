@@ -0,0 +1,85 @@
+"""derived tables: app meta, dashboard rollups, view history, trending scores
+
+Revision ID: 0002b_derived_tables
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002b_derived_tables"
+down_revision = "0002_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ["app_meta", "stats_rollups", "post_view_hours", "post_view_days", "post_hot_scores"]
+
+# metric -> (table, timestamp expression, condition); mirrors stats_service.backfill
+SERIES = {
+    "users": ("users", "created_at", "1 = 1"),
+    "posts": ("posts", "created_at", "1 = 1"),
+    "posts_published": ("posts", "COALESCE(published_at, created_at)", "status = 'published'"),
+    "comments": ("comments", "created_at", "1 = 1"),
+    "reactions": ("reactions", "reacted_at", "1 = 1"),
+}
+TOTALS = {
+    "users": "SELECT COUNT(*) FROM users",
+    "posts": "SELECT COUNT(*) FROM posts",
+    "comments": "SELECT COUNT(*) FROM comments",
+    "reactions": "SELECT COUNT(*) FROM reactions",
+    # Only the total of the old view counters is known
+    "views": "SELECT COALESCE(SUM(view_count), 0) FROM posts",
+    **{
+        f"posts_{status}": f"SELECT COUNT(*) FROM posts WHERE status = '{status}'"
+        for status in ("draft", "published", "archived")
+    },
+}
+
+
+def _backfill_rollups() -> None:
+    """Seed the dashboard counters from the base tables (later revisions add their own)."""
+    for metric, (table, column, cond) in SERIES.items():
+        for period, width in (("day", 10), ("month", 7)):
+            bucket = f"substr(CAST({column} AS TEXT), 1, {width})"
+            op.execute(
+                sa.text(
+                    "INSERT INTO stats_rollups (metric, period, bucket, value) "
+                    f"SELECT '{metric}', '{period}', {bucket}, COUNT(*) FROM {table} "
+                    f"WHERE {cond} AND {column} IS NOT NULL GROUP BY {bucket}"
+                )
+            )
+    for metric, query in TOTALS.items():
+        op.execute(
+            sa.text(
+                "INSERT INTO stats_rollups (metric, period, bucket, value) "
+                f"SELECT '{metric}', 'total', '', ({query})"
+            )
+        )
+    op.execute(
+        sa.text(
+            "INSERT INTO stats_rollups (metric, period, bucket, value) "
+            "SELECT 'category_posts:' || pc.category_id, 'total', '', COUNT(*) "
+            "FROM post_categories pc JOIN posts p ON p.id = pc.post_id "
+            "WHERE p.status = 'published' GROUP BY pc.category_id"
+        )
+    )
+
+
+def upgrade() -> None:
+    from models.db_models import Base
+
+    # Databases created before these models existed; 0001 already made them on fresh ones
+    bind = op.get_bind()
+    for table in TABLES:
+        Base.metadata.tables[table].create(bind=bind, checkfirst=True)
+    if bind.execute(sa.text("SELECT 1 FROM stats_rollups LIMIT 1")).first() is None:
+        _backfill_rollups()
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(table)
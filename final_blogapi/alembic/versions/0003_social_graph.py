@@ -0,0 +1,59 @@
+"""social graph: covering subscription indexes, follower/following counters
+
+Revision ID: 0003_social_graph
+Revises: 0002b_derived_tables
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_social_graph"
+down_revision = "0002b_derived_tables"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    (
+        "ix_subscriptions_target_user_id_subscribed_at",
+        "subscriptions",
+        ["target_user_id", "subscribed_at", "subscriber_id"],
+    ),
+    (
+        "ix_subscriptions_subscriber_id_subscribed_at",
+        "subscriptions",
+        ["subscriber_id", "subscribed_at", "target_user_id"],
+    ),
+]
+
+COUNTERS = [("followers:", "target_user_id"), ("following:", "subscriber_id")]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    # Superseded by the first covering index
+    op.drop_index("ix_subscriptions_target_user_id", table_name="subscriptions", if_exists=True)
+
+    for prefix, column in COUNTERS:
+        op.execute(sa.text(f"DELETE FROM stats_rollups WHERE metric LIKE '{prefix}%'"))
+        op.execute(
+            sa.text(
+                "INSERT INTO stats_rollups (metric, period, bucket, value) "
+                f"SELECT '{prefix}' || {column}, 'total', '', COUNT(*) FROM subscriptions "
+                f"GROUP BY {column}"
+            )
+        )
+
+
+def downgrade() -> None:
+    for prefix, _ in COUNTERS:
+        op.execute(sa.text(f"DELETE FROM stats_rollups WHERE metric LIKE '{prefix}%'"))
+    op.create_index(
+        "ix_subscriptions_target_user_id", "subscriptions", ["target_user_id"], if_not_exists=True
+    )
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
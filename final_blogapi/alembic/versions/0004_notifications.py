@@ -0,0 +1,27 @@
+"""notification inbox
+
+Revision ID: 0004_notifications
+Revises: 0003_social_graph
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+
+revision = "0004_notifications"
+down_revision = "0003_social_graph"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from models.db_models import Base
+
+    # Table and its indexes from the model (0001 does the same for the initial schema)
+    Base.metadata.tables["notifications"].create(bind=op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM stats_rollups WHERE metric LIKE 'notifications_unread:%'")
+    op.drop_table("notifications")
@@ -0,0 +1,28 @@
+"""background job queue and dead letters
+
+Revision ID: 0005_jobs
+Revises: 0004_notifications
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+
+revision = "0005_jobs"
+down_revision = "0004_notifications"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from models.db_models import Base
+
+    bind = op.get_bind()
+    for table in ("jobs", "dead_jobs"):
+        Base.metadata.tables[table].create(bind=bind, checkfirst=True)
+
+
+def downgrade() -> None:
+    op.drop_table("dead_jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,72 @@
+"""posts_fts: external content, re-index only on title/content changes
+
+Revision ID: 0006_fts_external_content
+Revises: 0005_jobs
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_fts_external_content"
+down_revision = "0005_jobs"
+branch_labels = None
+depends_on = None
+
+
+TRIGGERS = ("posts_ai", "posts_ad", "posts_au")
+
+UPGRADE = [
+    "CREATE VIRTUAL TABLE posts_fts USING fts5("
+    "title, content, content='posts', content_rowid='id');",
+    """CREATE TRIGGER posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END;""",
+    """CREATE TRIGGER posts_ad AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, content)
+    VALUES ('delete', old.id, old.title, old.content);
+    END;""",
+    """CREATE TRIGGER posts_au AFTER UPDATE OF title, content ON posts
+    WHEN old.title IS NOT new.title OR old.content IS NOT new.content BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, content)
+    VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END;""",
+    "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild');",
+]
+
+DOWNGRADE = [
+    "CREATE VIRTUAL TABLE posts_fts USING fts5(title, content, post_id UNINDEXED);",
+    """CREATE TRIGGER posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, title, content, post_id)
+    VALUES (new.id, new.title, new.content, new.id);
+    END;""",
+    """CREATE TRIGGER posts_ad AFTER DELETE ON posts BEGIN
+    DELETE FROM posts_fts WHERE rowid = old.id;
+    END;""",
+    """CREATE TRIGGER posts_au AFTER UPDATE ON posts BEGIN
+    UPDATE posts_fts SET title = new.title, content = new.content WHERE rowid = new.id;
+    END;""",
+    "INSERT INTO posts_fts(rowid, title, content, post_id) "
+    "SELECT id, title, content, id FROM posts;",
+]
+
+
+def _replace(statements: list[str]) -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for name in TRIGGERS:
+        op.execute(sa.text(f"DROP TRIGGER IF EXISTS {name};"))
+    op.execute(sa.text("DROP TABLE IF EXISTS posts_fts;"))
+    for sql in statements:
+        op.execute(sa.text(sql))
+
+
+def upgrade() -> None:
+    _replace(UPGRADE)
+
+
+def downgrade() -> None:
+    _replace(DOWNGRADE)
@@ -0,0 +1,75 @@
+"""autocomplete: prefix-indexed label tables for titles, categories and authors
+
+Revision ID: 0007_search_suggest
+Revises: 0006_fts_external_content
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_search_suggest"
+down_revision = "0006_fts_external_content"
+branch_labels = None
+depends_on = None
+
+
+# table -> (source table, label column, extra watched column, condition)
+SOURCES = {
+    "suggest_titles": ("posts", "title", "status", "{row}.status = 'published'"),
+    "suggest_tags": ("categories", "name", None, "1"),
+    "suggest_authors": ("users", "username", "is_active", "{row}.is_active"),
+}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table, (source, label, flag, cond) in SOURCES.items():
+        watched = f"{label}, {flag}" if flag else label
+        new = cond.format(row="new")
+        op.execute(
+            sa.text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(label, prefix='2 3');")
+        )
+        op.execute(
+            sa.text(
+                f"""CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source}
+                WHEN {new} BEGIN
+                INSERT INTO {table}(rowid, label) VALUES (new.id, new.{label});
+                END;"""
+            )
+        )
+        op.execute(
+            sa.text(
+                f"""CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN
+                DELETE FROM {table} WHERE rowid = old.id;
+                END;"""
+            )
+        )
+        op.execute(
+            sa.text(
+                f"""CREATE TRIGGER IF NOT EXISTS {table}_au
+                AFTER UPDATE OF {watched} ON {source} BEGIN
+                DELETE FROM {table} WHERE rowid = old.id;
+                INSERT INTO {table}(rowid, label) SELECT new.id, new.{label} WHERE {new};
+                END;"""
+            )
+        )
+        op.execute(sa.text(f"DELETE FROM {table};"))
+        op.execute(
+            sa.text(
+                f"INSERT INTO {table}(rowid, label) SELECT id, {label} FROM {source} "
+                f"WHERE {cond.format(row=source)};"
+            )
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table in SOURCES:
+        for suffix in ("ai", "ad", "au"):
+            op.execute(sa.text(f"DROP TRIGGER IF EXISTS {table}_{suffix};"))
+        op.execute(sa.text(f"DROP TABLE IF EXISTS {table};"))
@@ -0,0 +1,26 @@
+"""related posts: precomputed TF-IDF neighbours
+
+Revision ID: 0008_post_related
+Revises: 0007_search_suggest
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+
+
+revision = "0008_post_related"
+down_revision = "0007_search_suggest"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from models.db_models import Base
+
+    # Filled by the related_rebuild job the app queues on startup when the table is empty
+    Base.metadata.tables["post_related"].create(bind=op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    op.drop_table("post_related")
@@ -0,0 +1,58 @@
+"""dead_jobs: own key, original job id in job_id
+
+SQLite reuses the ids of deleted ``jobs`` rows, so the job id cannot be the dead
+letter's primary key.
+
+Revision ID: 0009_dead_job_id
+Revises: 0008_post_related
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_dead_job_id"
+down_revision = "0008_post_related"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "kind, payload, attempts, created_at, failed_at, error"
+
+
+def upgrade() -> None:
+    from models.db_models import Base
+
+    bind = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(bind).get_columns("dead_jobs")}
+    if "job_id" in columns:  # created by 0005 from the current model
+        return
+    op.rename_table("dead_jobs", "dead_jobs_old")
+    Base.metadata.tables["dead_jobs"].create(bind=bind)
+    op.execute(
+        f"INSERT INTO dead_jobs (job_id, {COLUMNS}) "
+        f"SELECT id, {COLUMNS} FROM dead_jobs_old ORDER BY failed_at"
+    )
+    op.drop_table("dead_jobs_old")
+
+
+def downgrade() -> None:
+    op.rename_table("dead_jobs", "dead_jobs_new")
+    op.create_table(
+        "dead_jobs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("payload", sa.Text, nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False),
+        sa.Column("created_at", sa.Float, nullable=False),
+        sa.Column("failed_at", sa.Float, nullable=False),
+        sa.Column("error", sa.Text),
+    )
+    # One row per job id: the latest failure wins
+    op.execute(
+        f"INSERT INTO dead_jobs (id, {COLUMNS}) "
+        f"SELECT job_id, {COLUMNS} FROM dead_jobs_new "
+        "WHERE id IN (SELECT MAX(id) FROM dead_jobs_new GROUP BY job_id)"
+    )
+    op.drop_table("dead_jobs_new")
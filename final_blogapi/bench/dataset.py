@@ -0,0 +1,468 @@
+"""Synthetic dataset generator: bulk inserts straight into the tables.
+
+Popularity is skewed the way real blogs are: post authorship, followers and
+engagement (reactions, favorites, comments, views) follow Zipf-like distributions,
+bodies are Markdown assembled from a pre-built block pool, and every user shares one
+pre-hashed password. Rows go in with ``executemany`` over positional tuples in large
+batches, secondary indexes and FTS triggers are dropped for the load and rebuilt once.
+
+    python -m bench.dataset --users 100000 --posts 1000000 --comments 3000000 \\
+        --reactions 5000000 --favorites 1000000 --subscriptions 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, Sequence, cast
+
+from sqlalchemy import Engine, Table
+
+from models.db_models import Comment, Favorite, Post, PostCategory, Reaction, Subscription, User
+
+BENCH_PASSWORD = "benchpass"
+WORDS = (
+    "alpha beta gamma delta python fastapi sqlite index query cache search blog "
+    "markdown latency worker request feed trending comment author design science travel"
+).split()
+# Filler vocabulary for bodies; WORDS stay rare enough to make searches selective
+FILLER = (
+    "the a of and to in is it that for on with as was this be at by from or have not are "
+    "but what all were when we there can an your which their said if do will each about how "
+    "up out them then she many some so these would other into has more her two like him see "
+    "time could no make than first been its who now people my made over did down only way "
+    "find use may water long little very after words called just where most know"
+).split()
+
+BATCH = 20_000
+ZIPF_S = 1.1
+
+
+def _zipf_cum_weights(n: int, s: float = ZIPF_S) -> list[float]:
+    return list(itertools.accumulate(1.0 / (rank**s) for rank in range(1, n + 1)))
+
+
+class ZipfSampler:
+    """Draws items with probability ~ 1/rank**s; ranks are a random permutation of items."""
+
+    def __init__(self, rng: random.Random, items: Sequence[int], s: float = ZIPF_S) -> None:
+        self.rng = rng
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum = _zipf_cum_weights(len(self.items), s)
+
+    def sample(self, k: int) -> list[int]:
+        return self.rng.choices(self.items, cum_weights=self.cum, k=k)
+
+
+class MarkdownPool:
+    """Pre-rendered Markdown blocks; a body is a random concatenation of a few of them."""
+
+    def __init__(self, rng: random.Random, size: int = 512) -> None:
+        self.rng = rng
+        self.paragraphs = [self._sentences(rng.randint(2, 6)) for _ in range(size)]
+        self.headings = [
+            f"## {self._words(rng.randint(2, 5)).capitalize()}" for _ in range(size // 4)
+        ]
+        self.lists = [
+            "\n".join(f"- {self._words(rng.randint(3, 8))}" for _ in range(rng.randint(2, 5)))
+            for _ in range(size // 4)
+        ]
+        self.quotes = [f"> {self._sentences(1)}" for _ in range(size // 8)]
+        self.code = [
+            f"```python\ndef {rng.choice(WORDS)}_{i}(x):\n    return x * {rng.randint(2, 9)}\n```"
+            for i in range(size // 8)
+        ]
+        self.titles = [self._words(rng.randint(3, 8)).capitalize() for _ in range(size * 4)]
+        self.comments = [self._words(rng.randint(4, 30)).capitalize() for _ in range(size * 8)]
+        # Block kind shares in a body: paragraphs 55%, headings 15%, lists 15%, quotes 8%, code 7%
+        kinds = [
+            (self.paragraphs, 0.55),
+            (self.headings, 0.15),
+            (self.lists, 0.15),
+            (self.quotes, 0.08),
+            (self.code, 0.07),
+        ]
+        self.blocks = [block for blocks, _ in kinds for block in blocks]
+        self.block_cum = list(
+            itertools.accumulate(share / len(blocks) for blocks, share in kinds for _ in blocks)
+        )
+
+    def _words(self, n: int) -> str:
+        rng = self.rng
+        return " ".join(
+            rng.choice(WORDS) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(n)
+        )
+
+    def _sentences(self, n: int) -> str:
+        out = []
+        for _ in range(n):
+            s = self._words(self.rng.randint(6, 18)).capitalize()
+            if self.rng.random() < 0.2:
+                w = self.rng.choice(WORDS)
+                s = s.replace(f" {w} ", f" **{w}** ", 1)
+            out.append(s + ".")
+        return " ".join(out)
+
+    def body(self) -> str:
+        rng = self.rng
+        extra = rng.choices(self.blocks, cum_weights=self.block_cum, k=2 + int(rng.random() * 7))
+        return "\n\n".join([rng.choice(self.paragraphs), *extra])
+
+
+def _pairs(
+    rng: random.Random,
+    n: int,
+    left_ids: Sequence[int],
+    right: Callable[[int], list[int]],
+    *,
+    distinct: bool,
+) -> Iterable[tuple[int, int]]:
+    """About ``n`` distinct (a, b) pairs: a uniform over ``left_ids``, b from ``right``.
+
+    Generated grouped by ``a`` (primary-key order), deduplicating per ``a`` only, so
+    memory stays O(len(left_ids)) instead of a set of every pair.
+    """
+    counts: Counter[int] = Counter()
+    for start in range(0, n, BATCH):
+        counts.update(rng.choices(range(len(left_ids)), k=min(BATCH, n - start)))
+    for i in range(len(left_ids)):
+        c = counts.get(i)
+        if not c:
+            continue
+        a = left_ids[i]
+        got: set[int] = set()
+        for _ in range(5):  # popular targets saturate for very active users; give up then
+            got.update(right(c - len(got)))
+            if distinct:
+                got.discard(a)
+            if len(got) >= c:
+                break
+        for b in sorted(got)[:c]:
+            yield a, b
+
+
+class _Stamps(dict):
+    """minutes-ago -> timestamp, memoized: formatting would dominate generation time.
+
+    On SQLite values are pre-formatted in SQLAlchemy's DateTime storage format, so the
+    raw ``executemany`` needs no bind processing; only the hour prefix goes through
+    ``strftime``.
+    """
+
+    def __init__(self, now: datetime, *, sqlite: bool) -> None:
+        super().__init__()
+        self.origin = now.replace(minute=0, second=0, microsecond=0)
+        self.top = now.minute
+        self.sqlite = sqlite
+        self.hours: dict[int, str] = {}
+
+    def __missing__(self, minutes: int) -> Any:
+        hour, minute = divmod(self.top - minutes, 60)
+        if self.sqlite:
+            prefix = self.hours.get(hour)
+            if prefix is None:
+                prefix = self.hours[hour] = (self.origin + timedelta(hours=hour)).strftime(
+                    "%Y-%m-%d %H"
+                )
+            value: Any = f"{prefix}:{minute:02d}:00.000000"
+        else:
+            value = self.origin + timedelta(hours=hour, minutes=minute)
+        self[minutes] = value
+        return value
+
+
+@contextmanager
+def _bulk_load_pragmas(conn, enabled: bool) -> Iterator[None]:
+    """Relax durability for the duration of the load, then restore the connection."""
+    saved = {}
+    if enabled:
+        for name, value in (("synchronous", "OFF"), ("cache_size", "-262144")):
+            saved[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            conn.exec_driver_sql(f"PRAGMA {name}={value}")
+        conn.commit()
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            conn.exec_driver_sql(f"PRAGMA {name}={value}")
+        conn.commit()
+
+
+class _Loader:
+    def __init__(self, conn, paramstyle: str) -> None:
+        self.conn = conn
+        self.mark = {"qmark": "?", "numeric": ":{}", "named": ":p{}"}.get(paramstyle, "%s")
+        self.rows: dict[str, int] = {}
+
+    def insert(self, table: Table, columns: Sequence[str], rows: Iterable[tuple]) -> None:
+        marks = ", ".join(self.mark.format(i + 1) for i in range(len(columns)))
+        sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({marks})"
+        it = iter(rows)
+        total = 0
+        while chunk := list(itertools.islice(it, BATCH)):
+            self.conn.exec_driver_sql(sql, chunk)
+            total += len(chunk)
+        self.rows[table.name] = self.rows.get(table.name, 0) + total
+
+
+def generate(
+    engine: Engine,
+    *,
+    users: int = 200,
+    posts: int = 2000,
+    comments: int = 5000,
+    reactions: int = 10000,
+    favorites: int = 3000,
+    subscriptions: int = 2000,
+    seed: int = 42,
+) -> dict[str, Any]:
+    """Fill an initialized database; returns ids/credentials the load test needs plus load stats."""
+    from database.init_db import create_fts_triggers, drop_fts_triggers, rebuild_fts
+    from services.auth_service import get_password_hash
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    password_hash = get_password_hash(BENCH_PASSWORD)  # hashed once, shared by all users
+    sqlite = engine.dialect.name == "sqlite"
+    stamps = _Stamps(now, sqlite=sqlite)
+
+    pool = MarkdownPool(rng)
+    tables = [
+        cast(Table, t.__table__)
+        for t in (User, Post, PostCategory, Comment, Reaction, Favorite, Subscription)
+    ]
+    users_t, posts_t, post_categories_t, comments_t, reactions_t, favorites_t, subs_t = tables
+    deferred = [ix for t in tables for ix in t.indexes if not ix.unique]
+    started = time.perf_counter()
+
+    with engine.connect() as conn, _bulk_load_pragmas(conn, sqlite), conn.begin():
+        if sqlite:
+            drop_fts_triggers(conn)
+        for ix in deferred:
+            ix.drop(conn, checkfirst=True)
+        loader = _Loader(conn, engine.dialect.paramstyle)
+
+        base_user = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM users").scalar() or 0
+        base_post = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM posts").scalar() or 0
+        category_ids = [r[0] for r in conn.exec_driver_sql("SELECT id FROM categories")]
+        user_ids = range(base_user + 1, base_user + users + 1)
+        post_ids = range(base_post + 1, base_post + posts + 1)
+        max_age = 60 * 24 * 365
+
+        rand = rng.random
+        loader.insert(
+            users_t,
+            (
+                "id",
+                "email",
+                "username",
+                "password_hash",
+                "role",
+                "is_active",
+                "created_at",
+                "updated_at",
+            ),
+            (
+                (uid, f"bench{uid}@example.com", f"bench{uid}", password_hash, "user", True, t, t)
+                for uid in user_ids
+                for t in (stamps[int(rand() * max_age)],)
+            ),
+        )
+
+        authors = ZipfSampler(rng, user_ids)  # a few prolific authors, a long tail
+        popular = ZipfSampler(rng, post_ids)  # engagement concentrates on a few posts
+        followed = ZipfSampler(rng, user_ids, s=1.0)  # follower counts are heavy-tailed
+
+        post_ages = [int(rand() ** 2 * max_age) for _ in post_ids]  # skewed to recent
+        author_of = authors.sample(posts)
+
+        def post_rows() -> Iterable[tuple]:
+            titles = rng.choices(pool.titles, k=posts)
+            for i, pid in enumerate(post_ids):
+                body = pool.body()
+                created = stamps[post_ages[i]]
+                published = rand() < 0.9
+                yield (
+                    pid,
+                    author_of[i],
+                    titles[i],
+                    body,
+                    body[:200],
+                    "published" if published else "draft",
+                    created,
+                    created,
+                    created if published else None,
+                    int(rng.paretovariate(1.1)) - 1,
+                )
+
+        loader.insert(
+            posts_t,
+            (
+                "id",
+                "author_id",
+                "title",
+                "content",
+                "excerpt",
+                "status",
+                "created_at",
+                "updated_at",
+                "published_at",
+                "view_count",
+            ),
+            post_rows(),
+        )
+        if category_ids:
+            loader.insert(
+                post_categories_t,
+                ("post_id", "category_id"),
+                (
+                    (pid, cid)
+                    for pid in post_ids
+                    for cid in rng.sample(
+                        category_ids, k=min(len(category_ids), 1 + (rand() < 0.3))
+                    )
+                ),
+            )
+
+        def comment_rows() -> Iterable[tuple]:
+            for start in range(0, comments, BATCH):
+                k = min(BATCH, comments - start)
+                yield from (
+                    (pid, uid, text, True, t, t)
+                    for pid, uid, text in zip(
+                        popular.sample(k),
+                        rng.choices(user_ids, k=k),
+                        rng.choices(pool.comments, k=k),
+                    )
+                    for t in (stamps[int(rand() * post_ages[pid - base_post - 1])],)
+                )
+
+        loader.insert(
+            comments_t,
+            ("post_id", "author_id", "content", "is_approved", "created_at", "updated_at"),
+            comment_rows(),
+        )
+        loader.insert(
+            reactions_t,
+            ("user_id", "post_id", "reaction_type", "reacted_at"),
+            (
+                (
+                    u,
+                    p,
+                    "like" if rand() < 0.85 else "dislike",
+                    stamps[int(rand() * post_ages[p - base_post - 1])],
+                )
+                for u, p in _pairs(rng, reactions, user_ids, popular.sample, distinct=False)
+            ),
+        )
+        loader.insert(
+            favorites_t,
+            ("user_id", "post_id", "saved_at"),
+            (
+                (u, p, stamps[int(rand() * post_ages[p - base_post - 1])])
+                for u, p in _pairs(rng, favorites, user_ids, popular.sample, distinct=False)
+            ),
+        )
+        loader.insert(
+            subs_t,
+            ("subscriber_id", "target_user_id", "subscribed_at", "notifications_enabled"),
+            (
+                (a, b, stamps[int(rand() * max_age)], rand() < 0.8)
+                for a, b in _pairs(rng, subscriptions, user_ids, followed.sample, distinct=True)
+            ),
+        )
+        insert_seconds = time.perf_counter() - started
+
+        index_started = time.perf_counter()
+        for ix in deferred:
+            ix.create(conn)
+        index_seconds = time.perf_counter() - index_started
+
+        fts_seconds = 0.0
+        if sqlite:
+            fts_started = time.perf_counter()
+            rebuild_fts(conn)
+            create_fts_triggers(conn)
+            fts_seconds = time.perf_counter() - fts_started
+
+    seconds = time.perf_counter() - started
+    total = sum(loader.rows.values())
+    return {
+        "user_emails": [f"bench{uid}@example.com" for uid in user_ids],
+        "password": BENCH_PASSWORD,
+        "post_ids": list(post_ids),
+        "words": WORDS,
+        "load": {
+            "rows": loader.rows,
+            "total_rows": total,
+            "seconds": round(seconds, 2),
+            "insert_seconds": round(insert_seconds, 2),
+            "index_seconds": round(index_seconds, 2),
+            "fts_rebuild_seconds": round(fts_seconds, 2),
+            "insert_rows_per_sec": round(total / insert_seconds) if insert_seconds else total,
+            "rows_per_sec": round(total / seconds) if seconds else total,
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--posts", type=int, default=100_000)
+    p.add_argument("--comments", type=int, default=300_000)
+    p.add_argument("--reactions", type=int, default=500_000)
+    p.add_argument("--favorites", type=int, default=100_000)
+    p.add_argument("--subscriptions", type=int, default=200_000)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument(
+        "--skip-derived", action="store_true", help="skip stats backfill and trending recompute"
+    )
+    p.add_argument(
+        "--dataset-file", help="write credentials/post ids for bench.loadtest --url here"
+    )
+    args = p.parse_args(argv)
+
+    from database import session as db_session
+    from database.init_db import seed_db
+    from services import search_cache, stats_service, trending_service
+
+    seed_db()  # schema + categories + admin
+    data = generate(
+        db_session.engine,
+        users=args.users,
+        posts=args.posts,
+        comments=args.comments,
+        reactions=args.reactions,
+        favorites=args.favorites,
+        subscriptions=args.subscriptions,
+        seed=args.seed,
+    )
+    if not args.skip_derived:
+        derived_started = time.perf_counter()
+        db = db_session.SessionLocal()
+        try:
+            stats_service.backfill(db)
+            trending_service.recompute(db)
+        finally:
+            db.close()
+        data["load"]["derived_seconds"] = round(time.perf_counter() - derived_started, 2)
+    search_cache.posts_search_cache.clear()
+
+    print(json.dumps(data["load"], indent=2), file=sys.stderr)
+    if args.dataset_file:
+        with open(args.dataset_file, "w", encoding="utf-8") as f:
+            json.dump({k: data[k] for k in ("user_emails", "password", "post_ids", "words")}, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Write amplification of the posts_fts setup: legacy vs external content.
+
+Builds the same synthetic posts table twice in temporary SQLite files, once with the
+legacy index (own copy of the text, ``AFTER UPDATE ON posts`` trigger) and once with the
+current one (``content='posts'``, ``AFTER UPDATE OF title, content``), then runs the
+same updates against both and reports, per workload, the time and the pages written
+(WAL growth with checkpoints off) plus the database size after loading.
+
+    python -m bench.fts --posts 20000 --updates 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Any, cast
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.schema import CreateTable
+
+from bench.dataset import MarkdownPool
+from database.init_db import FTS_TABLE_DDL, FTS_TRIGGERS
+from models.db_models import Post
+
+LEGACY_FTS_DDL = [
+    "CREATE VIRTUAL TABLE posts_fts USING fts5(title, content, post_id UNINDEXED);",
+    """CREATE TRIGGER posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, title, content, post_id)
+    VALUES (new.id, new.title, new.content, new.id);
+    END;""",
+    """CREATE TRIGGER posts_ad AFTER DELETE ON posts BEGIN
+    DELETE FROM posts_fts WHERE rowid = old.id;
+    END;""",
+    """CREATE TRIGGER posts_au AFTER UPDATE ON posts BEGIN
+    UPDATE posts_fts SET title = new.title, content = new.content WHERE rowid = new.id;
+    END;""",
+]
+
+SCHEMAS = {
+    "legacy": LEGACY_FTS_DDL,
+    "external": [
+        FTS_TABLE_DDL,
+        *(FTS_TRIGGERS[name] for name in ("posts_ai", "posts_ad", "posts_au")),
+    ],
+}
+
+# workload -> (statement, parameters for post id i)
+WORKLOADS = {
+    "view_count": (
+        "UPDATE posts SET view_count = view_count + 1 WHERE id = ?",
+        lambda i, rng: (i,),
+    ),
+    "status": (
+        "UPDATE posts SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        lambda i, rng: (rng.choice(("draft", "published")), i),
+    ),
+    "title": ("UPDATE posts SET title = title || ' (upd)' WHERE id = ?", lambda i, rng: (i,)),
+}
+
+
+def _wal_pages(path: str, page_size: int) -> int:
+    wal = f"{path}-wal"
+    return os.path.getsize(wal) // (page_size + 24) if os.path.exists(wal) else 0
+
+
+def _build(path: str, ddl: list[str], posts: int, seed: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(
+        str(CreateTable(cast(Table, Post.__table__)).compile(dialect=sqlite_dialect.dialect()))
+    )
+    for sql in ddl:
+        conn.execute(sql)
+    pool = MarkdownPool(random.Random(seed))
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO posts "
+        "(id, author_id, title, content, status, view_count, created_at, updated_at) "
+        "VALUES (?, 1, ?, ?, 'published', 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+        ((i, pool.rng.choice(pool.titles), pool.body()) for i in range(1, posts + 1)),
+    )
+    conn.execute("COMMIT")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    return conn
+
+
+def run_schema(ddl: list[str], *, posts: int, updates: int, seed: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="bench-fts-") as tmp:
+        path = os.path.join(tmp, "fts.db")
+        conn = _build(path, ddl, posts, seed)
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            out: dict[str, Any] = {"db_bytes": os.path.getsize(path)}
+            for name, (sql, params) in WORKLOADS.items():
+                rng = random.Random(seed)
+                ids = [rng.randint(1, posts) for _ in range(updates)]
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                started = time.perf_counter()
+                for i in ids:  # one transaction per update, like the app
+                    conn.execute(sql, params(i, rng))
+                seconds = time.perf_counter() - started
+                pages = _wal_pages(path, page_size)
+                out[name] = {
+                    "seconds": round(seconds, 3),
+                    "pages_written": pages,
+                    "pages_per_update": round(pages / updates, 2),
+                }
+            return out
+        finally:
+            conn.close()
+
+
+def run(posts: int = 5000, updates: int = 1000, seed: int = 42) -> dict[str, Any]:
+    return {
+        name: run_schema(ddl, posts=posts, updates=updates, seed=seed)
+        for name, ddl in SCHEMAS.items()
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    p.add_argument("--posts", type=int, default=20_000)
+    p.add_argument("--updates", type=int, default=5_000)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = p.parse_args(argv)
+
+    result = run(args.posts, args.updates, args.seed)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    legacy, external = result["legacy"], result["external"]
+    mib = 2**20
+    print(
+        f"{'db size, MiB':<22}"
+        f"{legacy['db_bytes'] / mib:>10.1f}{external['db_bytes'] / mib:>12.1f}"
+    )
+    print(f"{'pages/update':<22}{'legacy':>10}{'external':>12}{'legacy s':>11}{'external s':>12}")
+    for name in WORKLOADS:
+        a, b = legacy[name], external[name]
+        print(
+            f"{name:<22}{a['pages_per_update']:>10}{b['pages_per_update']:>12}"
+            f"{a['seconds']:>11}{b['seconds']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""End-to-end load benchmark for the API, HTML pages and WebSocket fan-out.
+
+Boots ``main.app`` under uvicorn (in-process, on a temp SQLite database filled by
+``bench.dataset``), drives a weighted mix of scenarios with N concurrent virtual
+users and writes a JSON report with p50/p95/p99 latency, throughput and SQL
+queries per request for every endpoint.
+
+    python -m bench.loadtest --concurrency 20 --duration 30 --out bench.json
+    python -m bench.loadtest compare before.json after.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+import httpx
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import websockets  # type: ignore
+except Exception:  # pragma: no cover
+    websockets = None  # type: ignore[assignment]
+
+QUERY_HEADER = "x-bench-queries"
+_query_box: ContextVar[list[int] | None] = ContextVar("bench_query_box", default=None)
+
+
+# --- server side -----------------------------------------------------------------
+
+
+class QueryCountMiddleware:
+    """ASGI wrapper: counts SQL statements per request and reports them in a header."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        box = [0]
+        token = _query_box.set(box)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_HEADER.encode(), str(box[0]).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _query_box.reset(token)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    box = _query_box.get()
+    if box is not None:
+        box[0] += 1
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def boot_server(args: argparse.Namespace) -> tuple[str, dict[str, Any], Callable[[], None]]:
+    """Create the dataset, start uvicorn in a thread; returns (base_url, dataset, stop)."""
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="blogbench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    import uvicorn
+    from sqlalchemy import event
+
+    import main
+    from bench.dataset import generate
+    from database import session as db_session
+    from database.init_db import init_db, seed_db
+    from services import stats_service, trending_service
+
+    init_db()
+    seed_db()
+    started = time.perf_counter()
+    dataset = generate(
+        db_session.engine,
+        users=args.users,
+        posts=args.posts,
+        comments=args.posts * 3,
+        reactions=args.posts * 5,
+        favorites=args.posts,
+        subscriptions=args.users * 10,
+    )
+    db = db_session.SessionLocal()
+    try:
+        stats_service.backfill(db)
+        trending_service.recompute(db)
+    finally:
+        db.close()
+    print(f"dataset ready in {time.perf_counter() - started:.1f}s ({db_path})", file=sys.stderr)
+
+    event.listen(db_session.engine, "before_cursor_execute", _count_query)
+    port = _free_port()
+    config = uvicorn.Config(
+        QueryCountMiddleware(main.app), host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop() -> None:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return f"http://127.0.0.1:{port}", dataset, stop
+
+
+# --- client side -----------------------------------------------------------------
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.queries: dict[str, list[int]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.scenarios: dict[str, int] = defaultdict(int)
+        self.ws: dict[str, Any] = {"connect_ms": [], "delivered": 0, "delivery_ms": []}
+        # (post_id, author) -> send timestamps, consumed by the first WS listener
+        self.broadcasts: dict[tuple[int, str], deque[float]] = defaultdict(deque)
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        label: str,
+        method: str,
+        url: str,
+        ok: tuple[int, ...] = (200,),
+        **kwargs: Any,
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - started)
+        if r.status_code not in ok:
+            self.errors[label] += 1
+        if QUERY_HEADER in r.headers:
+            self.queries[label].append(int(r.headers[QUERY_HEADER]))
+        return r
+
+
+class VirtualUser:
+    def __init__(
+        self, rec: Recorder, client: httpx.AsyncClient, dataset: dict[str, Any], rng: random.Random
+    ):
+        self.rec = rec
+        self.client = client
+        self.data = dataset
+        self.rng = rng
+        self.email = rng.choice(dataset["user_emails"])
+        self.username = self.email.split("@")[0]
+        self.logged_in = False
+
+    def post_id(self) -> int:
+        ids = self.data["post_ids"]
+        # Skewed popularity: low ranks are requested far more often
+        return int(ids[min(int(self.rng.paretovariate(1.2)) - 1, len(ids) - 1)])
+
+    async def login(self) -> None:
+        r = await self.rec.request(
+            self.client,
+            "POST /login",
+            "POST",
+            "/login",
+            ok=(302,),
+            data={"email": self.email, "password": self.data["password"]},
+        )
+        self.logged_in = r is not None and r.status_code == 302
+
+    async def ensure_login(self) -> bool:
+        if not self.logged_in:
+            await self.login()
+        return self.logged_in
+
+    async def browse_feed(self) -> None:
+        page = self.rng.randint(1, 5)
+        await self.rec.request(self.client, "GET /", "GET", "/", params={"page": page})
+        await self.rec.request(
+            self.client, "GET /api/posts", "GET", "/api/posts", params={"page": page}
+        )
+        await self.rec.request(
+            self.client, "GET /?feed=trending", "GET", "/", params={"feed": "trending"}
+        )
+
+    async def search(self) -> None:
+        q = self.rng.choice(self.data["words"])
+        await self.rec.request(self.client, "GET /?q=", "GET", "/", params={"q": q})
+        await self.rec.request(
+            self.client, "GET /api/posts?q=", "GET", "/api/posts", params={"q": q}
+        )
+
+    async def view_post(self) -> None:
+        pid = self.post_id()
+        await self.rec.request(self.client, "GET /post/{id}", "GET", f"/post/{pid}", ok=(200, 404))
+        await self.rec.request(
+            self.client,
+            "GET /api/posts/{id}/comments",
+            "GET",
+            f"/api/posts/{pid}/comments",
+            ok=(200, 404),
+        )
+
+    async def react(self) -> None:
+        if not await self.ensure_login():
+            return
+        pid = self.post_id()
+        action = self.rng.choice(["like", "dislike", "favorite"])
+        await self.rec.request(
+            self.client, f"POST /api/posts/{{id}}/{action}", "POST", f"/api/posts/{pid}/{action}"
+        )
+
+    async def comment_burst(self) -> None:
+        if not await self.ensure_login():
+            return
+        pid = self.post_id()
+        for _ in range(self.rng.randint(3, 8)):
+            self.rec.broadcasts[(pid, self.username)].append(time.perf_counter())
+            await self.rec.request(
+                self.client,
+                "POST /api/posts/{id}/comments",
+                "POST",
+                f"/api/posts/{pid}/comments",
+                ok=(201,),
+                json={"content": "bench comment " + self.rng.choice(self.data["words"])},
+            )
+
+    async def relogin(self) -> None:
+        self.client.cookies.clear()
+        await self.login()
+
+
+SCENARIOS: dict[str, tuple[float, Callable[[VirtualUser], Awaitable[None]]]] = {
+    "browse_feed": (0.35, VirtualUser.browse_feed),
+    "search": (0.15, VirtualUser.search),
+    "view_post": (0.30, VirtualUser.view_post),
+    "login": (0.03, VirtualUser.relogin),
+    "react": (0.12, VirtualUser.react),
+    "comment_burst": (0.05, VirtualUser.comment_burst),
+}
+
+
+async def _vu_loop(
+    rec: Recorder,
+    base_url: str,
+    dataset: dict[str, Any],
+    seed: int,
+    deadline: float,
+    mix: list[str],
+) -> None:
+    rng = random.Random(seed)
+    weights = [SCENARIOS[name][0] for name in mix]
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0, follow_redirects=False) as client:
+        vu = VirtualUser(rec, client, dataset, rng)
+        while time.perf_counter() < deadline:
+            name = rng.choices(mix, weights)[0]
+            rec.scenarios[name] += 1
+            await SCENARIOS[name][1](vu)
+
+
+async def _ws_listener(rec: Recorder, base_url: str, deadline: float, primary: bool) -> None:
+    url = base_url.replace("http://", "ws://") + "/ws"
+    started = time.perf_counter()
+    async with websockets.connect(url) as ws:
+        rec.ws["connect_ms"].append((time.perf_counter() - started) * 1000)
+        while time.perf_counter() < deadline:
+            try:
+                raw = await asyncio.wait_for(
+                    ws.recv(), timeout=max(0.1, deadline - time.perf_counter())
+                )
+            except asyncio.TimeoutError:
+                break
+            rec.ws["delivered"] += 1
+            msg = json.loads(raw)
+            if primary and msg.get("type") == "comment_created":
+                sent = rec.broadcasts.get((msg.get("post_id"), msg.get("author")))
+                if sent:
+                    rec.ws["delivery_ms"].append((time.perf_counter() - sent.popleft()) * 1000)
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def _summary_ms(values: list[float], scale: float = 1000.0) -> dict[str, float]:
+    s = sorted(v * scale for v in values)
+    return {
+        "p50_ms": round(_percentile(s, 0.50), 2),
+        "p95_ms": round(_percentile(s, 0.95), 2),
+        "p99_ms": round(_percentile(s, 0.99), 2),
+        "mean_ms": round(sum(s) / len(s), 2) if s else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    stop: Callable[[], None] | None = None
+    if args.url:
+        base_url, dataset = args.url, json.loads(open(args.dataset_file, encoding="utf-8").read())
+    else:
+        base_url, dataset, stop = boot_server(args)
+
+    mix = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    rec = Recorder()
+    try:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        tasks = [
+            _vu_loop(rec, base_url, dataset, args.seed + i, deadline, mix)
+            for i in range(args.concurrency)
+        ]
+        if args.ws_listeners and websockets is not None:
+            tasks += [
+                _ws_listener(rec, base_url, deadline, i == 0) for i in range(args.ws_listeners)
+            ]
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    finally:
+        if stop:
+            stop()
+
+    endpoints = {}
+    for label in sorted(rec.latencies):
+        lat = rec.latencies[label]
+        q = rec.queries.get(label, [])
+        endpoints[label] = {
+            "requests": len(lat),
+            "errors": rec.errors.get(label, 0),
+            "rps": round(len(lat) / elapsed, 2),
+            **_summary_ms(lat),
+            "queries_per_request": round(sum(q) / len(q), 2) if q else None,
+            "max_queries": max(q) if q else None,
+        }
+    total = sum(len(v) for v in rec.latencies.values())
+    report: dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "users": args.users,
+            "posts": args.posts,
+            "scenarios": mix,
+        },
+        "totals": {
+            "requests": total,
+            "errors": sum(rec.errors.values()),
+            "rps": round(total / elapsed, 2),
+            **_summary_ms([v for vals in rec.latencies.values() for v in vals]),
+        },
+        "scenarios": dict(rec.scenarios),
+        "endpoints": endpoints,
+    }
+    if args.ws_listeners:
+        report["websocket"] = (
+            {
+                "listeners": args.ws_listeners,
+                "messages_delivered": rec.ws["delivered"],
+                "connect": _summary_ms(rec.ws["connect_ms"], scale=1.0),
+                "delivery": _summary_ms(rec.ws["delivery_ms"], scale=1.0),
+            }
+            if websockets is not None
+            else {"skipped": "websockets package not installed"}
+        )
+    return report
+
+
+def compare(old_path: str, new_path: str) -> None:
+    old = json.load(open(old_path, encoding="utf-8"))
+    new = json.load(open(new_path, encoding="utf-8"))
+    print(f"{'endpoint':40} {'p50 ms':>16} {'p95 ms':>16} {'rps':>16} {'queries':>12}")
+
+    def cell(a: Any, b: Any) -> str:
+        if a is None or b is None:
+            return f"{b if b is not None else '-'}"
+        delta = (b - a) / a * 100 if a else 0.0
+        return f"{b} ({delta:+.0f}%)"
+
+    for label in sorted(set(old["endpoints"]) | set(new["endpoints"])):
+        a, b = old["endpoints"].get(label, {}), new["endpoints"].get(label, {})
+        p50 = cell(a.get("p50_ms"), b.get("p50_ms"))
+        p95 = cell(a.get("p95_ms"), b.get("p95_ms"))
+        rps = cell(a.get("rps"), b.get("rps"))
+        queries = cell(a.get("queries_per_request"), b.get("queries_per_request"))
+        print(f"{label:40} {p50:>16} {p95:>16} {rps:>16} {queries:>12}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "compare":
+        compare(argv[1], argv[2])
+        return
+
+    p = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    p.add_argument("--concurrency", type=int, default=10, help="virtual users")
+    p.add_argument("--duration", type=float, default=15.0, help="seconds")
+    p.add_argument("--users", type=int, default=200)
+    p.add_argument("--posts", type=int, default=2000)
+    p.add_argument("--ws-listeners", type=int, default=5)
+    p.add_argument("--scenarios", help="comma-separated subset of: " + ",".join(SCENARIOS))
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--db", help="SQLite file to create (default: temp dir)")
+    p.add_argument("--url", help="benchmark an already running server instead of booting one")
+    p.add_argument(
+        "--dataset-file", help="with --url: JSON with user_emails/password/post_ids/words"
+    )
+    p.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = p.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    data = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Micro-benchmark of API response serialization.
+
+Renders the same payloads three ways and reports the time per response:
+
+- ``validated``: the route's ``response_model`` validation and serialization (what
+  FastAPI does with a returned dict) + stdlib ``JSONResponse``, i.e. the old path;
+- ``default_class``: the same validation, rendered by the app default ``FastJSONResponse``;
+- ``direct``: the payload wrapped in ``FastJSONResponse`` by the endpoint (no validation).
+
+    python -m bench.serialization --repeat 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from routers.serializers import FastJSONResponse
+
+_NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _post(i: int, content: bool = True) -> dict[str, Any]:
+    post = {
+        "id": i,
+        "author_id": i % 17 + 1,
+        "author_username": f"user{i % 17 + 1}",
+        "title": f"Заголовок поста номер {i}",
+        "content": (
+            ("Абзац текста **markdown** с [ссылкой](https://example.com). " * 40)
+            if content
+            else None
+        ),
+        "excerpt": "Абзац текста **markdown** с [ссылкой](https://example.com). " * 3,
+        "status": "published",
+        "created_at": _NOW - timedelta(minutes=i),
+        "updated_at": _NOW - timedelta(minutes=i),
+        "published_at": _NOW - timedelta(minutes=i),
+        "view_count": i * 7,
+        "likes": i % 13,
+        "dislikes": i % 3,
+        "favorites": i % 5,
+        "categories": [
+            {"id": 1, "name": "Программирование", "slug": "programming", "color": "#3498db"}
+        ],
+    }
+    if not content:
+        del post["content"]
+    return post
+
+
+def payloads(items: int) -> dict[str, tuple[str, str, Any]]:
+    """case -> (method, route path, payload)."""
+    comments = [
+        {
+            "id": i,
+            "post_id": 1,
+            "author_id": i % 17 + 1,
+            "content": "Комментарий к посту. " * 5,
+            "created_at": _NOW - timedelta(seconds=i),
+            "parent_comment_id": None,
+            "author_username": f"user{i % 17 + 1}",
+        }
+        for i in range(items * 2)
+    ]
+    users = [
+        {"id": i, "username": f"user{i}", "avatar_url": None, "bio": "О себе", "role": "user"}
+        for i in range(items)
+    ]
+    return {
+        "post": ("GET", "/api/posts/{post_id}", _post(1)),
+        "feed": (
+            "GET",
+            "/api/posts",
+            {
+                "page": 1,
+                "per_page": items,
+                "total": 1000,
+                "items": [_post(i, content=False) for i in range(items)],
+            },
+        ),
+        "comments": ("GET", "/api/posts/{post_id}/comments", comments),
+        "users": ("GET", "/api/users", users),
+    }
+
+
+def _route(app: Any, method: str, path: str) -> APIRoute:
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and method in route.methods:
+            return route
+    raise LookupError(f"{method} {path}")
+
+
+async def _time(fn: Any, repeat: int) -> float:
+    """Best of 3 runs, seconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best
+
+
+async def run(repeat: int, items: int) -> list[dict[str, Any]]:
+    from main import app
+
+    rows = []
+    for case, (method, path, payload) in payloads(items).items():
+        field = _route(app, method, path).response_field
+
+        async def validated(cls: type[JSONResponse] = JSONResponse) -> bytes:
+            content = await serialize_response(field=field, response_content=payload)
+            return cls(content).body
+
+        async def default_class() -> bytes:
+            return await validated(FastJSONResponse)
+
+        async def direct() -> bytes:
+            return FastJSONResponse(payload).body
+
+        old, default, fast = [await _time(fn, repeat) for fn in (validated, default_class, direct)]
+        rows.append(
+            {
+                "case": case,
+                "bytes": len(await direct()),
+                "validated_us": round(old * 1e6, 1),
+                "default_class_us": round(default * 1e6, 1),
+                "direct_us": round(fast * 1e6, 1),
+                "speedup": round(old / fast, 1),
+            }
+        )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    p.add_argument("--repeat", type=int, default=1000, help="calls per timing run")
+    p.add_argument(
+        "--items", type=int, default=50, help="posts/users per list (comments: twice as many)"
+    )
+    p.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = p.parse_args(argv)
+
+    rows = asyncio.run(run(args.repeat, args.items))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(
+        f"{'case':<10}{'bytes':>9}{'validated µs':>15}{'default µs':>13}"
+        f"{'direct µs':>12}{'speedup':>10}"
+    )
+    for r in rows:
+        print(
+            f"{r['case']:<10}{r['bytes']:>9}{r['validated_us']:>15}{r['default_class_us']:>13}"
+            f"{r['direct_us']:>12}{r['speedup']:>9}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from datetime import datetime
-from sqlalchemy import text
+import hashlib
+import sys
+
+from sqlalchemy import Connection, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
 
 from .session import engine
 from models.db_base import Base
-from models.db_models import Category, User
-from services.auth_service import get_password_hash
+from models.db_models import AppMeta, Category, User
+from services.startup_report import startup_report
 
 
 DEFAULT_CATEGORIES = [
@@ -18,64 +22,191 @@ DEFAULT_CATEGORIES = [
     ("Личное развитие", "personal-growth", "Советы по саморазвитию", "#e74c3c"),
 ]
 
+SCHEMA_META_KEY = "schema_fingerprint"
 
-def _create_sqlite_fts(db: Session) -> None:
-    """Create SQLite FTS5 table + triggers for full-text search."""
-    # FTS5 is usually available in standard SQLite builds.
-    # We'll keep it robust: ignore if already exists.
-    db.execute(
-        text(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts
-            USING fts5(title, content, post_id UNINDEXED);
-            """
-        )
-    )
 
-    # Triggers keep FTS in sync
-    db.execute(
-        text(
-            """
-            CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
-              INSERT INTO posts_fts(rowid, title, content, post_id)
-              VALUES (new.id, new.title, new.content, new.id);
-            END;
-            """
-        )
-    )
-    db.execute(
-        text(
-            """
-            CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
-              DELETE FROM posts_fts WHERE rowid = old.id;
-            END;
-            """
-        )
-    )
-    db.execute(
-        text(
-            """
-            CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE ON posts BEGIN
-              UPDATE posts_fts SET title = new.title, content = new.content WHERE rowid = new.id;
-            END;
-            """
-        )
+def fts_table_ddl(name: str = "posts_fts") -> str:
+    """External-content FTS5: the index stores only tokens, the text is read from posts."""
+    return f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {name}
+    USING fts5(title, content, content='posts', content_rowid='id');
+    """
+
+
+FTS_TABLE_DDL = fts_table_ddl()
+
+# Triggers keep FTS in sync. Updates re-index only when title/content actually change,
+# so view counters, status flips and the like never touch the index.
+FTS_TRIGGERS = {
+    "posts_ai": """
+    CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+      INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END;
+    """,
+    "posts_ad": """
+    CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+      INSERT INTO posts_fts(posts_fts, rowid, title, content)
+      VALUES ('delete', old.id, old.title, old.content);
+    END;
+    """,
+    "posts_au": """
+    CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE OF title, content ON posts
+    WHEN old.title IS NOT new.title OR old.content IS NOT new.content BEGIN
+      INSERT INTO posts_fts(posts_fts, rowid, title, content)
+      VALUES ('delete', old.id, old.title, old.content);
+      INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END;
+    """,
+}
+
+# Autocomplete: one small FTS5 table of labels per kind, with 2- and 3-character prefix
+# indexes, so "py" or "пут" is a single index lookup. Rowid = id of the source row.
+# table -> (source table, label column, extra column the condition reads, condition)
+SUGGEST_SOURCES = {
+    "suggest_titles": ("posts", "title", "status", "{row}.status = 'published'"),
+    "suggest_tags": ("categories", "name", None, "1"),
+    "suggest_authors": ("users", "username", "is_active", "{row}.is_active"),
+}
+
+
+def _suggest_ddl(table: str) -> tuple[str, dict[str, str]]:
+    source, label, flag, cond = SUGGEST_SOURCES[table]
+    watched = f"{label}, {flag}" if flag else label
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(label, prefix='2 3');",
+        {
+            f"{table}_ai": f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source}
+    WHEN {cond.format(row="new")} BEGIN
+      INSERT INTO {table}(rowid, label) VALUES (new.id, new.{label});
+    END;
+    """,
+            f"{table}_ad": f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN
+      DELETE FROM {table} WHERE rowid = old.id;
+    END;
+    """,
+            f"{table}_au": f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {watched} ON {source} BEGIN
+      DELETE FROM {table} WHERE rowid = old.id;
+      INSERT INTO {table}(rowid, label) SELECT new.id, new.{label} WHERE {cond.format(row="new")};
+    END;
+    """,
+        },
     )
 
-    # Backfill FTS if empty
-    db.execute(
+
+SUGGEST_TABLE_DDL = {table: _suggest_ddl(table)[0] for table in SUGGEST_SOURCES}
+FTS_TRIGGERS.update(
+    {name: ddl for table in SUGGEST_SOURCES for name, ddl in _suggest_ddl(table)[1].items()}
+)
+
+FTS_DDL = [FTS_TABLE_DDL, *SUGGEST_TABLE_DDL.values(), *FTS_TRIGGERS.values()]
+
+
+def drop_fts_triggers(conn: Connection | Session) -> None:
+    """Detach the search indexes from their tables (bulk loads re-index once via rebuild_fts)."""
+    for name in FTS_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+def create_fts_triggers(conn: Connection | Session) -> None:
+    for ddl in FTS_TRIGGERS.values():
+        conn.execute(text(ddl))
+
+
+def rebuild_suggestions(conn: Connection | Session, table: str) -> None:
+    source, label, _, cond = SUGGEST_SOURCES[table]
+    conn.execute(text(f"DELETE FROM {table}"))
+    conn.execute(
         text(
-            """
-            INSERT INTO posts_fts(rowid, title, content, post_id)
-            SELECT id, title, content, id FROM posts
-            WHERE id NOT IN (SELECT post_id FROM posts_fts);
-            """
+            f"INSERT INTO {table}(rowid, label) SELECT id, {label} FROM {source} "
+            f"WHERE {cond.format(row=source)}"
         )
     )
 
 
-def init_db() -> None:
-    Base.metadata.create_all(bind=engine)
+def rebuild_fts(conn: Connection | Session) -> None:
+    """Re-index every post (reading the text straight from posts) and every suggestion."""
+    conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+    for table in SUGGEST_SOURCES:
+        rebuild_suggestions(conn, table)
+
+
+def _fts_table_sql(conn: Connection | Session, name: str = "posts_fts") -> str | None:
+    return conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+    ).scalar()
+
+
+def _create_sqlite_fts(db: Session) -> None:
+    """Create SQLite FTS5 tables + triggers for full-text search and autocomplete.
+
+    A posts_fts from before the switch to external content (it kept its own copy of
+    every title and body) is dropped and rebuilt from posts.
+    """
+    existing = _fts_table_sql(db)
+    if existing is not None and "content='posts'" not in existing:
+        drop_fts_triggers(db)
+        db.execute(text("DROP TABLE posts_fts"))
+        existing = None
+
+    new_suggestions = [table for table in SUGGEST_SOURCES if _fts_table_sql(db, table) is None]
+
+    for ddl in FTS_DDL:
+        db.execute(text(ddl))
+    if existing is None:
+        db.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+    for table in new_suggestions:
+        rebuild_suggestions(db, table)
+
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL the app expects; changes whenever models or FTS setup change."""
+    dialect = engine.dialect
+    h = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        h.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            h.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    if dialect.name == "sqlite":
+        for ddl in FTS_DDL:
+            h.update(ddl.encode())
+    return h.hexdigest()
+
+
+def _stored_fingerprint() -> str | None:
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                text("SELECT value FROM app_meta WHERE key = :k"), {"k": SCHEMA_META_KEY}
+            ).first()
+    except SQLAlchemyError:
+        # Fresh database: app_meta does not exist yet
+        return None
+    return row[0] if row else None
+
+
+def init_db(force: bool = False) -> bool:
+    """Bring the schema (tables, indexes, FTS) up to date.
+
+    The expected schema fingerprint is stored in ``app_meta``; when it matches, startup
+    costs a single primary-key lookup. Returns True if DDL was (re)applied.
+    Seeding is a separate step: see ``seed_db``.
+    """
+    with startup_report.phase("init_db.check"):
+        fingerprint = schema_fingerprint()
+        up_to_date = not force and _stored_fingerprint() == fingerprint
+    startup_report.note("schema_up_to_date", up_to_date)
+    if up_to_date:
+        return False
+
+    with startup_report.phase("init_db.create_all"):
+        Base.metadata.create_all(bind=engine)
+        # create_all skips existing tables entirely; add indexes introduced since
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
 
     from database.session import SessionLocal
 
@@ -83,8 +214,35 @@ def init_db() -> None:
     try:
         # FTS
         if engine.url.get_backend_name() == "sqlite":
-            _create_sqlite_fts(db)
+            with startup_report.phase("init_db.fts"):
+                _create_sqlite_fts(db)
+
+        # First run with the rollup table (or a fresh DB): seed it from base tables
+        from services import stats_service
+
+        stats_service.backfill_if_empty(db)
+
+        meta = db.get(AppMeta, SCHEMA_META_KEY)
+        if meta is None:
+            db.add(AppMeta(key=SCHEMA_META_KEY, value=fingerprint))
+        else:
+            meta.value = fingerprint
+        db.commit()
+    finally:
+        db.close()
+    return True
 
+
+def seed_db() -> None:
+    """Insert default categories and the admin account (explicit command, not on startup)."""
+    from database.session import SessionLocal
+    from services import stats_service
+    from services.auth_service import get_password_hash
+    from services.category_service import category_registry
+
+    init_db()
+    db = SessionLocal()
+    try:
         # Seed categories
         if db.query(Category).count() == 0:
             for name, slug, desc, color in DEFAULT_CATEGORIES:
@@ -101,12 +259,19 @@ def init_db() -> None:
                 bio="Администратор по умолчанию (пароль: admin123)",
             )
             db.add(admin)
+            stats_service.record(db, {"users": 1})
 
         db.commit()
     finally:
         db.close()
+    category_registry.invalidate()
 
 
 if __name__ == "__main__":
-    init_db()
-    print("✅ DB initialized")
+    # python -m database.init_db [--seed] [--force]
+    init_db(force="--force" in sys.argv)
+    if "--seed" in sys.argv:
+        seed_db()
+        print("✅ DB initialized and seeded")
+    else:
+        print("✅ DB initialized")
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import Any, cast
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+from models.db_base import Base
+
+# SQLite's historic SQLITE_MAX_VARIABLE_NUMBER (newer builds allow 32766, PostgreSQL 65535)
+MAX_BIND_PARAMS = 999
+
+
+def _upsert(
+    dialect: str, table: Table, rows: list[dict[str, Any]], key: list[str], add: list[str]
+) -> Insert:
+    if dialect == "sqlite":
+        lite = sqlite.insert(table).values(rows)
+        return lite.on_conflict_do_update(
+            index_elements=key, set_={col: table.c[col] + lite.excluded[col] for col in add}
+        )
+    pg = postgresql.insert(table).values(rows)
+    return pg.on_conflict_do_update(
+        index_elements=key, set_={col: table.c[col] + pg.excluded[col] for col in add}
+    )
+
+
+def upsert_add(
+    db: Session,
+    model: type[Base],
+    rows: list[dict[str, Any]],
+    *,
+    key: list[str],
+    add: list[str],
+) -> None:
+    """INSERT rows of ``model``; on key conflict add the ``add`` columns to the stored values.
+
+    Multi-row statements of at most ``MAX_BIND_PARAMS`` parameters on SQLite/PostgreSQL,
+    row-by-row fallback elsewhere.
+    """
+    if not rows:
+        return
+    table = cast(Table, model.__table__)
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        size = max(1, MAX_BIND_PARAMS // len(rows[0]))
+        for i in range(0, len(rows), size):
+            db.execute(_upsert(dialect, table, rows[i : i + size], key, add))
+        return
+
+    for row in rows:
+        where = [table.c[k] == row[k] for k in key]
+        result = db.execute(
+            table.update().where(*where).values({col: table.c[col] + row[col] for col in add})
+        )
+        if not cast(CursorResult, result).rowcount:
+            db.execute(table.insert().values(row))
@@ -1,47 +1,112 @@
 from __future__ import annotations
 
-import os
-
-from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
-try:
-    from prometheus_fastapi_instrumentator import Instrumentator  # type: ignore
-except Exception:  # pragma: no cover
-    Instrumentator = None
-
-from database.init_db import init_db
-from routers import (
+import time
+
+_import_started = time.perf_counter()
+
+import os  # noqa: E402
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.staticfiles import StaticFiles  # noqa: E402
+from fastapi.responses import RedirectResponse  # noqa: E402
+
+from database import session as db_session  # noqa: E402
+from database.init_db import init_db  # noqa: E402
+from routers import (  # noqa: E402
+    admin_api_router,
     auth_router,
     categories_api_router,
     html_router,
+    notifications_api_router,
     posts_api_router,
+    search_api_router,
     subscriptions_api_router,
     users_api_router,
     ws_router,
 )
-from services.auth_service import verify_token
-from prometheus_fastapi_instrumentator import Instrumentator
-instrumentator = Instrumentator()
+from routers.serializers import FastJSONResponse  # noqa: E402
+from services import sql_metrics  # noqa: E402
+from services.slow_query_log import slow_query_log  # noqa: E402
+from services.auth_service import verify_token  # noqa: E402
+from services.startup_report import startup_report  # noqa: E402
+
+# Prometheus is optional; METRICS_ENABLED=0 skips importing it at all
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Debug mode: Server-Timing headers with per-request DB time
+DEBUG = os.getenv("DEBUG", "0") == "1"
+
+startup_report.record("import", _import_started)
 
 
 app = FastAPI(
     title="Blog Platform",
     description="Платформа для ведения блога (FastAPI + Jinja + SQLite)",
     version="2.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 # Static
 os.makedirs("static/uploads", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+if METRICS_ENABLED:
+    try:
+        from prometheus_fastapi_instrumentator import Instrumentator  # type: ignore
+    except Exception:  # pragma: no cover
+        Instrumentator = None  # type: ignore[misc,assignment]
+    if Instrumentator is not None:
+        with startup_report.phase("metrics"):
+            instrumentator = Instrumentator()
+            instrumentator.instrument(app)
+            instrumentator.expose(app)
+
+# Query count / DB time per route, N+1 warnings, slow-query log
+sql_metrics.install(db_session.engine)
+slow_query_log.install(db_session.engine)
+app.add_middleware(
+    sql_metrics.SQLMetricsMiddleware, prometheus=METRICS_ENABLED, server_timing=DEBUG
+)
 
 
-instrumentator.instrument(app)
-instrumentator.expose(app)
 @app.on_event("startup")
 async def _startup():
+    # Background services are imported here, not at module level: importing main stays cheap
+    from services import related_service, trending_service
+    from services.category_service import category_registry
+    from services.facet_index import facet_index
+    from services.fts_maintenance import fts_maintenance
+    from services.jobs import job_executor
+    from services.view_analytics import view_aggregator
+
     init_db()
+    category_registry.invalidate()
+    await facet_index.start()
+    await job_executor.start(prometheus=METRICS_ENABLED)
+    view_aggregator.start()
+    trending_service.recompute_task.start()
+    related_service.recompute_task.start()
+    related_service.schedule_rebuild(only_if_empty=True)
+    fts_maintenance.start(prometheus=METRICS_ENABLED)
+    startup_report.log()
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    from services import related_service, trending_service
+    from services.facet_index import facet_index
+    from services.fts_maintenance import fts_maintenance
+    from services.jobs import job_executor
+    from services.view_analytics import view_aggregator
+    from services.write_queue import write_queue
+
+    await job_executor.stop()
+    await view_aggregator.stop()
+    await trending_service.recompute_task.stop()
+    await related_service.recompute_task.stop()
+    await fts_maintenance.stop()
+    await facet_index.stop()
+    write_queue.stop()
+
 
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next):
@@ -69,8 +134,17 @@ app.include_router(users_api_router)
 app.include_router(posts_api_router)
 app.include_router(categories_api_router)
 app.include_router(subscriptions_api_router)
+app.include_router(notifications_api_router)
+app.include_router(search_api_router)
 app.include_router(html_router)
 app.include_router(ws_router)
+app.include_router(admin_api_router)
+
+
+@app.get("/health/startup")
+async def startup_timings():
+    """Import/init phase timings of this worker (for autoscaling readiness tuning)."""
+    return startup_report.as_dict()
 
 
 @app.get("/protected")
@@ -1 +1,15 @@
-from .db_models import User, Post, Category, Favorite, Comment, Subscription, Reaction, PostCategory
+from .db_models import (
+    User,
+    Post,
+    Category,
+    Favorite,
+    Comment,
+    Subscription,
+    Reaction,
+    PostCategory,
+    AppMeta,
+    StatsRollup,
+    PostViewHour,
+    PostViewDay,
+    PostHotScore,
+)
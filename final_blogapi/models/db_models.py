@@ -7,7 +7,9 @@ from sqlalchemy import (
     Boolean,
     CheckConstraint,
     DateTime,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -71,6 +73,8 @@ class Post(Base):
 
     __table_args__ = (
         CheckConstraint("status IN ('draft','published','archived')", name="ck_posts_status"),
+        # Default feed: WHERE status = ? ORDER BY created_at DESC
+        Index("ix_posts_status_created_at", "status", "created_at"),
     )
 
     author: Mapped["User"] = relationship(back_populates="posts")
@@ -87,6 +91,8 @@ class PostCategory(Base):
     post: Mapped["Post"] = relationship(back_populates="categories")
     category: Mapped["Category"] = relationship(back_populates="posts")
 
+    __table_args__ = (Index("ix_post_categories_category_id_post_id", "category_id", "post_id"),)
+
 
 class Favorite(Base):
     __tablename__ = "favorites"
@@ -98,6 +104,11 @@ class Favorite(Base):
     user: Mapped["User"] = relationship()
     post: Mapped["Post"] = relationship()
 
+    __table_args__ = (
+        Index("ix_favorites_post_id", "post_id"),
+        Index("ix_favorites_user_id_saved_at", "user_id", "saved_at"),
+    )
+
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -115,6 +126,10 @@ class Comment(Base):
     author: Mapped["User"] = relationship(back_populates="comments")
     parent: Mapped[Optional["Comment"]] = relationship(remote_side="Comment.id")
 
+    __table_args__ = (
+        Index("ix_comments_post_id_approved_created_at", "post_id", "is_approved", "created_at"),
+    )
+
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
@@ -125,6 +140,44 @@ class Subscription(Base):
 
     __table_args__ = (
         CheckConstraint("subscriber_id != target_user_id", name="ck_no_self_sub"),
+        # Covering indexes for the follower/following pages (newest first)
+        Index(
+            "ix_subscriptions_target_user_id_subscribed_at",
+            "target_user_id",
+            "subscribed_at",
+            "subscriber_id",
+        ),
+        Index(
+            "ix_subscriptions_subscriber_id_subscribed_at",
+            "subscriber_id",
+            "subscribed_at",
+            "target_user_id",
+        ),
+    )
+
+
+class Notification(Base):
+    """Inbox row: ``kind`` is 'post' (``ref_id`` = the post), 'comment' or 'reply'
+    (``ref_id`` = the comment); (kind, ref_id, user) is unique so a fan-out can be retried."""
+
+    __tablename__ = "notifications"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    ref_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    actor_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    is_read: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("ux_notifications_kind_ref_user", "kind", "ref_id", "user_id", unique=True),
+        # Inbox pages, newest first, with the id as cursor
+        Index("ix_notifications_user_id_id", "user_id", "id"),
     )
 
 
@@ -137,4 +190,120 @@ class Reaction(Base):
 
     __table_args__ = (
         CheckConstraint("reaction_type IN ('like','dislike')", name="ck_reaction_type"),
+        Index("ix_reactions_post_id_reaction_type", "post_id", "reaction_type"),
+    )
+
+
+class AppMeta(Base):
+    """Key/value store for internal state (schema fingerprint, FTS version, ...)."""
+
+    __tablename__ = "app_meta"
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class StatsRollup(Base):
+    """Incrementally maintained counters for the admin dashboard.
+
+    period='day'/'month' rows count arrivals per bucket ('2025-12-13' / '2025-12');
+    period='total' (bucket '') holds the current size of each metric.
+    """
+
+    __tablename__ = "stats_rollups"
+    metric: Mapped[str] = mapped_column(String(50), primary_key=True)
+    period: Mapped[str] = mapped_column(String(10), primary_key=True)
+    bucket: Mapped[str] = mapped_column(String(10), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class PostViewHour(Base):
+    """Views per post per hour; ``hour`` is hours since the Unix epoch (UTC)."""
+
+    __tablename__ = "post_view_hours"
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    hour: Mapped[int] = mapped_column(Integer, primary_key=True)
+    views: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (Index("ix_post_view_hours_hour_post", "hour", "post_id"),)
+
+
+class PostViewDay(Base):
+    """Hourly buckets older than the retention window, downsampled to days since epoch."""
+
+    __tablename__ = "post_view_days"
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[int] = mapped_column(Integer, primary_key=True)
+    views: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (Index("ix_post_view_days_day_post", "day", "post_id"),)
+
+
+class PostHotScore(Base):
+    """Trending key per post: log2 of forward-decayed engagement (see trending_service)."""
+
+    __tablename__ = "post_hot_scores"
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class PostRelated(Base):
+    """Precomputed nearest neighbours of a published post by TF-IDF cosine (see related_service)."""
+
+    __tablename__ = "post_related"
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
     )
+    related_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # Lists that mention a post, for incremental updates and deletes
+    __table_args__ = (Index("ix_post_related_related_id", "related_id"),)
+
+
+class Job(Base):
+    """Background job (see services/jobs.py); deleted once it succeeds.
+
+    Times are Unix timestamps: ``run_after`` is when it may run next (retries back off),
+    ``locked_until`` the lease of the worker running it.
+    """
+
+    __tablename__ = "jobs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[float] = mapped_column(Float, nullable=False)
+    run_after: Mapped[float] = mapped_column(Float, nullable=False)
+    locked_until: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    __table_args__ = (Index("ix_jobs_run_after_id", "run_after", "id"),)
+
+
+class DeadJob(Base):
+    """A job that failed ``JOB_MAX_ATTEMPTS`` times; kept for inspection and manual retry."""
+
+    __tablename__ = "dead_jobs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # The id it had in ``jobs``; not unique: SQLite reuses ids of deleted rows
+    job_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[float] = mapped_column(Float, nullable=False)
+    failed_at: Mapped[float] = mapped_column(Float, nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(Text)
@@ -3,5 +3,8 @@ from .users_api import router as users_api_router
 from .posts_api import router as posts_api_router
 from .categories_api import router as categories_api_router
 from .subscriptions_api import router as subscriptions_api_router
+from .notifications_api import router as notifications_api_router
+from .search_api import router as search_api_router
 from .html_routes import router as html_router
 from .ws import router as ws_router
+from .admin_api import router as admin_api_router
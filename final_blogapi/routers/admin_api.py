@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import tempfile
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import session as db_session
+from database.session import get_db
+from routers.deps import require_role
+from services import bulk_service, fts_maintenance, jobs, profiling, stats_service, view_analytics
+from services.profiling import memory_profiler
+from services.slow_query_log import slow_query_log
+
+router = APIRouter(
+    prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_role("admin"))]
+)
+
+
+@router.get("/export")
+def export_content(
+    types: str | None = Query(
+        None, description="comma-separated: " + ",".join(bulk_service.EXPORT_TABLES)
+    ),
+):
+    wanted = types.split(",") if types else None
+    if wanted and not set(wanted) <= set(bulk_service.EXPORT_TABLES):
+        raise HTTPException(status_code=400, detail="unknown type")
+    return StreamingResponse(
+        bulk_service.export_ndjson(db_session.engine, wanted),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="blog-export.ndjson"'},
+    )
+
+
+@router.post("/import")
+async def import_content(request: Request):
+    # Spool the upload (memory up to 16MB, then disk) instead of buffering it whole
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as buf:
+        async for chunk in request.stream():
+            buf.write(chunk)
+        buf.seek(0)
+        try:
+            return await run_in_threadpool(bulk_service.import_ndjson, db_session.engine, buf)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except IntegrityError:
+            raise HTTPException(
+                status_code=409, detail="rows already exist; import into an empty database"
+            )
+
+
+@router.get("/stats")
+def stats(
+    metric: str = Query(..., description=",".join(stats_service.SERIES_METRICS)),
+    period: str = Query("day", pattern="^(day|month)$"),
+    points: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+):
+    if metric not in stats_service.SERIES_METRICS:
+        raise HTTPException(status_code=400, detail="unknown metric")
+    return {
+        "metric": metric,
+        "period": period,
+        "total": stats_service.totals(db).get(metric, 0),
+        "points": stats_service.series(db, metric, period=period, points=points),
+    }
+
+
+@router.get("/top-posts")
+def top_posts(
+    start: datetime | None = Query(None, description="ISO datetime, default: end - 7 days"),
+    end: datetime | None = Query(None, description="ISO datetime, default: now"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    return {"items": view_analytics.top_posts(db, start=start, end=end, limit=limit)}
+
+
+@router.get("/slow-queries")
+def slow_queries(
+    limit: int = Query(20, ge=1, le=500),
+    sort: str = Query("total_ms", pattern="^(total_ms|count|max_ms|p95_ms|mean_ms)$"),
+):
+    return {"threshold_ms": slow_query_log.threshold_ms, "items": slow_query_log.top(limit, sort)}
+
+
+@router.get("/slow-queries/{fingerprint}")
+def slow_query(fingerprint: str):
+    entry = slow_query_log.get(fingerprint)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="unknown fingerprint")
+    return entry
+
+
+@router.delete("/slow-queries")
+def reset_slow_queries():
+    slow_query_log.reset()
+    return {"ok": True}
+
+
+@router.get("/profile/cpu")
+async def profile_cpu(
+    seconds: float = Query(5.0, gt=0, le=profiling.MAX_CPU_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    include_idle: bool = Query(False),
+    limit: int = Query(30, ge=1, le=500),
+):
+    """Sample every thread of this worker; ``collapsed`` feeds flamegraph.pl / speedscope."""
+    try:
+        profile = await run_in_threadpool(
+            profiling.sample_cpu, seconds, interval_ms / 1000, include_idle
+        )
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":
+        return PlainTextResponse(
+            profiling.collapsed(profile),
+            headers={
+                "Content-Disposition": f'attachment; filename="cpu-{profile["pid"]}.folded"',
+                "X-Profile-Samples": str(profile["samples"]),
+            },
+        )
+    return {
+        **{k: v for k, v in profile.items() if k != "stacks"},
+        "top": profiling.top_functions(profile, limit),
+    }
+
+
+@router.get("/profile/memory")
+def memory_status():
+    return memory_profiler.status()
+
+
+@router.post("/profile/memory/start")
+def memory_start(frames: int = Query(10, ge=1, le=100)):
+    return memory_profiler.start(frames)
+
+
+@router.post("/profile/memory/stop")
+def memory_stop():
+    return memory_profiler.stop()
+
+
+@router.post("/profile/memory/snapshot")
+def memory_snapshot(
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(20, ge=1, le=500),
+):
+    try:
+        return memory_profiler.snapshot(key_type, limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/profile/memory/diff")
+def memory_diff(
+    base: str = Query(..., description="snapshot id"),
+    current: str | None = Query(None, description="snapshot id, default: take a new one"),
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(20, ge=1, le=500),
+):
+    try:
+        return memory_profiler.diff(base, current, key_type, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"unknown snapshot {e.args[0]}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/jobs")
+def job_queue(limit: int = Query(20, ge=0, le=200), db: Session = Depends(get_db)):
+    """Queue depth, worker counters, wait/run latency and the latest dead letters."""
+    return {**jobs.job_executor.stats(), "dead_jobs": jobs.list_dead(db, limit=limit)}
+
+
+@router.post("/jobs/dead/{job_id}/retry")
+def retry_dead_job(job_id: int, db: Session = Depends(get_db)):
+    if not jobs.retry_dead(db, job_id):
+        raise HTTPException(status_code=404, detail="Dead job not found")
+    return {"ok": True}
+
+
+def _fts(db: Session) -> fts_maintenance.FtsMaintenance:
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=409, detail="full-text index is SQLite-only")
+    return fts_maintenance.fts_maintenance
+
+
+@router.get("/fts")
+def fts_status(db: Session = Depends(get_db)):
+    """Segment count, index size, scheduler counters and the last run of each action."""
+    return _fts(db).stats()
+
+
+@router.post("/fts/merge")
+def fts_merge(db: Session = Depends(get_db)):
+    fts = _fts(db)
+    return {"steps": fts.run("merge", fts.merge), **fts.report()}
+
+
+@router.post("/fts/optimize")
+def fts_optimize(db: Session = Depends(get_db)):
+    return _fts(db).run("optimize", fts_maintenance.optimize)
+
+
+@router.post("/fts/integrity-check")
+def fts_integrity_check(db: Session = Depends(get_db)):
+    error = _fts(db).run("integrity", fts_maintenance.integrity_check)
+    return {"ok": error is None, "error": error}
+
+
+@router.post("/fts/rebuild", status_code=202)
+def fts_rebuild(db: Session = Depends(get_db)):
+    """Queue an online rebuild from posts (a background job; see ``GET /fts``)."""
+    _fts(db)
+    jobs.enqueue(db, "fts_rebuild", {})
+    db.commit()
+    return {"queued": True}
@@ -3,17 +3,17 @@ from __future__ import annotations
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from database.session import get_db
+from routers.templating import templates
 from schemas.auth import UserLogin, UserRegister, UserResponse
 from services import user_service
 from services.auth_service import create_access_token, get_password_hash, verify_password
 
 router = APIRouter(tags=["auth"])
-templates = Jinja2Templates(directory="templates")
 
 
 def _set_auth_cookie(resp, token: str):
@@ -75,8 +75,16 @@ async def login_user(request: Request, db: Session = Depends(get_db)):
     except Exception as e:
         return templates.TemplateResponse("auth/login.html", {"request": request, "error": str(e)})
 
-    user = user_service.get_user_by_email(db, data.email)
-    if not user or not verify_password(data.password, user.password_hash):
+    def authenticate():
+        user = user_service.get_user_by_email(db, data.email)
+        if not user or not verify_password(data.password, user.password_hash):
+            return None
+        db.close()  # the connection is not needed while the response is built
+        return user
+
+    # bcrypt and the lookup must not block the event loop
+    user = await run_in_threadpool(authenticate)
+    if user is None:
         return templates.TemplateResponse(
             "auth/login.html", {"request": request, "error": "Неверный email или пароль"}
         )
@@ -7,14 +7,28 @@ from database.session import get_db
 from models.db_models import Category
 from routers.deps import require_role
 from schemas.categories import CategoryCreate, CategoryResponse
-from services.category_service import list_categories
+from routers.serializers import FastJSONResponse
+from services import category_service
 
 router = APIRouter(prefix="/api/categories", tags=["categories"])
 
 
 @router.get("", response_model=list[CategoryResponse])
 def get_categories(db: Session = Depends(get_db)):
-    return list_categories(db)
+    counts = category_service.published_counts(db)
+    return FastJSONResponse(
+        [
+            {
+                "id": c.id,
+                "name": c.name,
+                "slug": c.slug,
+                "description": c.description,
+                "color": c.color,
+                "published_posts": counts.get(c.id, 0),
+            }
+            for c in category_service.list_categories(db)
+        ]
+    )
 
 
 @router.post("", response_model=CategoryResponse, dependencies=[Depends(require_role("admin", "moderator"))])
@@ -23,11 +37,13 @@ def create_category(payload: CategoryCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="slug already exists")
     if db.query(Category).filter(Category.name == payload.name).first():
         raise HTTPException(status_code=400, detail="name already exists")
-    c = Category(name=payload.name, slug=payload.slug, description=payload.description, color=payload.color)
-    db.add(c)
-    db.commit()
-    db.refresh(c)
-    return c
+    return category_service.create_category(
+        db,
+        name=payload.name,
+        slug=payload.slug,
+        description=payload.description,
+        color=payload.color,
+    )
 
 
 @router.delete("/{category_id}", dependencies=[Depends(require_role("admin"))])
@@ -35,6 +51,5 @@ def delete_category(category_id: int, db: Session = Depends(get_db)):
     c = db.get(Category, category_id)
     if not c:
         raise HTTPException(status_code=404, detail="Not found")
-    db.delete(c)
-    db.commit()
+    category_service.delete_category(db, c)
     return {"ok": True}
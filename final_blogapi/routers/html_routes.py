@@ -2,24 +2,32 @@ from __future__ import annotations
 
 from pathlib import Path
 
-import markdown as md
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from database.session import get_db
-from models.db_models import Post, User, Subscription
+from models.db_models import User
 from routers.deps import get_current_user, require_role
-from services import comment_service, post_service, user_service
-from services.category_service import list_categories
+from routers.templating import stream_template, templates
+from services import (
+    comment_service,
+    post_service,
+    related_service,
+    social_graph,
+    stats_service,
+    user_service,
+)
+from services.category_service import list_categories, published_counts
+from services.slow_query_log import slow_query_log
+from services.write_queue import TargetNotFound, write_queue
 
 router = APIRouter(tags=["pages"])
-templates = Jinja2Templates(directory="templates")
 
 
 def _markdown_to_html(text_value: str) -> str:
+    import markdown as md  # heavy import, deferred to the first rendered post
+
     return md.markdown(text_value, extensions=["extra", "tables", "fenced_code"])
 
 
@@ -43,27 +51,25 @@ def index(
         per_page=per_page,
         feed=feed,
         viewer_id=int(user_id) if user_id else None,
+        columns=post_service.SUMMARY_COLUMNS,
+        with_author=True,
     )
 
-    items = []
-    for p in posts:
-        counts = post_service.get_post_counts(db, p.id)
-        cats = post_service.get_post_categories(db, p.id)
-        items.append(
-            {
-                "post": p,
-                "counts": counts,
-                "categories": cats,
-                "author": db.get(User, p.author_id),
-            }
-        )
+    ids = [p.id for p in posts]
+    counts = post_service.get_posts_counts(db, ids)
+    cats = post_service.get_posts_categories(db, ids)
+    items = [
+        {"post": p, "counts": counts[p.id], "categories": cats[p.id], "author": p.author}
+        for p in posts
+    ]
 
-    return templates.TemplateResponse(
+    return stream_template(
         "index.html",
         {
             "request": request,
             "items": items,
             "categories": list_categories(db),
+            "category_counts": published_counts(db),
             "q": q or "",
             "category": category or "",
             "page": page,
@@ -87,15 +93,22 @@ def post_page(request: Request, post_id: int, db: Session = Depends(get_db)):
     cats = post_service.get_post_categories(db, post_id)
     author = db.get(User, post.author_id)
     comments = comment_service.list_comments(db, post_id=post_id)
+    related = [
+        p
+        for p in post_service.get_posts(
+            db, [i for i, _ in related_service.related_ids(db, post_id)]
+        )
+        if p.status == "published"
+    ]
 
     user_id = getattr(request.state, "user_id", None)
     favorited = False
     my_reaction = None
     if user_id:
-        favorited = post_service.is_favorited(db, user_id=int(user_id), post_id=post_id)
-        my_reaction = post_service.get_user_reaction(db, user_id=int(user_id), post_id=post_id)
+        state = post_service.get_viewer_state(db, user_id=int(user_id), post_ids=[post_id])[post_id]
+        favorited, my_reaction = state["favorited"], state["reaction"]
 
-    return templates.TemplateResponse(
+    return stream_template(
         "post.html",
         {
             "request": request,
@@ -105,6 +118,7 @@ def post_page(request: Request, post_id: int, db: Session = Depends(get_db)):
             "categories": cats,
             "author": author,
             "comments": comments,
+            "related": related,
             "favorited": favorited,
             "my_reaction": my_reaction,
         },
@@ -221,7 +235,9 @@ def favorites_page(
     user: User = Depends(get_current_user),
 ):
     offset = (page - 1) * per_page
-    posts = post_service.list_favorites(db, user_id=user.id, limit=per_page, offset=offset)
+    posts = post_service.list_favorites(
+        db, user_id=user.id, limit=per_page, offset=offset, columns=post_service.SUMMARY_COLUMNS
+    )
     items = []
     for p in posts:
         counts = post_service.get_post_counts(db, p.id)
@@ -238,9 +254,13 @@ def favorites_page(
 @router.get("/profile", response_class=HTMLResponse)
 def profile_page(
     request: Request,
+    db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    return templates.TemplateResponse("profile.html", {"request": request, "user": user})
+    counts = social_graph.counts(db, [user.id])[user.id]
+    return templates.TemplateResponse(
+        "profile.html", {"request": request, "user": user, "counts": counts}
+    )
 
 
 @router.post("/profile")
@@ -274,13 +294,8 @@ def users_search_page(request: Request, q: str | None = None, db: Session = Depe
     users = user_service.search_users(db, q=q, limit=50, offset=0) if q else []
     viewer_id = getattr(request.state, "user_id", None)
     following: set[int] = set()
-    if viewer_id:
-        rows = (
-            db.query(Subscription.target_user_id)
-            .filter(Subscription.subscriber_id == int(viewer_id))
-            .all()
-        )
-        following = {int(r[0]) for r in rows}
+    if viewer_id and users:
+        following = social_graph.following_among(db, int(viewer_id), [u.id for u in users])
 
     return templates.TemplateResponse(
         "users.html",
@@ -289,14 +304,15 @@ def users_search_page(request: Request, q: str | None = None, db: Session = Depe
 
 
 @router.post("/users/{user_id}/follow")
-def follow_action(
-    user_id: int,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def follow_action(
+    user_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)
 ):
-    from services.subscription_service import toggle_subscription
-
-    toggle_subscription(db, subscriber_id=user.id, target_user_id=user_id)
+    if user.id != user_id:
+        db.close()  # release the connection while waiting for the group commit
+        try:
+            await write_queue.toggle_subscription(subscriber_id=user.id, target_user_id=user_id)
+        except TargetNotFound:
+            raise HTTPException(status_code=404, detail="User not found")
     return RedirectResponse(f"/users?q=", status_code=status.HTTP_302_FOUND)
 
 
@@ -306,25 +322,28 @@ def admin_dashboard(
     db: Session = Depends(get_db),
     user: User = Depends(require_role("admin")),
 ):
-    users_total = db.query(User).count()
-    posts_total = db.query(Post).count()
-    published_total = db.query(Post).filter(Post.status == "published").count()
-
-    rows = db.execute(
-        text(
-            "SELECT strftime('%Y-%m', created_at) AS ym, COUNT(*) AS cnt "
-            "FROM users GROUP BY ym ORDER BY ym DESC LIMIT 6"
-        )
-    ).fetchall()
-    regs = list(reversed([{"month": r[0], "count": int(r[1])} for r in rows]))
+    totals = stats_service.totals(db)
+    regs = [
+        {"month": p["bucket"], "count": p["value"]}
+        for p in stats_service.series(db, "users", period="month", points=6)
+    ]
+    charts = []
+    for m in stats_service.SERIES_METRICS:
+        points = stats_service.series(db, m, period="day", points=30)
+        values = [p["value"] for p in points]
+        charts.append({"metric": m, "points": points, "max": max(values + [1]), "sum": sum(values)})
 
     return templates.TemplateResponse(
         "admin_dashboard.html",
         {
             "request": request,
-            "users_total": users_total,
-            "posts_total": posts_total,
-            "published_total": published_total,
+            "users_total": totals.get("users", 0),
+            "posts_total": totals.get("posts", 0),
+            "published_total": totals.get("posts_published", 0),
+            "totals": totals,
             "regs": regs,
+            "charts": charts,
+            "slow_queries": slow_query_log.top(10),
+            "slow_threshold_ms": slow_query_log.threshold_ms,
         },
     )
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from database.session import get_db
+from models.db_models import User
+from routers.deps import get_current_user
+from routers.serializers import FastJSONResponse
+from schemas.notifications import MarkRead
+from services import notification_service
+
+router = APIRouter(prefix="/api/notifications", tags=["notifications"])
+
+
+@router.get("", response_model=dict)
+def list_notifications(
+    cursor: int | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    unread: bool = Query(False, description="only unread"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    items, next_cursor = notification_service.list_notifications(
+        db, user.id, before=cursor, limit=limit, unread_only=unread
+    )
+    return FastJSONResponse(
+        {
+            "items": items,
+            "next_cursor": next_cursor,
+            "unread": notification_service.unread_count(db, user.id),
+        }
+    )
+
+
+@router.get("/unread-count")
+def unread_count(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return {"unread": notification_service.unread_count(db, user.id)}
+
+
+@router.post("/read")
+def mark_read(
+    payload: MarkRead, db: Session = Depends(get_db), user: User = Depends(get_current_user)
+):
+    updated = notification_service.mark_read(db, user.id, payload.ids)
+    return {"updated": updated, "unread": notification_service.unread_count(db, user.id)}
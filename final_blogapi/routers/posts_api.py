@@ -1,42 +1,120 @@
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Any
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from database.session import get_db
 from models.db_models import Post, User
 from routers.deps import get_current_user, require_role
+from routers.serializers import FastJSONResponse, comment_read
 from schemas.comments import CommentCreate, CommentResponse
 from schemas.posts import PostCreate, PostResponse, PostUpdate
-from services import comment_service, post_service
-from services.realtime import manager
+from services import comment_service, post_service, related_service, view_analytics
+from services.write_queue import TargetNotFound, write_queue
 
 router = APIRouter(prefix="/api/posts", tags=["posts"])
 
 
+MAX_BATCH_IDS = 100
+
+
+# Keys of a post in API responses, in output order
+FIELDS = (
+    "id",
+    "author_id",
+    "author_username",
+    "title",
+    "content",
+    "excerpt",
+    "status",
+    "created_at",
+    "updated_at",
+    "published_at",
+    "view_count",
+    "likes",
+    "dislikes",
+    "favorites",
+    "categories",
+)
+# Default for list endpoints: the Markdown body is only served by GET /api/posts/{id}
+SUMMARY_FIELDS = tuple(f for f in FIELDS if f != "content")
+_COUNT_FIELDS = {"likes", "dislikes", "favorites"}
+
+
 def _post_to_response(db: Session, post: Post) -> dict:
-    counts = post_service.get_post_counts(db, post.id)
-    cats = post_service.get_post_categories(db, post.id)
-    author_username = post.author.username if post.author else None
+    return _posts_to_response(db, [post])[0]
+
+
+def _posts_to_response(
+    db: Session, posts: list[Post], fields: tuple[str, ...] = FIELDS
+) -> list[dict]:
+    ids = [p.id for p in posts]
+    counts = post_service.get_posts_counts(db, ids) if _COUNT_FIELDS.intersection(fields) else {}
+    cats = post_service.get_posts_categories(db, ids) if "categories" in fields else {}
+    out = []
+    for post in posts:
+        item: dict[str, Any] = {}
+        for f in fields:
+            if f in _COUNT_FIELDS:
+                item[f] = counts[post.id][f]
+            elif f == "categories":
+                item[f] = [
+                    {"id": c.id, "name": c.name, "slug": c.slug, "color": c.color}
+                    for c in cats[post.id]
+                ]
+            elif f == "author_username":
+                item[f] = post.author.username if post.author else None
+            else:
+                item[f] = getattr(post, f)
+        out.append(item)
+    return out
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...]:
+    """``fields=title,likes`` -> the requested keys in ``FIELDS`` order (``id`` always)."""
+    if fields is None:
+        return SUMMARY_FIELDS
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(FIELDS)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(f for f in FIELDS if f in requested)
+
+
+def _load_args(fields: tuple[str, ...]) -> dict[str, Any]:
+    """``list_posts``/``list_favorites`` kwargs that SELECT only what ``fields`` needs."""
+    columns = {f for f in fields if f in post_service.POST_COLUMNS}
+    with_author = "author_username" in fields
+    if with_author:
+        columns.add("author_id")
     return {
-        "id": post.id,
-        "author_id": post.author_id,
-        "author_username": author_username,
-        "title": post.title,
-        "content": post.content,
-        "excerpt": post.excerpt,
-        "status": post.status,
-        "created_at": post.created_at,
-        "updated_at": post.updated_at,
-        "published_at": post.published_at,
-        "view_count": post.view_count,
-        "likes": counts["likes"],
-        "dislikes": counts["dislikes"],
-        "favorites": counts["favorites"],
-        "categories": [{"id": c.id, "name": c.name, "slug": c.slug, "color": c.color} for c in cats],
+        "columns": [c for c in post_service.POST_COLUMNS if c in columns],
+        "with_author": with_author,
     }
 
 
+def _parse_ids(ids: str) -> list[int]:
+    """``"3,1,3"`` -> ``[3, 1]``: order kept, duplicates dropped."""
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    parsed = list(dict.fromkeys(parsed))
+    if not parsed:
+        raise HTTPException(status_code=422, detail="ids is empty")
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=422, detail=f"at most {MAX_BATCH_IDS} ids per request")
+    return parsed
+
+
+def _split(value: str | None) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+
+
 def _can_edit(user: User, post: Post) -> bool:
     return user.role in ("admin", "moderator") or post.author_id == user.id
 
@@ -46,34 +124,49 @@ def list_posts(
     q: str | None = Query(None),
     author_id: int | None = Query(None),
     category: str | None = Query(None, description="category slug"),
-    feed: str | None = Query(None, description="following|recommended"),
+    category_all: str | None = Query(None, description="comma-separated slugs: in every one"),
+    category_any: str | None = Query(None, description="comma-separated slugs: in at least one"),
+    category_not: str | None = Query(None, description="comma-separated slugs: in none"),
+    feed: str | None = Query(None, description="following|recommended|trending"),
     status_filter: str | None = Query("published", alias="status"),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50),
+    fields: str | None = Query(
+        None, description="comma-separated keys; default: everything but content"
+    ),
+    facets: bool = Query(False, description="add per-category counts of the matching posts"),
     db: Session = Depends(get_db),
 ):
     viewer_id = None
+    selected = _parse_fields(fields)
+    filters: post_service.ListingFilters = {
+        "author_id": author_id,
+        "category_slug": category,
+        "categories_all": _split(category_all),
+        "categories_any": _split(category_any),
+        "categories_not": _split(category_not),
+        "status": status_filter,
+        "feed": feed,
+        "viewer_id": viewer_id,
+    }
     posts, total = post_service.list_posts(
-        db,
-        q=q,
-        author_id=author_id,
-        category_slug=category,
-        status=status_filter,
-        page=page,
-        per_page=per_page,
-        feed=feed,
-        viewer_id=viewer_id,
+        db, q=q, page=page, per_page=per_page, **filters, **_load_args(selected)
     )
-    return {
+    data = {
         "page": page,
         "per_page": per_page,
         "total": total,
-        "items": [_post_to_response(db, p) for p in posts],
+        "items": _posts_to_response(db, posts, selected),
     }
+    if facets:
+        data["facets"] = {"categories": post_service.category_facets(db, **filters)}
+    return FastJSONResponse(data)
 
 
 @router.post("", response_model=PostResponse, status_code=201)
-async def create_post(payload: PostCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+def create_post(
+    payload: PostCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)
+):
     post = post_service.create_post(
         db,
         author_id=user.id,
@@ -82,9 +175,32 @@ async def create_post(payload: PostCreate, db: Session = Depends(get_db), user:
         status=payload.status,
         category_ids=payload.category_ids,
     )
-    data = _post_to_response(db, post)
-    await manager.broadcast({"type": "post_created", "post": {"id": post.id, "title": post.title, "author": user.username}})
-    return data
+    return FastJSONResponse(_post_to_response(db, post), status_code=201)
+
+
+@router.get("/batch", response_model=dict)
+def get_posts_batch(
+    ids: str = Query(..., description="comma-separated post ids, at most 100"),
+    db: Session = Depends(get_db),
+):
+    """Several posts in one round trip, in the requested order; does not count views."""
+    post_ids = _parse_ids(ids)
+    posts = post_service.get_posts(db, post_ids)
+    found = {p.id for p in posts}
+    return FastJSONResponse(
+        {"items": _posts_to_response(db, posts), "missing": [i for i in post_ids if i not in found]}
+    )
+
+
+@router.get("/viewer-state", response_model=dict)
+def get_viewer_state(
+    ids: str = Query(..., description="comma-separated post ids, at most 100"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    post_ids = _parse_ids(ids)
+    state = post_service.get_viewer_state(db, user_id=user.id, post_ids=post_ids)
+    return FastJSONResponse({"items": [{"post_id": i, **state[i]} for i in post_ids if i in state]})
 
 
 @router.get("/{post_id}", response_model=PostResponse)
@@ -95,7 +211,45 @@ def get_post(post_id: int, db: Session = Depends(get_db)):
     post_service.increment_view(db, post)
     # refresh counts after view increment
     post = post_service.get_post(db, post_id)
-    return _post_to_response(db, post)
+    return FastJSONResponse(_post_to_response(db, post))
+
+
+@router.get("/{post_id}/related", response_model=dict)
+def get_related_posts(
+    post_id: int,
+    limit: int = Query(related_service.RELATED_TOP_K, ge=1, le=20),
+    db: Session = Depends(get_db),
+):
+    """Precomputed neighbours by text similarity, best first; does not count views."""
+    if post_service.get_post(db, post_id) is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    scores = dict(related_service.related_ids(db, post_id, limit))
+    posts = [p for p in post_service.get_posts(db, list(scores)) if p.status == "published"]
+    items = _posts_to_response(db, posts, SUMMARY_FIELDS)
+    for item in items:
+        item["score"] = round(scores[item["id"]], 4)
+    return FastJSONResponse({"items": items})
+
+
+@router.get("/{post_id}/stats")
+def post_stats(
+    post_id: int,
+    start: datetime | None = Query(None, description="ISO datetime, default: end - 7 days"),
+    end: datetime | None = Query(None, description="ISO datetime, default: now"),
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    db: Session = Depends(get_db),
+):
+    post = post_service.get_post(db, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    points = view_analytics.post_series(db, post_id, start=start, end=end, granularity=granularity)
+    return {
+        "post_id": post_id,
+        "granularity": granularity,
+        "total_views": post.view_count,
+        "window_views": sum(p["views"] for p in points),
+        "points": points,
+    }
 
 
 @router.patch("/{post_id}", response_model=PostResponse)
@@ -118,7 +272,7 @@ def edit_post(
         status=payload.status,
         category_ids=payload.category_ids,
     )
-    return _post_to_response(db, post)
+    return FastJSONResponse(_post_to_response(db, post))
 
 
 @router.delete("/{post_id}")
@@ -132,33 +286,46 @@ def remove_post(post_id: int, db: Session = Depends(get_db), user: User = Depend
     return {"ok": True}
 
 
-@router.post("/{post_id}/like")
-def like(post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    if not post_service.get_post(db, post_id):
+async def _write(db: Session, coro) -> Any:
+    # Give the pooled connection back while waiting: the flusher needs one to commit
+    db.close()
+    try:
+        return await coro
+    except TargetNotFound:
         raise HTTPException(status_code=404, detail="Post not found")
-    post_service.set_reaction(db, user_id=user.id, post_id=post_id, reaction_type="like")
+
+
+@router.post("/{post_id}/like")
+async def like(post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    await _write(
+        db, write_queue.set_reaction(user_id=user.id, post_id=post_id, reaction_type="like")
+    )
     return {"ok": True}
 
 
 @router.post("/{post_id}/dislike")
-def dislike(post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    if not post_service.get_post(db, post_id):
-        raise HTTPException(status_code=404, detail="Post not found")
-    post_service.set_reaction(db, user_id=user.id, post_id=post_id, reaction_type="dislike")
+async def dislike(
+    post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)
+):
+    await _write(
+        db, write_queue.set_reaction(user_id=user.id, post_id=post_id, reaction_type="dislike")
+    )
     return {"ok": True}
 
 
 @router.post("/{post_id}/unreact")
-def unreact(post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    post_service.remove_reaction(db, user_id=user.id, post_id=post_id)
+async def unreact(
+    post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)
+):
+    await _write(db, write_queue.set_reaction(user_id=user.id, post_id=post_id, reaction_type=None))
     return {"ok": True}
 
 
 @router.post("/{post_id}/favorite")
-def favorite(post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    if not post_service.get_post(db, post_id):
-        raise HTTPException(status_code=404, detail="Post not found")
-    state = post_service.toggle_favorite(db, user_id=user.id, post_id=post_id)
+async def favorite(
+    post_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)
+):
+    state = await _write(db, write_queue.toggle_favorite(user_id=user.id, post_id=post_id))
     return {"favorited": state}
 
 
@@ -166,12 +333,20 @@ def favorite(post_id: int, db: Session = Depends(get_db), user: User = Depends(g
 def my_favorites(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50),
+    fields: str | None = Query(
+        None, description="comma-separated keys; default: everything but content"
+    ),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     offset = (page - 1) * per_page
-    posts = post_service.list_favorites(db, user_id=user.id, limit=per_page, offset=offset)
-    return {"page": page, "per_page": per_page, "items": [_post_to_response(db, p) for p in posts]}
+    selected = _parse_fields(fields)
+    posts = post_service.list_favorites(
+        db, user_id=user.id, limit=per_page, offset=offset, **_load_args(selected)
+    )
+    return FastJSONResponse(
+        {"page": page, "per_page": per_page, "items": _posts_to_response(db, posts, selected)}
+    )
 
 
 @router.get("/{post_id}/comments", response_model=list[CommentResponse])
@@ -179,25 +354,11 @@ def list_comments(post_id: int, db: Session = Depends(get_db)):
     if not post_service.get_post(db, post_id):
         raise HTTPException(status_code=404, detail="Post not found")
     comments = comment_service.list_comments(db, post_id=post_id)
-    # add author usernames
-    out = []
-    for c in comments:
-        out.append(
-            {
-                "id": c.id,
-                "post_id": c.post_id,
-                "author_id": c.author_id,
-                "parent_comment_id": c.parent_comment_id,
-                "content": c.content,
-                "created_at": c.created_at,
-                "author_username": c.author.username if c.author else None,
-            }
-        )
-    return out
+    return FastJSONResponse([comment_read(c) for c in comments])
 
 
 @router.post("/{post_id}/comments", response_model=CommentResponse, status_code=201)
-async def add_comment(
+def add_comment(
     post_id: int,
     payload: CommentCreate,
     db: Session = Depends(get_db),
@@ -212,13 +373,4 @@ async def add_comment(
         content=payload.content,
         parent_comment_id=payload.parent_comment_id,
     )
-    await manager.broadcast({"type": "comment_created", "post_id": post_id, "author": user.username})
-    return {
-        "id": c.id,
-        "post_id": c.post_id,
-        "author_id": c.author_id,
-        "parent_comment_id": c.parent_comment_id,
-        "content": c.content,
-        "created_at": c.created_at,
-        "author_username": user.username,
-    }
\ No newline at end of file
+    return FastJSONResponse(comment_read(c, user.username), status_code=201)
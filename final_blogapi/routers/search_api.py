@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from database.session import get_db
+from routers.serializers import FastJSONResponse
+from services import suggest_service
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("/suggest", response_model=dict)
+def suggest(
+    q: str = Query("", max_length=100),
+    limit: int = Query(suggest_service.SUGGEST_LIMIT, ge=1, le=20),
+    db: Session = Depends(get_db),
+):
+    """Autocomplete for the search box: ``{"titles": [...], "tags": [...], "authors": [...]}``."""
+    return FastJSONResponse(suggest_service.suggest(db, q, limit))
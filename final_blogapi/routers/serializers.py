@@ -0,0 +1,68 @@
+"""JSON rendering for the API.
+
+``FastJSONResponse`` encodes with orjson (stdlib ``json`` if it is not installed) and is
+the app's default response class. Endpoints whose payload is built here from ORM rows
+return it wrapped in ``FastJSONResponse`` themselves: FastAPI passes a returned
+``Response`` through untouched, so the ``response_model`` validation and
+``jsonable_encoder`` pass are skipped while the model still documents the route in
+OpenAPI. The ``*_read`` helpers produce exactly the keys of the matching schema.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from models.db_models import Comment, User
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # UTC as "Z", like pydantic
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def user_read(user: User) -> dict[str, Any]:
+    """``schemas.users.UserPublic``."""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "avatar_url": user.avatar_url,
+        "bio": user.bio,
+        "role": user.role,
+    }
+
+
+def comment_read(comment: Comment, author_username: str | None = None) -> dict[str, Any]:
+    """``schemas.comments.CommentResponse``; ``author_username`` defaults to ``comment.author``."""
+    if author_username is None and comment.author is not None:
+        author_username = comment.author.username
+    return {
+        "id": comment.id,
+        "post_id": comment.post_id,
+        "author_id": comment.author_id,
+        "content": comment.content,
+        "created_at": comment.created_at,
+        "parent_comment_id": comment.parent_comment_id,
+        "author_username": author_username,
+    }
@@ -1,22 +1,57 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from database.session import get_db
 from models.db_models import Subscription, User
 from routers.deps import get_current_user
+from routers.serializers import FastJSONResponse
+from schemas.notifications import SubscriptionSettings
+from services import social_graph
 
 router = APIRouter(prefix="/api/subscriptions", tags=["subscriptions"])
 
 
-@router.get("/me")
-def my_subscriptions(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    rows = (
-        db.query(User)
-        .join(Subscription, Subscription.target_user_id == User.id)
-        .filter(Subscription.subscriber_id == user.id)
-        .order_by(Subscription.subscribed_at.desc())
-        .all()
+@router.get("/me", response_model=dict)
+def my_subscriptions(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    return FastJSONResponse(
+        social_graph.graph_page(
+            db, social_graph.FOLLOWING, user.id, page=page, per_page=per_page, viewer_id=user.id
+        )
     )
-    return [{"id": u.id, "username": u.username, "avatar_url": u.avatar_url} for u in rows]
+
+
+@router.get("/me/followers", response_model=dict)
+def my_followers(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    return FastJSONResponse(
+        social_graph.graph_page(
+            db, social_graph.FOLLOWERS, user.id, page=page, per_page=per_page, viewer_id=user.id
+        )
+    )
+
+
+@router.put("/{target_user_id}")
+def update_subscription(
+    target_user_id: int,
+    payload: SubscriptionSettings,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Turn new-post notifications from one followed author on or off."""
+    sub = db.get(Subscription, {"subscriber_id": user.id, "target_user_id": target_user_id})
+    if sub is None:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    sub.notifications_enabled = payload.notifications_enabled
+    db.commit()
+    return {"target_user_id": target_user_id, "notifications_enabled": sub.notifications_enabled}
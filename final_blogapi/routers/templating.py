@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+TEMPLATES_DIR = os.getenv("TEMPLATES_DIR", "templates")
+# Compiled template bytecode is shared by all workers (and survives restarts)
+TEMPLATES_CACHE_DIR = os.getenv("TEMPLATES_CACHE_DIR", ".jinja_cache")
+# Long pages (feed, post) are streamed chunk by chunk instead of rendered in memory
+TEMPLATES_STREAMING = os.getenv("TEMPLATES_STREAMING", "1") == "1"
+STREAM_CHUNK_SIZE = 8 * 1024
+
+
+def _build_env() -> Environment:
+    os.makedirs(TEMPLATES_CACHE_DIR, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        bytecode_cache=FileSystemBytecodeCache(TEMPLATES_CACHE_DIR),
+    )
+
+
+# Single environment for every router: templates are compiled once per process
+templates = Jinja2Templates(env=_build_env())
+
+
+def _buffered(chunks: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Join Jinja's many tiny fragments into network-friendly chunks."""
+    buf: list[str] = []
+    buffered = 0
+    for chunk in chunks:
+        buf.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield "".join(buf).encode("utf-8")
+            buf.clear()
+            buffered = 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def stream_template(name: str, context: dict[str, Any], status_code: int = 200):
+    """Render a template via ``Template.generate()`` so the first bytes go out early.
+
+    The context must be fully loaded (no lazy ORM attributes): rendering happens
+    while the response is being sent. Falls back to ``TemplateResponse`` when
+    streaming is disabled with TEMPLATES_STREAMING=0.
+    """
+    if "request" not in context:
+        raise ValueError('context must include a "request" key')
+    if not TEMPLATES_STREAMING:
+        return templates.TemplateResponse(
+            context["request"], name, context, status_code=status_code
+        )
+
+    template = templates.get_template(name)
+    return StreamingResponse(
+        _buffered(template.generate(context)),
+        status_code=status_code,
+        media_type="text/html; charset=utf-8",
+    )
+
+
+def precompile_templates() -> int:
+    """Compile every template into the bytecode cache (run at image build time)."""
+    env = templates.env
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+if __name__ == "__main__":
+    count = precompile_templates()
+    print(f"✅ Precompiled {count} templates into {TEMPLATES_CACHE_DIR}")
@@ -1,20 +1,22 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
 from database.session import get_db
 from models.db_models import User
 from routers.deps import get_current_user, require_role
-from schemas.users import UserPublic, UserUpdate
-from services import subscription_service, user_service
+from routers.serializers import FastJSONResponse, user_read
+from schemas.users import UserProfile, UserPublic, UserUpdate
+from services import social_graph, user_service
+from services.write_queue import TargetNotFound, write_queue
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
 @router.get("/me", response_model=UserPublic)
 def me(user: User = Depends(get_current_user)):
-    return user
+    return FastJSONResponse(user_read(user))
 
 
 @router.patch("/me", response_model=UserPublic)
@@ -33,7 +35,7 @@ def update_me(payload: UserUpdate, db: Session = Depends(get_db), user: User = D
         bio=payload.bio,
         avatar_url=payload.avatar_url,
     )
-    return user
+    return FastJSONResponse(user_read(user))
 
 
 @router.get("", response_model=list[UserPublic])
@@ -45,30 +47,78 @@ def list_users(
 ):
     offset = (page - 1) * per_page
     if q:
-        return user_service.search_users(db, q=q, limit=per_page, offset=offset)
-    return db.query(User).order_by(User.id.desc()).offset(offset).limit(per_page).all()
+        users = user_service.search_users(db, q=q, limit=per_page, offset=offset)
+    else:
+        users = db.query(User).order_by(User.id.desc()).offset(offset).limit(per_page).all()
+    return FastJSONResponse([user_read(u) for u in users])
 
 
-@router.get("/{user_id}", response_model=UserPublic)
+@router.get("/{user_id}", response_model=UserProfile)
 def get_user(user_id: int, db: Session = Depends(get_db)):
     u = db.get(User, user_id)
     if not u:
         raise HTTPException(status_code=404, detail="User not found")
-    return u
+    return FastJSONResponse({**user_read(u), **social_graph.counts(db, [u.id])[u.id]})
 
 
-@router.post("/{user_id}/follow")
-def toggle_follow(
+def _existing_user(db: Session, user_id: int) -> None:
+    if db.query(User.id).filter(User.id == user_id).first() is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+
+@router.get("/{user_id}/followers", response_model=dict)
+def list_followers(
     user_id: int,
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
-    me: User = Depends(get_current_user),
+):
+    _existing_user(db, user_id)
+    viewer_id = getattr(request.state, "user_id", None)
+    data = social_graph.graph_page(
+        db,
+        social_graph.FOLLOWERS,
+        user_id,
+        page=page,
+        per_page=per_page,
+        viewer_id=int(viewer_id) if viewer_id else None,
+    )
+    return FastJSONResponse(data)
+
+
+@router.get("/{user_id}/following", response_model=dict)
+def list_following(
+    user_id: int,
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    _existing_user(db, user_id)
+    viewer_id = getattr(request.state, "user_id", None)
+    data = social_graph.graph_page(
+        db,
+        social_graph.FOLLOWING,
+        user_id,
+        page=page,
+        per_page=per_page,
+        viewer_id=int(viewer_id) if viewer_id else None,
+    )
+    return FastJSONResponse(data)
+
+
+@router.post("/{user_id}/follow")
+async def toggle_follow(
+    user_id: int, db: Session = Depends(get_db), me: User = Depends(get_current_user)
 ):
     if me.id == user_id:
         raise HTTPException(status_code=400, detail="Cannot follow yourself")
-    target = db.get(User, user_id)
-    if not target:
+    db.close()  # release the connection while waiting for the group commit
+    try:
+        state = await write_queue.toggle_subscription(subscriber_id=me.id, target_user_id=user_id)
+    except TargetNotFound:
         raise HTTPException(status_code=404, detail="User not found")
-    state = subscription_service.toggle_subscription(db, subscriber_id=me.id, target_user_id=user_id)
     return {"following": state}
 
 
@@ -77,6 +127,5 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     u = db.get(User, user_id)
     if not u:
         raise HTTPException(status_code=404, detail="User not found")
-    db.delete(u)
-    db.commit()
+    user_service.delete_user(db, u)
     return {"ok": True}
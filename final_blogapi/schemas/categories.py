@@ -26,5 +26,6 @@ class CategoryResponse(BaseModel):
     slug: str
     description: str | None = None
     color: str
+    published_posts: int = 0
 
     model_config = {"from_attributes": True}
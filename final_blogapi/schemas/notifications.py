@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class MarkRead(BaseModel):
+    ids: list[int] | None = None  # None: everything
+
+
+class SubscriptionSettings(BaseModel):
+    notifications_enabled: bool
@@ -30,3 +30,8 @@ class UserPublic(BaseModel):
     role: str
 
     model_config = {"from_attributes": True}
+
+
+class UserProfile(UserPublic):
+    followers: int = 0
+    following: int = 0
@@ -3,10 +3,11 @@ from __future__ import annotations
 import os
 import warnings
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
 # Игнорировать предупреждение об __about__ в bcrypt
 warnings.filterwarnings("ignore", message=".*__about__.*")
@@ -16,21 +17,29 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-# Используем только bcrypt, без обрезки пароля
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# passlib/bcrypt и jose импортируются лениво: они нужны только при первом логине/запросе
+@lru_cache(maxsize=1)
+def _pwd_context() -> CryptContext:
+    from passlib.context import CryptContext
+
+    # Используем только bcrypt, без обрезки пароля
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Создать хеш пароля. Bcrypt сам обрабатывает длинные пароли."""
     # Просто передаем пароль как есть - bcrypt 4.0.1 сам обрежет если нужно
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def create_access_token(data: dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     now = datetime.now(timezone.utc)
     expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -39,7 +48,9 @@ def create_access_token(data: dict[str, Any], expires_delta: Optional[timedelta]
 
 
 def verify_token(token: str) -> Optional[dict[str, Any]]:
+    from jose import JWTError, jwt
+
     try:
         return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
-        return None
\ No newline at end of file
+        return None
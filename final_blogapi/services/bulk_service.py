@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from datetime import date, datetime
+from typing import IO, Any, Iterable, Iterator
+
+from sqlalchemy import DateTime, Engine, Table, select
+
+from models.db_models import Base
+from services.category_service import category_registry
+from services.facet_index import facet_index
+from services.search_cache import posts_search_cache, suggest_cache
+
+# Export order == import order: referenced rows always come first. Tables derived from
+# these (stats_rollups, post_hot_scores, post_related) are rebuilt after an import, and
+# app_meta, jobs and dead_jobs describe the running instance, not its content.
+EXPORT_TABLES: dict[str, Table] = {
+    name: Base.metadata.tables[name]
+    for name in (
+        "users",
+        "categories",
+        "posts",
+        "post_categories",
+        "comments",
+        "reactions",
+        "favorites",
+        "subscriptions",
+        "notifications",
+        "post_view_hours",
+        "post_view_days",
+    )
+}
+
+EXPORT_BATCH = 1000
+IMPORT_BATCH = 5000
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def export_ndjson(bind: Engine, types: Iterable[str] | None = None) -> Iterator[str]:
+    """Yield one ``{"type": ..., "data": {...}}`` line per row, table by table.
+
+    Rows are streamed with a server-side cursor (``yield_per``), so memory use does not
+    depend on table size. Password hashes are included: this is an admin-only dump.
+    """
+    wanted = list(EXPORT_TABLES) if types is None else [t for t in EXPORT_TABLES if t in set(types)]
+    with bind.connect() as conn:
+        for name in wanted:
+            table = EXPORT_TABLES[name]
+            result = conn.execution_options(yield_per=EXPORT_BATCH).execute(
+                select(table).order_by(*table.primary_key.columns)
+            )
+            for row in result.mappings():
+                yield json.dumps(
+                    {"type": name, "data": dict(row)}, default=_json_default, ensure_ascii=False
+                ) + "\n"
+
+
+def _row_parser(table: Table):
+    dt_cols = [c.name for c in table.columns if isinstance(c.type, DateTime)]
+    known = {c.name for c in table.columns}
+
+    def parse(data: dict[str, Any]) -> dict[str, Any]:
+        row = {k: v for k, v in data.items() if k in known}
+        for col in dt_cols:
+            if row.get(col):
+                row[col] = datetime.fromisoformat(row[col])
+        return row
+
+    return parse
+
+
+def import_ndjson(
+    bind: Engine, lines: Iterable[str | bytes], batch_size: int = IMPORT_BATCH
+) -> dict[str, Any]:
+    """Bulk-load an ``export_ndjson`` dump in one transaction.
+
+    Rows are inserted with ``executemany`` in batches. On SQLite the ``posts_fts``
+    triggers are dropped for the duration of the load and the index is rebuilt in a
+    single pass at the end. Returns per-table row counts and throughput.
+    """
+    from database.init_db import create_fts_triggers, drop_fts_triggers, rebuild_fts
+
+    started = time.perf_counter()
+    counts: dict[str, int] = {name: 0 for name in EXPORT_TABLES}
+    parsers = {name: _row_parser(table) for name, table in EXPORT_TABLES.items()}
+    pending: dict[str, list[dict[str, Any]]] = {name: [] for name in EXPORT_TABLES}
+    sqlite = bind.dialect.name == "sqlite"
+
+    with bind.begin() as conn:
+
+        def flush(name: str) -> None:
+            batch = pending[name]
+            if batch:
+                conn.execute(EXPORT_TABLES[name].insert(), batch)
+                counts[name] += len(batch)
+                batch.clear()
+
+        if sqlite:
+            drop_fts_triggers(conn)
+
+        for lineno, raw in enumerate(lines, start=1):
+            line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                name = record["type"]
+                row = parsers[name](record["data"])
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"line {lineno}: invalid record ({e})") from e
+            # Keep FK order: flush everything that must precede this table
+            for prev in EXPORT_TABLES:
+                if prev == name:
+                    break
+                flush(prev)
+            pending[name].append(row)
+            if len(pending[name]) >= batch_size:
+                flush(name)
+
+        for name in EXPORT_TABLES:
+            flush(name)
+
+        fts_started = time.perf_counter()
+        if sqlite:
+            rebuild_fts(conn)
+            create_fts_triggers(conn)
+        fts_seconds = time.perf_counter() - fts_started
+
+    posts_search_cache.clear()
+    suggest_cache.clear()
+    category_registry.invalidate()
+    facet_index.invalidate()
+    _rebuild_derived(bind)
+    seconds = time.perf_counter() - started
+    total = sum(counts.values())
+    return {
+        "rows": counts,
+        "total_rows": total,
+        "seconds": round(seconds, 3),
+        "fts_rebuild_seconds": round(fts_seconds, 3),
+        "rows_per_sec": round(total / seconds) if seconds else total,
+    }
+
+
+def _rebuild_derived(bind: Engine) -> None:
+    """Stats rollups, trending scores, the facet index and the adjacency cache, from the
+    freshly loaded tables; related posts are recomputed by a queued job."""
+    from sqlalchemy.orm import Session
+
+    from services import related_service, stats_service, trending_service
+    from services.social_graph import adjacency_cache
+
+    with Session(bind) as db:
+        stats_service.backfill(db)
+        trending_service.recompute(db)
+        facet_index.rebuild(db)
+        related_service.schedule_rebuild(db)
+    adjacency_cache.clear()
+
+
+def _main(argv: list[str]) -> None:
+    # python -m services.bulk_service export [FILE] [--types posts,comments]
+    # python -m services.bulk_service import FILE
+    from database import session as db_session
+
+    if len(argv) < 1 or argv[0] not in ("export", "import"):
+        print("usage: python -m services.bulk_service export [FILE] [--types a,b] | import FILE")
+        sys.exit(2)
+
+    types = None
+    if "--types" in argv:
+        i = argv.index("--types")
+        types = argv[i + 1].split(",")
+        argv = argv[:i] + argv[i + 2 :]
+
+    if argv[0] == "export":
+        out: IO[str] = open(argv[1], "w", encoding="utf-8") if len(argv) > 1 else sys.stdout
+        try:
+            out.writelines(export_ndjson(db_session.engine, types))
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return
+
+    with open(argv[1], encoding="utf-8") as f:
+        report = import_ndjson(db_session.engine, f)
+    print(json.dumps(report, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
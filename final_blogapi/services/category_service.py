@@ -1,9 +1,144 @@
+"""Categories: an in-process registry plus per-category published-post counts.
+
+The category list changes only through the admin API, yet every feed, create and edit
+page needs it, so it is loaded once per process and dropped by the API endpoints that
+change it (``CATEGORY_CACHE_TTL`` bounds how long another worker can serve a stale
+list). Published-post counts per category live in ``stats_rollups`` as
+``category_posts:<id>`` totals kept up to date by the post write paths, so showing them
+is a primary-key range read instead of a GROUP BY over ``post_categories``.
+"""
+
 from __future__ import annotations
 
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from models.db_models import Category
+from models.db_models import Category, Post, PostCategory, StatsRollup
+from services.facet_index import facet_index
+from services.search_cache import suggest_cache
+
+CATEGORY_CACHE_TTL = float(os.getenv("CATEGORY_CACHE_TTL", "300"))
+
+COUNT_METRIC = "category_posts:"
+
+
+@dataclass(frozen=True)
+class CategoryInfo:
+    id: int
+    name: str
+    slug: str
+    description: str | None
+    color: str
+
+
+class CategoryRegistry:
+    def __init__(self, ttl: float = CATEGORY_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: list[CategoryInfo] | None = None
+        self._by_id: dict[int, CategoryInfo] = {}
+        self._by_slug: dict[str, CategoryInfo] = {}
+        self._loaded_at = 0.0
+        self.loads = 0
+
+    def _load(self, db: Session) -> list[CategoryInfo]:
+        items = self._items
+        if items is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return items
+        rows = db.query(Category).order_by(Category.name.asc()).all()
+        items = [CategoryInfo(c.id, c.name, c.slug, c.description, c.color) for c in rows]
+        with self._lock:
+            self._items = items
+            self._by_id = {c.id: c for c in items}
+            self._by_slug = {c.slug: c for c in items}
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        return items
+
+    def all(self, db: Session) -> list[CategoryInfo]:
+        """Every category, ordered by name."""
+        return self._load(db)
+
+    def get(self, db: Session, category_id: int) -> CategoryInfo | None:
+        self._load(db)
+        return self._by_id.get(category_id)
+
+    def by_slug(self, db: Session, slug: str) -> CategoryInfo | None:
+        self._load(db)
+        return self._by_slug.get(slug)
+
+    def valid_ids(self, db: Session, ids: Iterable[int]) -> list[int]:
+        """``ids`` that name existing categories, deduplicated, in input order."""
+        self._load(db)
+        return [i for i in dict.fromkeys(ids) if i in self._by_id]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._items = None
+
+
+category_registry = CategoryRegistry()
+
+
+def list_categories(db: Session) -> list[CategoryInfo]:
+    return category_registry.all(db)
+
+
+def create_category(
+    db: Session, *, name: str, slug: str, description: str | None, color: str
+) -> Category:
+    c = Category(name=name, slug=slug, description=description, color=color)
+    db.add(c)
+    db.commit()
+    db.refresh(c)
+    category_registry.invalidate()
+    suggest_cache.clear()
+    return c
+
+
+def delete_category(db: Session, category: Category) -> None:
+    # post_categories rows go away via ON DELETE CASCADE; so does the count
+    db.query(StatsRollup).filter(StatsRollup.metric == f"{COUNT_METRIC}{category.id}").delete()
+    category_id = category.id
+    db.delete(category)
+    db.commit()
+    category_registry.invalidate()
+    suggest_cache.clear()
+    facet_index.drop_category(category_id)
+
+
+# -- published-post counts ------------------------------------------------------------
+
+
+def count_deltas(changes: Mapping[int, int]) -> dict[str, int]:
+    """category id -> change, as rollup deltas for ``stats_service.record(..., series=False)``."""
+    return {f"{COUNT_METRIC}{cid}": delta for cid, delta in changes.items()}
+
+
+def published_counts(db: Session) -> dict[int, int]:
+    """category id -> published posts."""
+    rows = db.query(StatsRollup.metric, StatsRollup.value).filter(
+        # Range on the primary key prefix (a LIKE would not use it on SQLite)
+        StatsRollup.metric >= COUNT_METRIC,
+        StatsRollup.metric < COUNT_METRIC[:-1] + ";",
+        StatsRollup.period == "total",
+        StatsRollup.bucket == "",
+    )
+    return {int(metric[len(COUNT_METRIC) :]): int(value) for metric, value in rows}
 
 
-def list_categories(db: Session) -> list[Category]:
-    return db.query(Category).order_by(Category.name.asc()).all()
+def count_published(db: Session) -> dict[int, int]:
+    """The same counts straight from the base tables (rollup backfill)."""
+    rows = (
+        db.query(PostCategory.category_id, func.count())
+        .join(Post, Post.id == PostCategory.post_id)
+        .filter(Post.status == "published")
+        .group_by(PostCategory.category_id)
+    )
+    return {int(cid): int(n) for cid, n in rows}
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
-from models.db_models import Comment
+from models.db_models import Comment, User
+from services import notification_service, stats_service, trending_service
+from services.realtime import manager
 
 
 def add_comment(
@@ -21,14 +23,27 @@ def add_comment(
         is_approved=True,
     )
     db.add(c)
+    db.flush()
+    stats_service.record(db, {"comments": 1})
+    trending_service.bump(db, post_id, "comment")
+    notification_service.enqueue_comment(db, c)
+    author = db.get(User, author_id)
     db.commit()
     db.refresh(c)
+    manager.publish(
+        {
+            "type": "comment_created",
+            "post_id": post_id,
+            "author": author.username if author else None,
+        }
+    )
     return c
 
 
 def list_comments(db: Session, *, post_id: int) -> list[Comment]:
     return (
         db.query(Comment)
+        .options(joinedload(Comment.author))
         .filter(Comment.post_id == post_id, Comment.is_approved == True)  # noqa: E712
         .order_by(Comment.created_at.asc())
         .all()
@@ -0,0 +1,367 @@
+"""In-memory facet index for post filtering (optional, ``FACET_INDEX_ENABLED=1``).
+
+Every post gets a position in creation order (oldest first); the index keeps one bitmap
+of positions per status, author and category. A filter such as "published, in python
+AND web, in any of (news, howto), NOT in off-topic, by followed authors" is a
+few bitmap ANDs/ORs, the total is a popcount, a page is the top set bits (newest first),
+and facet counts are popcounts of the result ANDed with each category bitmap.
+
+Bitmaps are split into 2**16-bit chunks stored as Python ints, with empty chunks
+omitted (the roaring layout without its container types), so sparse sets such as one
+author's posts stay small while dense ones are a handful of machine-word loops.
+
+The index is rebuilt from the database at startup and every ``FACET_INDEX_REFRESH``
+seconds, and post_service applies its own writes to it as they commit; another worker's
+writes show up after the next rebuild. Posts inserted out of creation order (imports)
+are placed last until then. ``post_service`` falls back to SQL while the index is not
+ready and for queries it cannot answer (search, trending).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from models.db_models import Post, PostCategory
+from services.periodic import PeriodicTask
+
+logger = logging.getLogger("blog.facets")
+
+FACET_INDEX_ENABLED = os.getenv("FACET_INDEX_ENABLED", "0") == "1"
+FACET_INDEX_REFRESH = float(os.getenv("FACET_INDEX_REFRESH", "300"))
+
+CHUNK_BITS = 16
+_LOW_MASK = (1 << CHUNK_BITS) - 1
+
+
+def _drop_top_bits(value: int, n: int) -> int:
+    """``value`` without its ``n`` highest set bits."""
+    lo, hi = 0, value.bit_length()
+    while lo < hi:  # smallest shift whose upper part holds at most n bits
+        mid = (lo + hi) // 2
+        if (value >> mid).bit_count() > n:
+            lo = mid + 1
+        else:
+            hi = mid
+    return value & ((1 << lo) - 1)
+
+
+class Bitmap:
+    """Set of non-negative ints as {chunk index: chunk bits}."""
+
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks: dict[int, int] | None = None) -> None:
+        self.chunks = chunks if chunks is not None else {}
+
+    @classmethod
+    def of(cls, positions: Iterable[int]) -> Bitmap:
+        bm = cls()
+        for pos in positions:
+            bm.add(pos)
+        return bm
+
+    def add(self, pos: int) -> None:
+        hi = pos >> CHUNK_BITS
+        self.chunks[hi] = self.chunks.get(hi, 0) | (1 << (pos & _LOW_MASK))
+
+    def discard(self, pos: int) -> None:
+        hi = pos >> CHUNK_BITS
+        value = self.chunks.get(hi, 0) & ~(1 << (pos & _LOW_MASK))
+        if value:
+            self.chunks[hi] = value
+        else:
+            self.chunks.pop(hi, None)
+
+    def __contains__(self, pos: int) -> bool:
+        return bool(self.chunks.get(pos >> CHUNK_BITS, 0) >> (pos & _LOW_MASK) & 1)
+
+    def __len__(self) -> int:
+        return sum(v.bit_count() for v in self.chunks.values())
+
+    def __and__(self, other: Bitmap) -> Bitmap:
+        a, b = (
+            (self.chunks, other.chunks)
+            if len(self.chunks) <= len(other.chunks)
+            else (other.chunks, self.chunks)
+        )
+        out = {}
+        for hi, value in a.items():
+            value &= b.get(hi, 0)
+            if value:
+                out[hi] = value
+        return Bitmap(out)
+
+    def __or__(self, other: Bitmap) -> Bitmap:
+        out = dict(self.chunks)
+        for hi, value in other.chunks.items():
+            out[hi] = out.get(hi, 0) | value
+        return Bitmap(out)
+
+    def __sub__(self, other: Bitmap) -> Bitmap:
+        out = {}
+        for hi, value in self.chunks.items():
+            value &= ~other.chunks.get(hi, 0)
+            if value:
+                out[hi] = value
+        return Bitmap(out)
+
+    def copy(self) -> Bitmap:
+        return Bitmap(dict(self.chunks))
+
+    def top(self, offset: int, limit: int) -> list[int]:
+        """Positions ranked ``offset``..``offset + limit`` from the highest down."""
+        out: list[int] = []
+        for hi in sorted(self.chunks, reverse=True):
+            value = self.chunks[hi]
+            if offset:
+                n = value.bit_count()
+                if offset >= n:
+                    offset -= n
+                    continue
+                value = _drop_top_bits(value, offset)
+                offset = 0
+            base = hi << CHUNK_BITS
+            while value and len(out) < limit:
+                bit = value.bit_length() - 1
+                out.append(base | bit)
+                value ^= 1 << bit
+            if len(out) >= limit:
+                break
+        return out
+
+
+class _State:
+    """One generation of the index; replaced wholesale by a rebuild."""
+
+    def __init__(self) -> None:
+        self.ids: list[int | None] = []  # position -> post id (None once deleted)
+        self.pos: dict[int, int] = {}  # post id -> position
+        self.posts: dict[int, tuple[str, int, frozenset[int]]] = (
+            {}
+        )  # id -> (status, author, categories)
+        self.live = Bitmap()
+        self.status: dict[str, Bitmap] = {}
+        self.author: dict[int, Bitmap] = {}
+        self.category: dict[int, Bitmap] = {}
+
+    def upsert(self, post_id: int, status: str, author_id: int, categories: frozenset[int]) -> None:
+        pos = self.pos.get(post_id)
+        if pos is None:
+            pos = self.pos[post_id] = len(self.ids)
+            self.ids.append(post_id)
+            self.live.add(pos)
+        else:
+            self._unlink(post_id, pos)
+        self.posts[post_id] = (status, author_id, categories)
+        self.status.setdefault(status, Bitmap()).add(pos)
+        self.author.setdefault(author_id, Bitmap()).add(pos)
+        for cid in categories:
+            self.category.setdefault(cid, Bitmap()).add(pos)
+
+    def _unlink(self, post_id: int, pos: int) -> None:
+        status, author_id, categories = self.posts[post_id]
+        self.status[status].discard(pos)
+        self.author[author_id].discard(pos)
+        for cid in categories:
+            if cid in self.category:
+                self.category[cid].discard(pos)
+
+    def remove(self, post_id: int) -> None:
+        pos = self.pos.pop(post_id, None)
+        if pos is None:
+            return
+        self._unlink(post_id, pos)
+        del self.posts[post_id]
+        self.ids[pos] = None
+        self.live.discard(pos)
+
+    def remove_author(self, author_id: int) -> None:
+        for post_id in [pid for pid, (_, author, _) in self.posts.items() if author == author_id]:
+            self.remove(post_id)
+        self.author.pop(author_id, None)
+
+    def drop_category(self, category_id: int) -> None:
+        self.category.pop(category_id, None)
+        for post_id, (status, author_id, categories) in self.posts.items():
+            if category_id in categories:
+                self.posts[post_id] = (status, author_id, categories - {category_id})
+
+
+class Selection:
+    """Positions matched by ``FacetIndex.select`` and the index generation they refer to:
+    a rebuild assigns new positions, so pages and counts must read the same generation."""
+
+    __slots__ = ("bits", "state")
+
+    def __init__(self, bits: Bitmap, state: _State) -> None:
+        self.bits = bits
+        self.state = state
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+
+class FacetIndex:
+    def __init__(
+        self, enabled: bool = FACET_INDEX_ENABLED, refresh: float = FACET_INDEX_REFRESH
+    ) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._state: _State | None = None
+        # Writes applied while a rebuild is reading the database, replayed onto its result
+        self._journal: list[tuple[str, tuple]] | None = None
+        self.built_at: float | None = None
+        self.build_seconds = 0.0
+        self.refresh_task = PeriodicTask("facet-index-refresh", refresh, self.rebuild)
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._state is not None
+
+    # -- building ------------------------------------------------------------------
+
+    def rebuild(self, db: Session | None = None) -> None:
+        if not self.enabled:
+            return
+        if db is None:
+            from database.session import SessionLocal
+
+            with SessionLocal() as session:
+                self.rebuild(session)
+            return
+        started = time.perf_counter()
+        with self._lock:
+            self._journal = []
+        try:
+            cats: dict[int, set[int]] = {}
+            for post_id, cid in db.query(PostCategory.post_id, PostCategory.category_id):
+                cats.setdefault(post_id, set()).add(cid)
+            state = _State()
+            rows = db.query(Post.id, Post.status, Post.author_id).order_by(
+                Post.created_at.asc(), Post.id.asc()
+            )
+            for post_id, status, author_id in rows.yield_per(10_000):
+                state.upsert(post_id, status, author_id, frozenset(cats.get(post_id, ())))
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            for op, args in self._journal or ():
+                getattr(state, op)(*args)
+            self._journal = None
+            self._state = state
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+        logger.info("facet index: %d posts in %.2fs", len(state.posts), self.build_seconds)
+
+    def invalidate(self) -> None:
+        """Stop answering until the next rebuild (after bulk loads)."""
+        with self._lock:
+            self._state = None
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        from fastapi.concurrency import run_in_threadpool
+
+        await run_in_threadpool(self.rebuild)
+        self.refresh_task.start()
+
+    async def stop(self) -> None:
+        await self.refresh_task.stop()
+
+    # -- write-through -------------------------------------------------------------
+
+    def _apply(self, op: str, *args: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._state is not None:
+                getattr(self._state, op)(*args)
+            if self._journal is not None:
+                self._journal.append((op, args))
+
+    def upsert(self, post: Post, category_ids: Iterable[int]) -> None:
+        self._apply("upsert", post.id, post.status, post.author_id, frozenset(category_ids))
+
+    def remove(self, post_id: int) -> None:
+        self._apply("remove", post_id)
+
+    def remove_author(self, author_id: int) -> None:
+        self._apply("remove_author", author_id)
+
+    def drop_category(self, category_id: int) -> None:
+        self._apply("drop_category", category_id)
+
+    # -- queries -------------------------------------------------------------------
+
+    def select(
+        self,
+        *,
+        status: str | None = None,
+        authors: Iterable[int] | None = None,
+        all_of: Iterable[int] = (),
+        any_of: Iterable[int] | None = None,
+        none_of: Iterable[int] = (),
+    ) -> Selection | None:
+        """Positions matching every given filter; None when the index is not ready.
+
+        ``authors``/``any_of`` of None mean "no filter", an empty iterable matches nothing.
+        """
+        with self._lock:
+            state = self._state
+            if state is None or not self.enabled:
+                return None
+            result = state.status.get(status, Bitmap()).copy() if status else state.live.copy()
+            if authors is not None:
+                by_author = Bitmap()
+                for author_id in authors:
+                    if author_id in state.author:
+                        by_author = by_author | state.author[author_id]
+                result = result & by_author
+            for cid in all_of:
+                result = result & state.category.get(cid, Bitmap())
+            if any_of is not None:
+                union = Bitmap()
+                for cid in any_of:
+                    if cid in state.category:
+                        union = union | state.category[cid]
+                result = result & union
+            for cid in none_of:
+                if cid in state.category:
+                    result = result - state.category[cid]
+            return Selection(result, state)
+
+    def page(self, result: Selection, offset: int, limit: int) -> list[int]:
+        """Post ids of one page of ``result``, newest first."""
+        with self._lock:  # write-through may be appending to the same generation
+            ids = [result.state.ids[pos] for pos in result.bits.top(offset, limit)]
+        return [i for i in ids if i is not None]
+
+    def category_counts(self, result: Selection) -> dict[int, int]:
+        with self._lock:
+            counts = {cid: len(result.bits & bm) for cid, bm in result.state.category.items()}
+        return {cid: n for cid, n in counts.items() if n}
+
+    def stats(self) -> dict[str, Any]:
+        state = self._state
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "posts": len(state.posts) if state else 0,
+            "categories": len(state.category) if state else 0,
+            "authors": len(state.author) if state else 0,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+
+facet_index = FacetIndex()
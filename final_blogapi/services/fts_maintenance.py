@@ -0,0 +1,405 @@
+"""Background upkeep of the ``posts_fts`` index (SQLite only).
+
+Every trigger write adds a small FTS5 segment; FTS5 merges them on the write path
+(``automerge``) and, past ``crisismerge`` segments on a level, blocks the writer until a
+big merge is done. Here writers merge less eagerly (``FTS_AUTOMERGE``) and the rest is
+done off the request path: every ``FTS_MAINTENANCE_INTERVAL`` seconds, when the process
+served fewer than ``FTS_IDLE_RPS`` requests per second since the last tick, up to
+``FTS_MERGE_STEPS`` ``('merge', FTS_MERGE_PAGES)`` steps run, each a short transaction,
+until no level has ``FTS_USERMERGE`` segments left. An integrity check (index against
+the text in ``posts``) runs on an idle tick once ``FTS_INTEGRITY_INTERVAL`` has passed.
+
+``rebuild`` re-indexes everything from ``posts`` while search keeps working: the new
+index is filled next to the live one in batches of ``FTS_REBUILD_BATCH`` posts, mirror
+triggers carry over writes to posts already copied, and the two are swapped in one
+transaction at the end. A lock row in ``app_meta``, renewed with every batch, keeps a
+second run (a redelivered job whose lease ran out, another worker) from touching the
+tables of a live one; a run that stops renewing it is taken over after
+``FTS_REBUILD_LOCK_SECONDS``. Admins trigger it (and a full ``optimize``) from
+``/api/admin/fts``; segment count and index size are exported as gauges.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, cast
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, CursorResult, Engine
+
+from services import jobs, sql_metrics
+from services.periodic import PeriodicTask
+
+logger = logging.getLogger("blog.fts")
+
+FTS_MAINTENANCE_INTERVAL = float(os.getenv("FTS_MAINTENANCE_INTERVAL", "60"))
+FTS_IDLE_RPS = float(os.getenv("FTS_IDLE_RPS", "5"))
+FTS_MERGE_PAGES = int(os.getenv("FTS_MERGE_PAGES", "200"))
+FTS_MERGE_STEPS = int(os.getenv("FTS_MERGE_STEPS", "50"))
+FTS_AUTOMERGE = int(os.getenv("FTS_AUTOMERGE", "8"))
+FTS_CRISISMERGE = int(os.getenv("FTS_CRISISMERGE", "32"))
+FTS_USERMERGE = int(os.getenv("FTS_USERMERGE", "4"))
+FTS_INTEGRITY_INTERVAL = float(os.getenv("FTS_INTEGRITY_INTERVAL", "86400"))
+FTS_REBUILD_BATCH = int(os.getenv("FTS_REBUILD_BATCH", "2000"))
+FTS_REBUILD_PAUSE = float(os.getenv("FTS_REBUILD_PAUSE", "0.01"))
+FTS_REBUILD_LOCK_SECONDS = float(os.getenv("FTS_REBUILD_LOCK_SECONDS", "30"))
+
+TABLE = "posts_fts"
+REBUILD_TABLE = "posts_fts_rebuild"
+REBUILD_STATE = "posts_fts_rebuild_state"
+REBUILD_LOCK = "fts_rebuild_lock"  # app_meta key; value '<expires at> <owner>'
+
+# The post is already in the new index (copied, or written after the copy started)
+_COPIED = (
+    f"{{0}} <= (SELECT cursor FROM {REBUILD_STATE}) OR {{0}} > (SELECT max_id FROM {REBUILD_STATE})"
+)
+
+MIRROR_TRIGGERS = {
+    "posts_fts_rebuild_ai": f"""
+    CREATE TRIGGER posts_fts_rebuild_ai AFTER INSERT ON posts WHEN {_COPIED.format("new.id")} BEGIN
+      INSERT INTO {REBUILD_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END;
+    """,
+    "posts_fts_rebuild_ad": f"""
+    CREATE TRIGGER posts_fts_rebuild_ad AFTER DELETE ON posts WHEN {_COPIED.format("old.id")} BEGIN
+      INSERT INTO {REBUILD_TABLE}({REBUILD_TABLE}, rowid, title, content)
+      VALUES ('delete', old.id, old.title, old.content);
+    END;
+    """,
+    "posts_fts_rebuild_au": f"""
+    CREATE TRIGGER posts_fts_rebuild_au AFTER UPDATE OF title, content ON posts
+    WHEN (old.title IS NOT new.title OR old.content IS NOT new.content)
+      AND ({_COPIED.format("old.id")}) BEGIN
+      INSERT INTO {REBUILD_TABLE}({REBUILD_TABLE}, rowid, title, content)
+      VALUES ('delete', old.id, old.title, old.content);
+      INSERT INTO {REBUILD_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END;
+    """,
+}
+
+
+@lru_cache(maxsize=1)
+def _prometheus() -> tuple[Any, Any, Any] | None:
+    # Registered once per process: the module survives app reloads, the registry is global
+    try:
+        from prometheus_client import Counter as PromCounter, Gauge
+    except Exception:  # pragma: no cover
+        return None
+    segments = Gauge("fts_segments", "Segments in the posts_fts index")
+    size = Gauge("fts_index_bytes", "Size of the posts_fts index blocks")
+    actions = PromCounter("fts_maintenance_total", "FTS maintenance runs", ["action", "outcome"])
+    return segments, size, actions
+
+
+# -- index commands (each takes a connection inside a transaction) -------------------------
+
+
+def _command(conn: Connection, command: str, value: int | None = None, table: str = TABLE) -> None:
+    if value is None:
+        conn.execute(text(f"INSERT INTO {table}({table}) VALUES (:c)"), {"c": command})
+    else:
+        conn.execute(
+            text(f"INSERT INTO {table}({table}, rank) VALUES (:c, :v)"), {"c": command, "v": value}
+        )
+
+
+def configure(conn: Connection, table: str = TABLE) -> bool:
+    """Store the merge settings in the index config (only those that differ); True if any did."""
+    wanted = {
+        "automerge": FTS_AUTOMERGE,
+        "crisismerge": FTS_CRISISMERGE,
+        "usermerge": FTS_USERMERGE,
+    }
+    current = {k: v for k, v in conn.execute(text(f"SELECT k, v FROM {table}_config"))}
+    changed = False
+    for key, value in wanted.items():
+        if current.get(key) != value:
+            _command(conn, key, value, table)
+            changed = True
+    return changed
+
+
+def index_stats(conn: Connection) -> dict[str, int]:
+    segments = conn.execute(text(f"SELECT COUNT(DISTINCT segid) FROM {TABLE}_idx")).scalar()
+    size = conn.execute(text(f"SELECT COALESCE(SUM(length(block)), 0) FROM {TABLE}_data")).scalar()
+    return {"segments": int(segments or 0), "index_bytes": int(size or 0)}
+
+
+def _total_changes(conn: Connection) -> int:
+    return int(conn.execute(text("SELECT total_changes()")).scalar_one())
+
+
+def merge_step(conn: Connection, pages: int = FTS_MERGE_PAGES) -> bool:
+    """One incremental merge of about ``pages`` leaf pages; False when nothing was merged."""
+    before = _total_changes(conn)
+    _command(conn, "merge", pages)
+    # FTS5 only writes (more than the command row itself) when it merged something
+    return _total_changes(conn) - before >= 2
+
+
+def optimize(bind: Engine) -> dict[str, int]:
+    """Merge the whole index into one segment (one long write transaction)."""
+    with bind.begin() as conn:
+        _command(conn, "optimize")
+        return index_stats(conn)
+
+
+def integrity_check(bind: Engine) -> str | None:
+    """None if the index matches the text in posts, else the error."""
+    try:
+        with bind.begin() as conn:
+            _command(conn, "integrity-check", 1)
+    except Exception as e:
+        return str(e)
+    return None
+
+
+class RebuildRunning(RuntimeError):
+    """Another rebuild holds the lock (or took it over from this one)."""
+
+
+def _renew_lock(conn: Connection, owner: str, ttl: float = FTS_REBUILD_LOCK_SECONDS) -> None:
+    """Take or extend the rebuild lock in the caller's transaction, unless another owner
+    holds it and has not let it expire."""
+    now = time.time()
+    params = {"k": REBUILD_LOCK, "v": f"{now + ttl:.3f} {owner}", "owner": owner, "now": now}
+    conn.execute(text("INSERT OR IGNORE INTO app_meta (key, value) VALUES (:k, :v)"), params)
+    result = conn.execute(
+        text(
+            "UPDATE app_meta SET value = :v WHERE key = :k "
+            "AND (substr(value, instr(value, ' ') + 1) = :owner "
+            "OR CAST(substr(value, 1, instr(value, ' ') - 1) AS REAL) < :now)"
+        ),
+        params,
+    )
+    if not cast(CursorResult, result).rowcount:
+        raise RebuildRunning("another posts_fts rebuild is running")
+
+
+def _release_lock(conn: Connection, owner: str) -> None:
+    conn.execute(
+        text("DELETE FROM app_meta WHERE key = :k AND substr(value, instr(value, ' ') + 1) = :o"),
+        {"k": REBUILD_LOCK, "o": owner},
+    )
+
+
+def _drop_rebuild(conn: Connection) -> None:
+    for name in MIRROR_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {REBUILD_TABLE}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {REBUILD_STATE}"))
+
+
+def rebuild(
+    bind: Engine, batch: int = FTS_REBUILD_BATCH, pause: float = FTS_REBUILD_PAUSE
+) -> dict[str, Any]:
+    """Re-index every post into a new table and swap it in; search stays up meanwhile.
+
+    Raises ``RebuildRunning`` if another run holds the lock or takes it over.
+    """
+    started = time.perf_counter()
+    owner = uuid.uuid4().hex
+    try:
+        copied, stats = _rebuild(bind, owner, batch, pause)
+    except RebuildRunning:
+        raise
+    except BaseException:
+        with bind.begin() as conn:
+            _release_lock(conn, owner)  # let a retry start right away
+        raise
+    return {"posts": copied, "seconds": round(time.perf_counter() - started, 3), **stats}
+
+
+def _rebuild(bind: Engine, owner: str, batch: int, pause: float) -> tuple[int, dict[str, int]]:
+    from database.init_db import create_fts_triggers, drop_fts_triggers, fts_table_ddl
+
+    with bind.begin() as conn:
+        _renew_lock(conn, owner)
+        _drop_rebuild(conn)  # leftovers of an interrupted run
+        conn.execute(text(fts_table_ddl(REBUILD_TABLE)))
+        configure(conn, REBUILD_TABLE)
+        conn.execute(
+            text(f"CREATE TABLE {REBUILD_STATE} (max_id INTEGER NOT NULL, cursor INTEGER NOT NULL)")
+        )
+        conn.execute(text(f"INSERT INTO {REBUILD_STATE} SELECT COALESCE(MAX(id), 0), 0 FROM posts"))
+        for ddl in MIRROR_TRIGGERS.values():
+            conn.execute(text(ddl))
+
+    copied = 0
+    while True:
+        with bind.begin() as conn:
+            _renew_lock(conn, owner)  # checked in the batch's own transaction
+            cursor, max_id = conn.execute(text(f"SELECT cursor, max_id FROM {REBUILD_STATE}")).one()
+            upto = conn.execute(
+                text(
+                    "SELECT MAX(id) FROM "
+                    "(SELECT id FROM posts WHERE id > :c AND id <= :m ORDER BY id LIMIT :n)"
+                ),
+                {"c": cursor, "m": max_id, "n": batch},
+            ).scalar()
+            if upto is None:
+                break
+            copied += conn.execute(
+                text(
+                    f"INSERT INTO {REBUILD_TABLE}(rowid, title, content) "
+                    "SELECT id, title, content FROM posts WHERE id > :c AND id <= :u"
+                ),
+                {"c": cursor, "u": upto},
+            ).rowcount
+            conn.execute(text(f"UPDATE {REBUILD_STATE} SET cursor = :u"), {"u": upto})
+        time.sleep(pause)  # let queued writers in between batches
+
+    with bind.begin() as conn:
+        _renew_lock(conn, owner)
+        for name in MIRROR_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        drop_fts_triggers(conn)
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+        conn.execute(text(f"ALTER TABLE {REBUILD_TABLE} RENAME TO {TABLE}"))
+        create_fts_triggers(conn)
+        conn.execute(text(f"DROP TABLE {REBUILD_STATE}"))
+        _release_lock(conn, owner)
+        stats = index_stats(conn)
+    return copied, stats
+
+
+@jobs.handler("fts_rebuild")
+def _rebuild_job(payload: dict[str, Any]) -> None:
+    try:
+        fts_maintenance.run("rebuild", rebuild)
+    except RebuildRunning:
+        # Redelivered after its lease ran out, or queued twice: the live run finishes it
+        logger.info("posts_fts rebuild already running elsewhere; job dropped")
+
+
+# -- scheduler -----------------------------------------------------------------------------
+
+
+class FtsMaintenance:
+    """Periodic merge/integrity pass, skipped while the process is busy."""
+
+    def __init__(
+        self,
+        interval: float = FTS_MAINTENANCE_INTERVAL,
+        idle_rps: float = FTS_IDLE_RPS,
+        merge_steps: int = FTS_MERGE_STEPS,
+        merge_pages: int = FTS_MERGE_PAGES,
+        integrity_interval: float = FTS_INTEGRITY_INTERVAL,
+    ) -> None:
+        self.idle_rps = idle_rps
+        self.merge_steps = merge_steps
+        self.merge_pages = merge_pages
+        self.integrity_interval = integrity_interval
+        self.prometheus = False
+        self._task = PeriodicTask("fts-maintenance", interval, self.tick)
+        self._lock = threading.Lock()  # one maintenance action at a time in this process
+        self._last_tick = time.monotonic()
+        self._last_requests = sql_metrics.requests_started()
+        self._last_integrity = time.monotonic()
+        self.ticks = 0
+        self.busy_skips = 0
+        self.merge_steps_run = 0
+        self.last: dict[str, Any] = {}  # action -> {"at", "seconds", "outcome", ...}
+
+    def start(self, *, prometheus: bool = False) -> None:
+        from database.session import engine
+
+        if engine.dialect.name != "sqlite":
+            return
+        self.prometheus = prometheus
+        self._task.start()
+
+    async def stop(self) -> None:
+        await self._task.stop()
+
+    def _bind(self) -> Engine:
+        from database.session import engine
+
+        return engine
+
+    def _record(self, action: str, seconds: float, outcome: str, **extra: Any) -> None:
+        self.last[action] = {
+            "at": time.time(),
+            "seconds": round(seconds, 3),
+            "outcome": outcome,
+            **extra,
+        }
+        metrics = _prometheus() if self.prometheus else None
+        if metrics is not None:
+            metrics[2].labels(action, outcome).inc()
+
+    def run(self, action: str, fn: Callable[[Engine], Any]) -> Any:
+        """Run ``fn(engine)`` as maintenance ``action`` (serialized, timed, reported)."""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                result = fn(self._bind())
+            except Exception as e:
+                self._record(action, time.perf_counter() - started, "error", error=str(e))
+                raise
+            outcome = "corrupt" if action == "integrity" and result else "ok"
+            self._record(action, time.perf_counter() - started, outcome)
+            if outcome == "corrupt":
+                logger.error(
+                    "posts_fts integrity check failed: %s; rebuild via /api/admin/fts/rebuild",
+                    result,
+                )
+            return result
+
+    def merge(self, bind: Engine) -> int:
+        """Incremental merge steps until done or ``merge_steps``; returns steps that merged."""
+        done = 0
+        for _ in range(self.merge_steps):
+            with bind.begin() as conn:
+                if not merge_step(conn, self.merge_pages):
+                    break
+            done += 1
+        self.merge_steps_run += done
+        return done
+
+    def load(self) -> float:
+        """Requests per second since the previous call."""
+        now, requests = time.monotonic(), sql_metrics.requests_started()
+        rps = (requests - self._last_requests) / max(now - self._last_tick, 1e-6)
+        self._last_tick, self._last_requests = now, requests
+        return rps
+
+    def tick(self) -> None:
+        self.ticks += 1
+        bind = self._bind()
+        with bind.begin() as conn:
+            configure(conn)  # a no-op read once the settings are stored
+        if self.load() > self.idle_rps or self._lock.locked():  # busy, or a rebuild is running
+            self.busy_skips += 1
+        else:
+            self.run("merge", self.merge)
+            if time.monotonic() - self._last_integrity >= self.integrity_interval:
+                self._last_integrity = time.monotonic()
+                self.run("integrity", integrity_check)
+        self.report()
+
+    def report(self) -> dict[str, int]:
+        with self._bind().connect() as conn:
+            stats = index_stats(conn)
+        metrics = _prometheus() if self.prometheus else None
+        if metrics is not None:
+            metrics[0].set(stats["segments"])
+            metrics[1].set(stats["index_bytes"])
+        return stats
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.report(),
+            "ticks": self.ticks,
+            "busy_skips": self.busy_skips,
+            "merge_steps": self.merge_steps_run,
+            "last": self.last,
+        }
+
+
+fts_maintenance = FtsMaintenance()
@@ -0,0 +1,424 @@
+"""Durable background jobs for side effects of writes.
+
+A write path calls ``enqueue(db, kind, payload)`` before its own commit, so the job row
+commits (or rolls back) together with the data it refers to and is never lost between
+the two. After the commit the executor is woken up; it also polls every
+``JOB_POLL_INTERVAL`` seconds for jobs enqueued by other processes and for retries.
+
+The executor runs in the app's event loop: a dispatcher claims due jobs by setting a
+lease (``JOB_LEASE_SECONDS``; a job of a crashed worker is picked up again once its
+lease expires) and ``JOB_WORKERS`` worker tasks run them. Coroutine handlers are awaited,
+plain functions run in the threadpool. A failed job is retried with exponential backoff
+(``JOB_RETRY_BASE`` * 2**(attempt - 1) seconds); after ``JOB_MAX_ATTEMPTS`` it is moved to
+``dead_jobs``. Handlers must tolerate running twice (a lease can expire mid-run).
+
+Handlers register with ``@handler("kind")`` in the module that owns the side effect.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, cast
+
+from sqlalchemy import event, func, update
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import Session
+
+from models.db_models import DeadJob, Job
+
+logger = logging.getLogger("blog.jobs")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE = float(os.getenv("JOB_RETRY_BASE", "2"))
+
+HANDLERS: dict[str, Callable[[dict[str, Any]], Any]] = {}
+
+_ENQUEUED = "jobs_enqueued"  # Session.info flag: wake the executor after the commit
+
+
+def handler(kind: str) -> Callable[[Callable], Callable]:
+    def register(fn: Callable) -> Callable:
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+def enqueue(db: Session, kind: str, payload: dict[str, Any], *, delay: float = 0.0) -> None:
+    """Add a job to the caller's transaction; it runs after the caller commits."""
+    now = time.time()
+    db.add(
+        Job(
+            kind=kind,
+            payload=json.dumps(payload),
+            created_at=now,
+            run_after=now + delay,
+            locked_until=0.0,
+        )
+    )
+    db.info[_ENQUEUED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session: Session) -> None:
+    if session.info.pop(_ENQUEUED, False):
+        job_executor.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop(_ENQUEUED, None)
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+    due_at: float  # enqueue time, or the retry time after a failure
+
+
+@lru_cache(maxsize=1)
+def _prometheus() -> tuple[Any, Any, Any, Any] | None:
+    # Registered once per process: the module survives app reloads, the registry is global
+    try:
+        from prometheus_client import Counter as PromCounter, Gauge, Histogram
+    except Exception:  # pragma: no cover
+        return None
+    depth = Gauge("jobs_queue_depth", "Jobs waiting or running (all processes)")
+    wait = Histogram(
+        "jobs_wait_seconds",
+        "Time from enqueue (or retry time) to start",
+        ["kind"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    )
+    run = Histogram(
+        "jobs_run_seconds",
+        "Handler run time",
+        ["kind"],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0),
+    )
+    outcomes = PromCounter("jobs_total", "Finished job attempts", ["kind", "outcome"])
+    return depth, wait, run, outcomes
+
+
+class JobExecutor:
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        lease: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_base: float = JOB_RETRY_BASE,
+    ) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._queue: asyncio.Queue[ClaimedJob] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._depth_reported = 0.0
+        self.prometheus = True
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.dead = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    # -- database side (threadpool) -------------------------------------------------
+
+    def claim(self, limit: int) -> list[ClaimedJob]:
+        """Lease up to ``limit`` due jobs, oldest first."""
+        from database.session import SessionLocal
+
+        now = time.time()
+        claimed: list[ClaimedJob] = []
+        with SessionLocal() as db:
+            due = (
+                db.query(Job.id)
+                .filter(Job.run_after <= now, Job.locked_until <= now)
+                .order_by(Job.run_after, Job.id)
+                .limit(limit)
+                .all()
+            )
+            for (job_id,) in due:
+                # Conditional update: another process may have leased it in between
+                result = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.locked_until <= now)
+                    .values(locked_until=now + self.lease, attempts=Job.attempts + 1)
+                )
+                job = db.get(Job, job_id) if cast(CursorResult, result).rowcount else None
+                if job is not None:
+                    claimed.append(
+                        ClaimedJob(
+                            job.id, job.kind, json.loads(job.payload), job.attempts, job.run_after
+                        )
+                    )
+            db.commit()
+        return claimed
+
+    def _finish(self, job: ClaimedJob, error: BaseException | None) -> str:
+        from database.session import SessionLocal
+
+        with SessionLocal() as db:
+            row = db.get(Job, job.id)
+            if row is None:
+                return "gone"
+            if error is None:
+                db.delete(row)
+                outcome = "ok"
+            elif job.attempts >= self.max_attempts or job.kind not in HANDLERS:
+                db.add(
+                    DeadJob(
+                        job_id=row.id,
+                        kind=row.kind,
+                        payload=row.payload,
+                        attempts=job.attempts,
+                        created_at=row.created_at,
+                        failed_at=time.time(),
+                        error=repr(error),
+                    )
+                )
+                db.delete(row)
+                outcome = "dead"
+            else:
+                row.run_after = time.time() + self.retry_base * 2 ** (job.attempts - 1)
+                row.locked_until = 0.0
+                row.last_error = repr(error)
+                outcome = "retry"
+            db.commit()
+        return outcome
+
+    def release(self, jobs: list[ClaimedJob]) -> None:
+        """Give claimed-but-unstarted jobs back (shutdown)."""
+        if not jobs:
+            return
+        from database.session import SessionLocal
+
+        with SessionLocal() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id.in_([j.id for j in jobs]))
+                .values(locked_until=0.0, attempts=Job.attempts - 1)
+            )
+            db.commit()
+
+    def depth(self) -> dict[str, Any]:
+        from database.session import SessionLocal
+
+        now = time.time()
+        with SessionLocal() as db:
+            queued, oldest = db.query(func.count(Job.id), func.min(Job.created_at)).one()
+            ready = (
+                db.query(func.count(Job.id))
+                .filter(Job.run_after <= now, Job.locked_until <= now)
+                .scalar()
+            )
+            dead = db.query(func.count(DeadJob.id)).scalar()
+        return {
+            "queued": int(queued or 0),
+            "ready": int(ready or 0),
+            "dead": int(dead or 0),
+            "oldest_age_seconds": round(now - oldest, 3) if oldest else 0.0,
+        }
+
+    # -- event loop side ------------------------------------------------------------
+
+    async def start(self, *, prometheus: bool = True) -> None:
+        if self._tasks:
+            return
+        self.prometheus = prometheus
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._queue = asyncio.Queue()
+        self._tasks = [self._loop.create_task(self._dispatch(), name="jobs-dispatch")]
+        self._tasks += [
+            self._loop.create_task(self._work(), name=f"jobs-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Let running jobs finish (up to ``timeout``), hand back the rest."""
+        if not self._tasks:
+            return
+        from fastapi.concurrency import run_in_threadpool
+
+        dispatcher, workers = self._tasks[0], self._tasks[1:]
+        dispatcher.cancel()
+        await asyncio.gather(dispatcher, return_exceptions=True)
+        unstarted: list[ClaimedJob] = []
+        while self._queue is not None and not self._queue.empty():
+            unstarted.append(self._queue.get_nowait())
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await run_in_threadpool(self.release, unstarted)
+        self._tasks = []
+        self._loop = None
+
+    def wake(self) -> None:
+        """Thread-safe: look for new jobs now instead of at the next poll."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _dispatch(self) -> None:
+        from fastapi.concurrency import run_in_threadpool
+
+        assert self._wake is not None and self._queue is not None
+        while True:
+            free = self.workers - self.in_flight - self._queue.qsize()
+            claimed: list[ClaimedJob] = []
+            try:
+                if free > 0:
+                    claimed = await run_in_threadpool(self.claim, free)
+                metrics = _prometheus() if self.prometheus else None
+                if (
+                    metrics is not None
+                    and time.monotonic() - self._depth_reported >= self.poll_interval
+                ):
+                    self._depth_reported = time.monotonic()
+                    metrics[0].set((await run_in_threadpool(self.depth))["queued"])
+            except Exception:
+                logger.exception("job dispatch failed")
+            for job in claimed:
+                with self._stats_lock:
+                    self.in_flight += 1
+                self._queue.put_nowait(job)
+            if len(claimed) < max(free, 1):
+                # Nothing more is due (or every worker is busy): wait for a commit or the poll
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def _work(self) -> None:
+        from fastapi.concurrency import run_in_threadpool
+
+        assert self._queue is not None and self._wake is not None
+        while True:
+            job = await self._queue.get()
+            started = time.time()
+            error: BaseException | None = None
+            try:
+                fn = HANDLERS.get(job.kind)
+                if fn is None:
+                    raise LookupError(f"no handler for job kind {job.kind!r}")
+                if inspect.iscoroutinefunction(fn):
+                    await fn(job.payload)
+                else:
+                    await run_in_threadpool(fn, job.payload)
+            except Exception as e:
+                error = e
+                logger.warning(
+                    "job %s #%d attempt %d failed: %r", job.kind, job.id, job.attempts, e
+                )
+            ran = time.time() - started
+            try:
+                outcome = await run_in_threadpool(self._finish, job, error)
+            except Exception:
+                logger.exception("could not record the result of job %s #%d", job.kind, job.id)
+                outcome = "unknown"
+            with self._stats_lock:
+                self.in_flight -= 1
+                self.wait_seconds += max(0.0, started - job.due_at)
+                self.run_seconds += ran
+                if outcome == "ok":
+                    self.succeeded += 1
+                elif outcome == "retry":
+                    self.retried += 1
+                elif outcome == "dead":
+                    self.dead += 1
+            metrics = _prometheus() if self.prometheus else None
+            if metrics is not None:
+                _, wait, run, outcomes = metrics
+                wait.labels(job.kind).observe(max(0.0, started - job.due_at))
+                run.labels(job.kind).observe(ran)
+                outcomes.labels(job.kind, outcome).inc()
+            self._wake.set()  # a worker is free
+
+    # -- introspection --------------------------------------------------------------
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Block (from another thread) until no job is due, leased or not; for tests and scripts."""
+        from database.session import SessionLocal
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with SessionLocal() as db:
+                due = db.query(Job.id).filter(Job.run_after <= time.time()).first()
+            if due is None and not self.in_flight:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def stats(self) -> dict[str, Any]:
+        finished = self.succeeded + self.retried + self.dead
+        return {
+            "running": bool(self._tasks),
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead_lettered": self.dead,
+            "avg_wait_ms": round(self.wait_seconds / finished * 1000, 2) if finished else 0.0,
+            "avg_run_ms": round(self.run_seconds / finished * 1000, 2) if finished else 0.0,
+            **self.depth(),
+        }
+
+
+job_executor = JobExecutor()
+
+
+def list_dead(db: Session, *, limit: int = 50) -> list[dict[str, Any]]:
+    rows = db.query(DeadJob).order_by(DeadJob.failed_at.desc()).limit(limit)
+    return [
+        {
+            "id": d.id,
+            "job_id": d.job_id,
+            "kind": d.kind,
+            "payload": json.loads(d.payload),
+            "attempts": d.attempts,
+            "created_at": d.created_at,
+            "failed_at": d.failed_at,
+            "error": d.error,
+        }
+        for d in rows
+    ]
+
+
+def retry_dead(db: Session, job_id: int) -> bool:
+    """Put a dead job back on the queue with a fresh attempt count."""
+    dead = db.get(DeadJob, job_id)
+    if dead is None:
+        return False
+    now = time.time()
+    db.add(
+        Job(kind=dead.kind, payload=dead.payload, created_at=now, run_after=now, locked_until=0.0)
+    )
+    db.delete(dead)
+    db.info[_ENQUEUED] = True
+    db.commit()
+    return True
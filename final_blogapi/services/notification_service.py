@@ -0,0 +1,266 @@
+"""Notification inbox: fan-out on publish/comment, cursor pages, unread counters.
+
+Publishing a post notifies the author's subscribers whose subscription has
+``notifications_enabled``; a comment notifies the post author and, for a reply, the
+author of the parent comment. The write only enqueues a ``notify`` job in its own
+transaction (``services/jobs.py``); the job resolves the recipients and inserts the inbox
+rows in batches of ``NOTIFY_FANOUT_BATCH``, one short transaction per batch, so a post by
+an author with 100k subscribers never holds the write lock for long. Rows are unique per
+(kind, source, user): a retried job skips the users it already reached.
+
+Unread counts live in ``stats_rollups`` (``notifications_unread:<user id>``) and move
+with fan-out, mark-read and deletes, so the badge is a primary-key read.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Iterable, NamedTuple, cast
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import Session, load_only
+
+from models.db_models import Comment, Notification, Post, StatsRollup, Subscription, User
+from services import jobs, stats_service
+
+NOTIFY_FANOUT_BATCH = int(os.getenv("NOTIFY_FANOUT_BATCH", "500"))
+
+UNREAD_METRIC = "notifications_unread:"
+
+POST = "post"
+COMMENT = "comment"
+REPLY = "reply"
+
+
+class Event(NamedTuple):
+    kind: str
+    ref_id: int  # the post for POST, the comment otherwise
+    post_id: int
+    actor_id: int
+
+
+# -- fan-out ---------------------------------------------------------------------------
+
+
+def recipients(db: Session, event: Event) -> list[int]:
+    """User ids to notify, ascending (the batch order)."""
+    if event.kind == POST:
+        rows = db.query(Subscription.subscriber_id).filter(
+            Subscription.target_user_id == event.actor_id,
+            Subscription.notifications_enabled.is_(True),
+        )
+        return sorted(r[0] for r in rows)
+    comment = db.get(Comment, event.ref_id)
+    if comment is None:
+        return []
+    users = {db.query(Post.author_id).filter(Post.id == comment.post_id).scalar()}
+    if comment.parent_comment_id is not None:
+        users.add(
+            db.query(Comment.author_id).filter(Comment.id == comment.parent_comment_id).scalar()
+        )
+    users.discard(None)
+    users.discard(event.actor_id)
+    return sorted(users)
+
+
+def deliver(db: Session, event: Event, user_ids: list[int]) -> int:
+    """Insert one batch of inbox rows and bump the counters (caller commits).
+
+    Users that already have this notification are skipped; returns the rows inserted.
+    """
+    if not user_ids:
+        return 0
+    have = {
+        r[0]
+        for r in db.query(Notification.user_id).filter(
+            Notification.kind == event.kind,
+            Notification.ref_id == event.ref_id,
+            Notification.user_id.in_(user_ids),
+        )
+    }
+    new = [uid for uid in user_ids if uid not in have]
+    if not new:
+        return 0
+    db.execute(
+        insert(Notification),
+        [
+            {
+                "user_id": uid,
+                "kind": event.kind,
+                "ref_id": event.ref_id,
+                "post_id": event.post_id,
+                "actor_id": event.actor_id,
+                "is_read": False,
+            }
+            for uid in new
+        ],
+    )
+    stats_service.record(db, {f"{UNREAD_METRIC}{uid}": 1 for uid in new}, series=False)
+    return len(new)
+
+
+def fan_out(event: Event, batch: int = NOTIFY_FANOUT_BATCH) -> int:
+    """Deliver ``event`` to every recipient, committing per batch; returns rows inserted."""
+    from database.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        users = recipients(db, event)
+        db.rollback()  # do not keep the read transaction open across the batches
+        inserted = 0
+        for i in range(0, len(users), batch):
+            inserted += deliver(db, event, users[i : i + batch])
+            db.commit()
+        return inserted
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def enqueue_post(db: Session, post: Post) -> None:
+    """Queue the fan-out of a newly published post (in the caller's transaction)."""
+    jobs.enqueue(db, "notify", Event(POST, post.id, post.id, post.author_id)._asdict())
+
+
+def enqueue_comment(db: Session, comment: Comment) -> None:
+    """Queue the notifications of a new comment (flushed, so it has an id)."""
+    kind = REPLY if comment.parent_comment_id is not None else COMMENT
+    jobs.enqueue(
+        db, "notify", Event(kind, comment.id, comment.post_id, comment.author_id)._asdict()
+    )
+
+
+@jobs.handler("notify")
+def _notify_job(payload: dict[str, Any]) -> None:
+    fan_out(Event(**payload))
+
+
+# -- inbox -----------------------------------------------------------------------------
+
+
+def list_notifications(
+    db: Session,
+    user_id: int,
+    *,
+    before: int | None = None,
+    limit: int = 20,
+    unread_only: bool = False,
+) -> tuple[list[dict[str, Any]], int | None]:
+    """One page, newest first, and the cursor of the next one (None on the last page)."""
+    q = db.query(Notification).filter(Notification.user_id == user_id)
+    if before is not None:
+        q = q.filter(Notification.id < before)
+    if unread_only:
+        q = q.filter(Notification.is_read.is_(False))
+    rows = q.order_by(Notification.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    rows = rows[:limit]
+
+    actor_ids = {n.actor_id for n in rows if n.actor_id is not None}
+    post_ids = {n.post_id for n in rows}
+    actors: dict[int, str] = (
+        {uid: name for uid, name in db.query(User.id, User.username).filter(User.id.in_(actor_ids))}
+        if actor_ids
+        else {}
+    )
+    titles = (
+        {
+            p.id: p.title
+            for p in db.query(Post)
+            .options(load_only(Post.id, Post.title))
+            .filter(Post.id.in_(post_ids))
+        }
+        if post_ids
+        else {}
+    )
+    items = [
+        {
+            "id": n.id,
+            "kind": n.kind,
+            "post_id": n.post_id,
+            "post_title": titles.get(n.post_id),
+            "comment_id": n.ref_id if n.kind != POST else None,
+            "actor_id": n.actor_id,
+            "actor_username": actors.get(n.actor_id) if n.actor_id is not None else None,
+            "created_at": n.created_at,
+            "is_read": n.is_read,
+        }
+        for n in rows
+    ]
+    return items, next_cursor
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    value = (
+        db.query(StatsRollup.value)
+        .filter(
+            StatsRollup.metric == f"{UNREAD_METRIC}{user_id}",
+            StatsRollup.period == "total",
+            StatsRollup.bucket == "",
+        )
+        .scalar()
+    )
+    return int(value or 0)
+
+
+def mark_read(db: Session, user_id: int, ids: Iterable[int] | None = None) -> int:
+    """Mark ``ids`` (default: everything) read in one UPDATE; returns rows changed."""
+    stmt = update(Notification).where(
+        Notification.user_id == user_id, Notification.is_read.is_(False)
+    )
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return 0
+        stmt = stmt.where(Notification.id.in_(ids))
+    result = db.execute(stmt.values(is_read=True).execution_options(synchronize_session=False))
+    changed = cast(CursorResult, result).rowcount
+    stats_service.record(db, {f"{UNREAD_METRIC}{user_id}": -changed}, series=False)
+    db.commit()
+    return changed
+
+
+# -- deletes and backfill ----------------------------------------------------------------
+
+
+def _delete(db: Session, *criteria: Any) -> None:
+    """Delete matching rows, taking them off the unread counters (caller commits)."""
+    unread = (
+        db.query(Notification.user_id, func.count())
+        .filter(*criteria, Notification.is_read.is_(False))
+        .group_by(Notification.user_id)
+    )
+    stats_service.record(db, {f"{UNREAD_METRIC}{uid}": -int(n) for uid, n in unread}, series=False)
+    db.query(Notification).filter(*criteria).delete(synchronize_session=False)
+
+
+def remove_post(db: Session, post_id: int) -> None:
+    _delete(db, Notification.post_id == post_id)
+
+
+def remove_user(db: Session, user_id: int) -> None:
+    """The user's inbox, everything the user caused or that is about the user's posts,
+    and the user's counter row."""
+    own_posts = select(Post.id).where(Post.author_id == user_id)
+    _delete(
+        db,
+        or_(
+            Notification.user_id == user_id,
+            Notification.actor_id == user_id,
+            Notification.post_id.in_(own_posts),
+        ),
+    )
+    db.query(StatsRollup).filter(StatsRollup.metric == f"{UNREAD_METRIC}{user_id}").delete()
+
+
+def count_unread(db: Session) -> dict[str, int]:
+    """Every unread counter straight from ``notifications`` (rollup backfill)."""
+    rows = (
+        db.query(Notification.user_id, func.count())
+        .filter(Notification.is_read.is_(False))
+        .group_by(Notification.user_id)
+    )
+    return {f"{UNREAD_METRIC}{uid}": int(n) for uid, n in rows}
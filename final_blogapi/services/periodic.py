@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+logger = logging.getLogger("blog.periodic")
+
+
+class PeriodicTask:
+    """Run a blocking ``fn`` every ``interval`` seconds in the threadpool.
+
+    Started from the app startup hook; failures are logged and the loop keeps going.
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], object]) -> None:
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        from fastapi.concurrency import run_in_threadpool
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_in_threadpool(self.fn)
+            except Exception:
+                logger.exception("periodic task %s failed", self.name)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -1,13 +1,61 @@
 from __future__ import annotations
 
+from collections import Counter
 from datetime import datetime, timezone
-from typing import Optional
-
-from sqlalchemy import and_, func, or_, text
-from sqlalchemy.orm import Session
-
-from models.db_models import Category, Favorite, Post, PostCategory, Reaction, Subscription, User
-from services.search_cache import posts_search_cache
+from typing import Any, Optional, Sequence, TypedDict
+
+from sqlalchemy import ColumnElement, and_, case, func, or_, select, text
+from sqlalchemy.orm import Session, joinedload, load_only
+
+from models.db_models import (
+    Comment,
+    Favorite,
+    Post,
+    PostCategory,
+    PostHotScore,
+    Reaction,
+    Subscription,
+    User,
+)
+from services import (
+    notification_service,
+    related_service,
+    social_graph,
+    stats_service,
+    trending_service,
+    view_analytics,
+)
+from services.category_service import CategoryInfo, category_registry, count_deltas
+from services.facet_index import Selection, facet_index
+from services.realtime import manager
+from services.search_cache import posts_search_cache, suggest_cache
+from services.view_analytics import view_aggregator
+
+
+POST_COLUMNS = (
+    "id",
+    "author_id",
+    "title",
+    "content",
+    "excerpt",
+    "status",
+    "created_at",
+    "updated_at",
+    "published_at",
+    "view_count",
+)
+# What a feed card needs: everything but the Markdown body
+SUMMARY_COLUMNS = tuple(c for c in POST_COLUMNS if c != "content")
+
+
+def _load_options(columns: Sequence[str] | None, with_author: bool) -> list:
+    """Loader options for list queries: ``columns`` restricts the SELECT (others load on access)."""
+    opts: list = []
+    if columns is not None:
+        opts.append(load_only(*(getattr(Post, c) for c in columns)))
+    if with_author:
+        opts.append(joinedload(Post.author).load_only(User.username))
+    return opts
 
 
 def _ensure_excerpt(content: str) -> str:
@@ -35,14 +83,29 @@ def create_post(
     db.add(post)
     db.flush()
 
-    if category_ids:
-        for cid in set(category_ids):
-            if db.get(Category, cid):
-                db.add(PostCategory(post_id=post.id, category_id=cid))
-
+    valid_ids = category_registry.valid_ids(db, category_ids or [])
+    for cid in valid_ids:
+        db.add(PostCategory(post_id=post.id, category_id=cid))
+
+    stats_service.record(db, {"posts": 1, f"posts_{status}": 1})
+    if status == "published":
+        stats_service.record(db, count_deltas(dict.fromkeys(valid_ids, 1)), series=False)
+        trending_service.bump(db, post.id, "publish")
+        notification_service.enqueue_post(db, post)
+        related_service.enqueue_refresh(db, post.id)
+    author = db.get(User, author_id)
     db.commit()
     db.refresh(post)
     posts_search_cache.clear()
+    suggest_cache.clear()
+    facet_index.upsert(post, valid_ids)
+    # WebSocket clients are per process, so not a job another worker could pick up
+    manager.publish(
+        {
+            "type": "post_created",
+            "post": {"id": post.id, "title": title, "author": author.username if author else None},
+        }
+    )
     return post
 
 
@@ -55,74 +118,138 @@ def update_post(
     status: str | None = None,
     category_ids: list[int] | None = None,
 ) -> Post:
+    was_published = post.status == "published"
+    will_publish = (status or post.status) == "published"
+    old_cats: list[int] | None = None
+    if (category_ids is not None or will_publish != was_published) and (
+        was_published or will_publish
+    ):
+        # Per-category published counts move with the status and the category set
+        old_cats = [
+            r[0] for r in db.query(PostCategory.category_id).filter(PostCategory.post_id == post.id)
+        ]
+
+    text_changed = (title is not None and title != post.title) or (
+        content is not None and content != post.content
+    )
     if title is not None:
         post.title = title
     if content is not None:
         post.content = content
         post.excerpt = _ensure_excerpt(content)
-    if status is not None:
+    if status is not None and status != post.status:
+        stats_service.record(db, {f"posts_{post.status}": -1}, series=False)
+        stats_service.record(db, {f"posts_{status}": 1}, series=status == "published")
         post.status = status
         if status == "published" and post.published_at is None:
             post.published_at = datetime.now(timezone.utc)
+            trending_service.bump(db, post.id, "publish")
+            notification_service.enqueue_post(db, post)
+
+    if (text_changed and will_publish) or will_publish != was_published:
+        related_service.enqueue_refresh(db, post.id)
 
+    new_cats = old_cats
     if category_ids is not None:
         # Replace categories
         db.query(PostCategory).filter(PostCategory.post_id == post.id).delete()
-        for cid in set(category_ids):
-            if db.get(Category, cid):
-                db.add(PostCategory(post_id=post.id, category_id=cid))
+        new_cats = category_registry.valid_ids(db, category_ids)
+        for cid in new_cats:
+            db.add(PostCategory(post_id=post.id, category_id=cid))
+
+    if old_cats is not None:
+        deltas: Counter[int] = Counter()
+        if was_published:
+            deltas.subtract(old_cats)
+        if will_publish:
+            deltas.update(new_cats or [])
+        stats_service.record(db, count_deltas(deltas), series=False)
 
     db.commit()
     db.refresh(post)
     posts_search_cache.clear()
+    suggest_cache.clear()
+    if facet_index.enabled:
+        if new_cats is None:
+            new_cats = [
+                r[0]
+                for r in db.query(PostCategory.category_id).filter(PostCategory.post_id == post.id)
+            ]
+        facet_index.upsert(post, new_cats)
     return post
 
 
 def delete_post(db: Session, post: Post) -> None:
+    comments = db.query(func.count(Comment.id)).filter(Comment.post_id == post.id).scalar() or 0
+    reactions = (
+        db.query(func.count()).select_from(Reaction).filter(Reaction.post_id == post.id).scalar()
+        or 0
+    )
+    deltas = {
+        "posts": -1,
+        f"posts_{post.status}": -1,
+        "comments": -comments,
+        "reactions": -reactions,
+    }
+    if post.status == "published":
+        cats = [
+            r[0] for r in db.query(PostCategory.category_id).filter(PostCategory.post_id == post.id)
+        ]
+        deltas.update(count_deltas(dict.fromkeys(cats, -1)))
+    stats_service.record(db, deltas, series=False)
+    # Explicit: SQLite applies ON DELETE CASCADE only with foreign_keys on
+    db.query(Reaction).filter(Reaction.post_id == post.id).delete(synchronize_session=False)
+    db.query(Favorite).filter(Favorite.post_id == post.id).delete(synchronize_session=False)
+    notification_service.remove_post(db, post.id)
+    related_service.remove_posts(db, [post.id])
+    trending_service.remove_posts(db, [post.id])
+    view_analytics.remove_posts(db, [post.id])
+    post_id = post.id
     db.delete(post)
     db.commit()
     posts_search_cache.clear()
+    suggest_cache.clear()
+    facet_index.remove(post_id)
+    related_service.forget(post_id)
+    view_aggregator.discard([post_id])
 
 
 def get_post(db: Session, post_id: int) -> Optional[Post]:
     return db.get(Post, post_id)
 
 
-def increment_view(db: Session, post: Post) -> None:
-    post.view_count += 1
-    db.commit()
+def _posts_by_ids(db: Session, post_ids: list[int], opts: list) -> list[Post]:
+    if not post_ids:
+        return []
+    rows = db.query(Post).options(*opts).filter(Post.id.in_(post_ids)).all()
+    by_id = {p.id: p for p in rows}
+    return [by_id[i] for i in post_ids if i in by_id]
 
 
-def set_reaction(db: Session, *, user_id: int, post_id: int, reaction_type: str) -> None:
-    existing = db.get(Reaction, {"user_id": user_id, "post_id": post_id})
-    if existing:
-        existing.reaction_type = reaction_type
-    else:
-        db.add(Reaction(user_id=user_id, post_id=post_id, reaction_type=reaction_type))
-    db.commit()
+def get_posts(db: Session, post_ids: list[int]) -> list[Post]:
+    """Posts for ``post_ids`` in that order (unknown ids skipped), authors loaded."""
+    return _posts_by_ids(db, post_ids, [joinedload(Post.author)])
 
 
-def remove_reaction(db: Session, *, user_id: int, post_id: int) -> None:
-    existing = db.get(Reaction, {"user_id": user_id, "post_id": post_id})
-    if existing:
-        db.delete(existing)
-        db.commit()
-
-
-def toggle_favorite(db: Session, *, user_id: int, post_id: int) -> bool:
-    fav = db.get(Favorite, {"user_id": user_id, "post_id": post_id})
-    if fav:
-        db.delete(fav)
-        db.commit()
-        return False
-    db.add(Favorite(user_id=user_id, post_id=post_id))
+def increment_view(db: Session, post: Post) -> None:
+    post.view_count += 1
+    stats_service.record(db, {"views": 1})
     db.commit()
-    return True
+    view_aggregator.record(post.id)
 
 
-def list_favorites(db: Session, *, user_id: int, limit: int = 20, offset: int = 0) -> list[Post]:
+def list_favorites(
+    db: Session,
+    *,
+    user_id: int,
+    limit: int = 20,
+    offset: int = 0,
+    columns: Sequence[str] | None = None,
+    with_author: bool = False,
+) -> list[Post]:
     return (
         db.query(Post)
+        .options(*_load_options(columns, with_author))
         .join(Favorite, Favorite.post_id == Post.id)
         .filter(Favorite.user_id == user_id)
         .order_by(Favorite.saved_at.desc())
@@ -132,49 +259,181 @@ def list_favorites(db: Session, *, user_id: int, limit: int = 20, offset: int =
     )
 
 
+CategoryFilter = tuple[list[int], Optional[list[int]], list[int]]
+
+
+class ListingFilters(TypedDict, total=False):
+    """Filter kwargs shared by ``list_posts`` and ``category_facets``."""
+
+    author_id: int | None
+    category_slug: str | None
+    categories_all: Sequence[str]
+    categories_any: Sequence[str]
+    categories_not: Sequence[str]
+    status: str | None
+    feed: str | None
+    viewer_id: int | None
+
+
+class _Filters(TypedDict):
+    """Resolved filters: the kwargs of ``_filter`` and ``_index_select``."""
+
+    status: str | None
+    author_id: int | None
+    categories: CategoryFilter
+    feed: str | None
+    viewer_id: int | None
+
+
+def _resolve_categories(
+    db: Session, all_of: Sequence[str], any_of: Sequence[str], none_of: Sequence[str]
+) -> CategoryFilter | None:
+    """Category slugs -> ids (all, any or None for no filter, none); None if nothing can match."""
+    ids_all = []
+    for slug in all_of:
+        category = category_registry.by_slug(db, slug)
+        if category is None:
+            return None
+        ids_all.append(category.id)
+    ids_any = None
+    if any_of:
+        ids_any = [c.id for c in (category_registry.by_slug(db, slug) for slug in any_of) if c]
+        if not ids_any:
+            return None
+    ids_not = [c.id for c in (category_registry.by_slug(db, slug) for slug in none_of) if c]
+    return ids_all, ids_any, ids_not
+
+
+def _filter(
+    query,
+    *,
+    status: str | None,
+    author_id: int | None,
+    categories: CategoryFilter,
+    feed: str | None,
+    viewer_id: int | None,
+):
+    if status:
+        query = query.filter(Post.status == status)
+
+    if author_id:
+        query = query.filter(Post.author_id == author_id)
+
+    ids_all, ids_any, ids_not = categories
+    for cid in ids_all:
+        query = query.filter(
+            Post.id.in_(select(PostCategory.post_id).where(PostCategory.category_id == cid))
+        )
+    if ids_any is not None:
+        query = query.filter(
+            Post.id.in_(select(PostCategory.post_id).where(PostCategory.category_id.in_(ids_any)))
+        )
+    if ids_not:
+        query = query.filter(
+            Post.id.not_in(
+                select(PostCategory.post_id).where(PostCategory.category_id.in_(ids_not))
+            )
+        )
+
+    if feed == "following" and viewer_id:
+        query = query.join(Subscription, Subscription.target_user_id == Post.author_id).filter(
+            Subscription.subscriber_id == viewer_id
+        )
+    return query
+
+
+def _index_select(
+    db: Session,
+    *,
+    status: str | None,
+    author_id: int | None,
+    categories: CategoryFilter,
+    feed: str | None,
+    viewer_id: int | None,
+) -> Selection | None:
+    """The filter answered by the facet index; None when it is not available."""
+    if not facet_index.ready or feed not in (None, "following"):
+        return None
+    authors = {author_id} if author_id else None
+    if feed == "following" and viewer_id:
+        followed = social_graph.following_ids(db, viewer_id)
+        authors = set(followed) if authors is None else authors & followed
+    ids_all, ids_any, ids_not = categories
+    return facet_index.select(
+        status=status, authors=authors, all_of=ids_all, any_of=ids_any, none_of=ids_not
+    )
+
+
 def list_posts(
     db: Session,
     *,
     q: str | None = None,
     author_id: int | None = None,
     category_slug: str | None = None,
+    categories_all: Sequence[str] = (),
+    categories_any: Sequence[str] = (),
+    categories_not: Sequence[str] = (),
     status: str | None = "published",
     page: int = 1,
     per_page: int = 10,
     feed: str | None = None,
     viewer_id: int | None = None,
+    columns: Sequence[str] | None = None,
+    with_author: bool = False,
 ) -> tuple[list[Post], int]:
     """Return (posts, total_count).
 
+    categories_all / categories_any / categories_not: category slugs the post must have
+    all of / at least one of / none of (``category_slug`` is one more "all" slug).
+    columns: Post attributes to SELECT (e.g. ``SUMMARY_COLUMNS``); None loads all.
+    with_author: load ``post.author`` in the same query.
+
     feed:
       - None: normal listing
       - 'following': posts of followed authors (viewer_id required)
       - 'recommended': naive recommend by liked categories (viewer_id required)
+      - 'trending': ordered by hot score (see trending_service)
+
+    Without ``q``, listings other than 'trending' are served by the facet index when it
+    is enabled and built.
     """
 
     page = max(1, page)
     per_page = min(max(1, per_page), 50)
     offset = (page - 1) * per_page
 
-    query = db.query(Post)
+    all_of = [*categories_all, category_slug] if category_slug else list(categories_all)
+    categories = _resolve_categories(db, all_of, categories_any, categories_not)
+    if categories is None:
+        return [], 0
+    filters: _Filters = {
+        "status": status,
+        "author_id": author_id,
+        "categories": categories,
+        "feed": feed,
+        "viewer_id": viewer_id,
+    }
+    opts = _load_options(columns, with_author)
 
-    if status:
-        query = query.filter(Post.status == status)
+    if not q:
+        result = _index_select(db, **filters)
+        if result is not None:
+            return _posts_by_ids(db, facet_index.page(result, offset, per_page), opts), len(result)
 
-    if author_id:
-        query = query.filter(Post.author_id == author_id)
+    query = _filter(db.query(Post).options(*opts), **filters)
 
-    if category_slug:
-        query = query.join(PostCategory).join(Category).filter(Category.slug == category_slug)
-
-    if feed == "following" and viewer_id:
-        query = query.join(Subscription, Subscription.target_user_id == Post.author_id).filter(
-            Subscription.subscriber_id == viewer_id
-        )
+    # id breaks created_at ties the same way the facet index does
+    order: tuple[ColumnElement[Any], ...] = (Post.created_at.desc(), Post.id.desc())
+    if feed == "trending":
+        query = query.join(PostHotScore, PostHotScore.post_id == Post.id)
+        order = (PostHotScore.score.desc(),)
 
     if q:
         # Cache only the search ids, not full objects
-        key = f"{q.strip().lower()}|{author_id}|{category_slug}|{status}|{page}|{per_page}|{feed}|{viewer_id}"
+        key = (
+            f"{q.strip().lower()}|{author_id}|{categories}|{status}|{page}|{per_page}"
+            f"|{feed}|{viewer_id}"
+        )
         ids = posts_search_cache.get(key)
         if ids is None:
             # Prefer FTS when on SQLite
@@ -182,7 +441,7 @@ def list_posts(
                 rows = db.execute(
                     text(
                         """
-                        SELECT post_id FROM posts_fts
+                        SELECT rowid FROM posts_fts
                         WHERE posts_fts MATCH :q
                         ORDER BY rank
                         LIMIT :limit OFFSET :offset
@@ -200,7 +459,7 @@ def list_posts(
                 )
             else:
                 query = query.filter(or_(Post.title.ilike(f"%{q}%"), Post.content.ilike(f"%{q}%")))
-                total = query.count()
+                total = query.with_entities(func.count(Post.id)).scalar()
                 posts = (
                     query.order_by(Post.created_at.desc()).offset(offset).limit(per_page).all()
                 )
@@ -212,21 +471,71 @@ def list_posts(
             if not ids:
                 return [], int(total or 0)
             posts = (
-                db.query(Post).filter(Post.id.in_(ids)).order_by(Post.created_at.desc()).all()
+                db.query(Post)
+                .options(*opts)
+                .filter(Post.id.in_(ids))
+                .order_by(Post.created_at.desc())
+                .all()
             )
             return posts, int(total or len(posts))
 
         # cached ids
         if not ids:
             return [], 0
-        posts = db.query(Post).filter(Post.id.in_(ids)).order_by(Post.created_at.desc()).all()
+        posts = (
+            db.query(Post)
+            .options(*opts)
+            .filter(Post.id.in_(ids))
+            .order_by(Post.created_at.desc())
+            .all()
+        )
         return posts, len(posts)
 
-    total = query.count()
-    posts = query.order_by(Post.created_at.desc()).offset(offset).limit(per_page).all()
+    total = query.with_entities(func.count(Post.id)).scalar()
+    posts = query.order_by(*order).offset(offset).limit(per_page).all()
     return posts, int(total)
 
 
+def category_facets(
+    db: Session,
+    *,
+    author_id: int | None = None,
+    category_slug: str | None = None,
+    categories_all: Sequence[str] = (),
+    categories_any: Sequence[str] = (),
+    categories_not: Sequence[str] = (),
+    status: str | None = "published",
+    feed: str | None = None,
+    viewer_id: int | None = None,
+) -> dict[str, int]:
+    """Category slug -> number of posts matching the ``list_posts`` filters (non-zero only)."""
+    all_of = [*categories_all, category_slug] if category_slug else list(categories_all)
+    categories = _resolve_categories(db, all_of, categories_any, categories_not)
+    if categories is None:
+        return {}
+    filters: _Filters = {
+        "status": status,
+        "author_id": author_id,
+        "categories": categories,
+        "feed": feed,
+        "viewer_id": viewer_id,
+    }
+    result = _index_select(db, **filters)
+    if result is not None:
+        counts = facet_index.category_counts(result)
+    else:
+        matching = _filter(db.query(Post.id), **filters).subquery()
+        rows = (
+            db.query(PostCategory.category_id, func.count())
+            .filter(PostCategory.post_id.in_(select(matching.c.id)))
+            .group_by(PostCategory.category_id)
+            .all()
+        )
+        counts = {category_id: n for category_id, n in rows}
+    slugs = {c.id: c.slug for c in category_registry.all(db)}
+    return {slugs[cid]: int(n) for cid, n in counts.items() if cid in slugs and n}
+
+
 def get_post_counts(db: Session, post_id: int) -> dict[str, int]:
     likes = (
         db.query(func.count(Reaction.user_id))
@@ -246,14 +555,8 @@ def get_post_counts(db: Session, post_id: int) -> dict[str, int]:
     }
 
 
-def get_post_categories(db: Session, post_id: int) -> list[Category]:
-    return (
-        db.query(Category)
-        .join(PostCategory, PostCategory.category_id == Category.id)
-        .filter(PostCategory.post_id == post_id)
-        .order_by(Category.name.asc())
-        .all()
-    )
+def get_post_categories(db: Session, post_id: int) -> list[CategoryInfo]:
+    return get_posts_categories(db, [post_id])[post_id]
 
 
 def is_favorited(db: Session, *, user_id: int, post_id: int) -> bool:
@@ -263,3 +566,86 @@ def is_favorited(db: Session, *, user_id: int, post_id: int) -> bool:
 def get_user_reaction(db: Session, *, user_id: int, post_id: int) -> str | None:
     r = db.get(Reaction, {"user_id": user_id, "post_id": post_id})
     return r.reaction_type if r else None
+
+
+def get_posts_counts(db: Session, post_ids: list[int]) -> dict[int, dict[str, int]]:
+    """``get_post_counts`` for many posts: one grouped query per table."""
+    out = {pid: {"likes": 0, "dislikes": 0, "favorites": 0} for pid in post_ids}
+    if not post_ids:
+        return out
+    reactions = (
+        db.query(
+            Reaction.post_id,
+            func.sum(case((Reaction.reaction_type == "like", 1), else_=0)),
+            func.sum(case((Reaction.reaction_type == "dislike", 1), else_=0)),
+        )
+        .filter(Reaction.post_id.in_(post_ids))
+        .group_by(Reaction.post_id)
+    )
+    for pid, likes, dislikes in reactions:
+        out[pid]["likes"] = int(likes or 0)
+        out[pid]["dislikes"] = int(dislikes or 0)
+    favorites = (
+        db.query(Favorite.post_id, func.count(Favorite.user_id))
+        .filter(Favorite.post_id.in_(post_ids))
+        .group_by(Favorite.post_id)
+    )
+    for pid, n in favorites:
+        out[pid]["favorites"] = int(n)
+    return out
+
+
+def get_posts_categories(db: Session, post_ids: list[int]) -> dict[int, list[CategoryInfo]]:
+    """Categories of each post, ordered by name (names come from the registry)."""
+    out: dict[int, list[CategoryInfo]] = {pid: [] for pid in post_ids}
+    if not post_ids:
+        return out
+    rows = (
+        db.query(PostCategory.post_id, PostCategory.category_id)
+        .filter(PostCategory.post_id.in_(post_ids))
+        .all()
+    )
+    if not rows:
+        return out
+    order = {c.id: i for i, c in enumerate(category_registry.all(db))}
+    for pid, cid in sorted(rows, key=lambda r: order.get(r[1], len(order))):
+        info = category_registry.get(db, cid)
+        if info is not None:
+            out[pid].append(info)
+    return out
+
+
+def get_viewer_state(db: Session, *, user_id: int, post_ids: list[int]) -> dict[int, dict]:
+    """What ``user_id`` did to each post: reaction, favorite, and whether they follow the author.
+
+    Unknown post ids are left out. One IN-query per table, whatever the number of posts.
+    """
+    if not post_ids:
+        return {}
+    authors = {
+        pid: author_id
+        for pid, author_id in db.query(Post.id, Post.author_id).filter(Post.id.in_(post_ids))
+    }
+    if not authors:
+        return {}
+    reactions = {
+        pid: kind
+        for pid, kind in db.query(Reaction.post_id, Reaction.reaction_type).filter(
+            Reaction.user_id == user_id, Reaction.post_id.in_(list(authors))
+        )
+    }
+    favorited = {
+        r[0]
+        for r in db.query(Favorite.post_id).filter(
+            Favorite.user_id == user_id, Favorite.post_id.in_(list(authors))
+        )
+    }
+    following = social_graph.following_among(db, user_id, authors.values())
+    return {
+        pid: {
+            "reaction": reactions.get(pid),
+            "favorited": pid in favorited,
+            "following_author": author_id in following,
+        }
+        for pid, author_id in authors.items()
+    }
@@ -0,0 +1,211 @@
+"""On-demand profiling of a running worker (stdlib only).
+
+``sample_cpu`` polls ``sys._current_frames()`` from a helper thread for a bounded time
+and aggregates the stacks of every thread (including the event loop) into
+collapsed-stack lines ``thread;module:func;... count`` that flamegraph.pl,
+speedscope or inferno read directly. Memory profiling wraps ``tracemalloc``:
+start tracing, keep a few named snapshots, report top allocation sites or the diff
+between two snapshots. Everything is per process: with several workers, each request
+profiles whichever worker served it.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from types import FrameType
+from typing import Any
+
+MAX_CPU_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+MAX_SNAPSHOTS = 5
+
+# Leaf frames of threads that are just waiting (event loop select, idle threadpool workers)
+IDLE_LEAVES = {
+    ("selectors", "select"),
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("queue", "get"),
+    ("concurrent.futures.thread", "_worker"),
+    ("asyncio.base_events", "_run_once"),
+}
+
+_cpu_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profile is already running in this process."""
+
+
+def _label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}".replace(";", ":")
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_LEAVES
+
+
+def sample_cpu(
+    seconds: float, interval: float = 0.005, include_idle: bool = False
+) -> dict[str, Any]:
+    """Sample all threads for ``seconds``; blocks the calling thread meanwhile."""
+    seconds = min(max(seconds, 0.1), MAX_CPU_SECONDS)
+    interval = max(interval, 0.001)
+    if not _cpu_lock.acquire(blocking=False):
+        raise ProfilerBusy("a CPU profile is already running")
+    try:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter[str] = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (not include_idle and _is_idle(frame)):
+                    continue
+                parts = []
+                f: FrameType | None = frame
+                while f is not None:
+                    parts.append(_label(f))
+                    f = f.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                parts.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+                stacks[";".join(reversed(parts))] += 1
+            samples += 1
+            time.sleep(interval)
+        elapsed = time.perf_counter() - started
+    finally:
+        _cpu_lock.release()
+    return {
+        "pid": os.getpid(),
+        "seconds": round(elapsed, 3),
+        "interval_ms": interval * 1000,
+        "samples": samples,
+        "stacks": stacks,
+    }
+
+
+def collapsed(profile: dict[str, Any]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
+
+
+def top_functions(profile: dict[str, Any], limit: int = 30) -> list[dict[str, Any]]:
+    """Self and total sample counts per function (total counts a frame once per stack)."""
+    own: Counter[str] = Counter()
+    total: Counter[str] = Counter()
+    for stack, count in profile["stacks"].items():
+        frames = stack.split(";")[1:]  # drop the thread name
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for name in set(frames):
+            total[name] += count
+    return [
+        {"function": name, "self": own[name], "total": n} for name, n in total.most_common(limit)
+    ]
+
+
+class MemoryProfiler:
+    """tracemalloc with a small ring of named snapshots."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshots: OrderedDict[str, tuple[datetime, tracemalloc.Snapshot]] = OrderedDict()
+        self._seq = 0
+
+    def start(self, frames: int = 10) -> dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        with self._lock:
+            self._snapshots.clear()
+        tracemalloc.stop()
+        return self.status()
+
+    def status(self) -> dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "pid": os.getpid(),
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else 0,
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "snapshots": [
+                {"id": k, "taken_at": t.isoformat()} for k, (t, _) in self._snapshots.items()
+            ],
+        }
+
+    def _take(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running; start it first")
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            )
+        )
+
+    def snapshot(self, key_type: str = "lineno", limit: int = 20) -> dict[str, Any]:
+        snap = self._take()
+        with self._lock:
+            self._seq += 1
+            snap_id = f"s{self._seq}"
+            self._snapshots[snap_id] = (datetime.now(timezone.utc), snap)
+            while len(self._snapshots) > MAX_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+        return {
+            "id": snap_id,
+            **self.status(),
+            "top": [_stat(s) for s in snap.statistics(key_type)[:limit]],
+        }
+
+    def diff(
+        self, base: str, current: str | None = None, key_type: str = "lineno", limit: int = 20
+    ) -> dict[str, Any]:
+        """Growth from snapshot ``base`` to ``current`` (default: a fresh, unsaved snapshot)."""
+        with self._lock:
+            if base not in self._snapshots or (
+                current is not None and current not in self._snapshots
+            ):
+                raise KeyError(current if base in self._snapshots else base)
+            old = self._snapshots[base][1]
+            new = self._snapshots[current][1] if current is not None else None
+        if new is None:
+            new = self._take()
+        stats = new.compare_to(old, key_type)
+        return {
+            "base": base,
+            "current": current or "now",
+            "size_diff_kb": round(sum(s.size_diff for s in stats) / 1024, 1),
+            "top": [_stat(s) for s in stats[:limit]],
+        }
+
+
+def _stat(stat: Any) -> dict[str, Any]:
+    frames = stat.traceback  # oldest first; the allocation site is the last frame
+    out: dict[str, Any] = {
+        "file": frames[-1].filename,
+        "line": frames[-1].lineno,
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        out["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+        out["count_diff"] = stat.count_diff
+    if len(frames) > 1:
+        out["traceback"] = [f"{f.filename}:{f.lineno}" for f in frames]
+    return out
+
+
+memory_profiler = MemoryProfiler()
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 import json
+from concurrent.futures import Future
 from typing import Any
 
 from fastapi import WebSocket
 
 
 class ConnectionManager:
+    """WebSocket clients of this process; events reach the clients of the worker that wrote."""
+
     def __init__(self) -> None:
         self.active: set[WebSocket] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._sending: set[Future[None]] = set()
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
+        self._loop = asyncio.get_running_loop()
         self.active.add(websocket)
 
     def disconnect(self, websocket: WebSocket) -> None:
@@ -30,5 +37,14 @@ class ConnectionManager:
         for ws in dead:
             self.disconnect(ws)
 
+    def publish(self, message: dict[str, Any]) -> None:
+        """Broadcast without waiting for it, from any thread (call after the commit)."""
+        loop = self._loop
+        if not self.active or loop is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self.broadcast(message), loop)
+        self._sending.add(future)  # keep the task alive until it is sent
+        future.add_done_callback(self._sending.discard)
+
 
 manager = ConnectionManager()
@@ -0,0 +1,326 @@
+"""Related posts: nearest neighbours by TF-IDF cosine over title + content.
+
+A post is a sparse vector: its ``RELATED_MAX_TERMS`` heaviest terms (letters-only words
+of 3+ characters, stopwords dropped, title words counted ``TITLE_WEIGHT`` times),
+weighted ``(1 + log tf) * smoothed idf`` and L2-normalized. Terms in more than
+``RELATED_MAX_DF`` of the posts carry no signal and are skipped. Vectors live in an
+inverted index (term -> {post: weight}), so the similarities of one post to every other
+are a sum over the postings of its own terms only.
+
+The ``RELATED_TOP_K`` best neighbours of each published post (score at least
+``RELATED_MIN_SCORE``) are stored in ``post_related`` and pages read them with one
+indexed query. Writes only enqueue jobs: creating, editing or publishing a post runs
+``related`` for it, which re-vectorizes that post, rewrites its list and adds it to
+(or drops it from) the lists of the posts it now resembles. Document frequencies are
+refreshed by the ``related_rebuild`` job, which recomputes everything; it is queued every
+``RELATED_RECOMPUTE_INTERVAL`` seconds and on startup when the table is empty.
+
+The model is per process, built on first use and rebuilt after ``RELATED_MODEL_TTL``
+seconds so that edits handled by other workers are picked up.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import Iterable
+
+from sqlalchemy import Row, insert
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.query import RowReturningQuery
+
+from models.db_models import Job, Post, PostRelated
+from services import jobs
+from services.periodic import PeriodicTask
+
+RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", "5"))
+RELATED_MAX_TERMS = int(os.getenv("RELATED_MAX_TERMS", "40"))
+RELATED_MAX_DF = float(os.getenv("RELATED_MAX_DF", "0.3"))
+RELATED_MIN_SCORE = float(os.getenv("RELATED_MIN_SCORE", "0.05"))
+RELATED_MODEL_TTL = float(os.getenv("RELATED_MODEL_TTL", "3600"))
+RELATED_RECOMPUTE_INTERVAL = float(os.getenv("RELATED_RECOMPUTE_INTERVAL", "21600"))
+
+TITLE_WEIGHT = 3
+# Below this many posts every term is kept: document frequencies mean little
+MIN_DOCS_FOR_DF_CUT = 20
+_IN_CHUNK = 500
+_INSERT_BATCH = 5000
+
+_WORD_RE = re.compile(r"[^\W\d_]{3,}")
+STOPWORDS = frozenset(
+    """
+    the and for are but not you your with this that from have has had was were will would
+    can could should what when where which who how all any its into than then them they
+    their there been being our out about also just more most some such only over very
+    это как что для или так все его она они оно мне меня при был была были быть есть
+    уже еще ещё если где когда чтобы может нет тоже там тут вот этот эта эти того тем
+    """.split()
+)
+
+
+def term_counts(title: str, content: str) -> Counter[str]:
+    counts = Counter(w for w in _WORD_RE.findall(content.lower()) if w not in STOPWORDS)
+    for w in _WORD_RE.findall(title.lower()):
+        if w not in STOPWORDS:
+            counts[w] += TITLE_WEIGHT
+    return counts
+
+
+class TfIdfModel:
+    """Document frequencies plus the sparse vectors of published posts, inverted."""
+
+    def __init__(self, max_terms: int = RELATED_MAX_TERMS, max_df: float = RELATED_MAX_DF) -> None:
+        self.max_terms = max_terms
+        self.max_df = max_df
+        self.n_docs = 0
+        self.df: Counter[str] = Counter()
+        self.vectors: dict[int, dict[str, float]] = {}
+        self.postings: defaultdict[str, dict[int, float]] = defaultdict(dict)
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, docs: Iterable[tuple[int, str, str] | Row[tuple[int, str, str]]]) -> TfIdfModel:
+        model = cls()
+        counts = {}
+        for post_id, title, content in docs:
+            counts[post_id] = term_counts(title, content)
+            model.df.update(counts[post_id].keys())
+        model.n_docs = len(counts)
+        for post_id, c in counts.items():
+            model._index(post_id, model.vectorize(c))
+        return model
+
+    def vectorize(self, counts: Counter[str]) -> dict[str, float]:
+        n = max(self.n_docs, 1)
+        max_df = self.max_df * n if n >= MIN_DOCS_FOR_DF_CUT else math.inf
+        weights = {
+            term: (1 + math.log(tf)) * (math.log((1 + n) / (1 + self.df[term])) + 1)
+            for term, tf in counts.items()
+            if self.df[term] <= max_df
+        }
+        top = heapq.nlargest(self.max_terms, weights.items(), key=itemgetter(1))
+        norm = math.sqrt(sum(w * w for _, w in top))
+        return {term: w / norm for term, w in top} if norm else {}
+
+    def _index(self, post_id: int, vector: dict[str, float]) -> None:
+        self.vectors[post_id] = vector
+        for term, w in vector.items():
+            self.postings[term][post_id] = w
+
+    def remove(self, post_id: int) -> None:
+        for term in self.vectors.pop(post_id, {}):
+            postings = self.postings[term]
+            postings.pop(post_id, None)
+            if not postings:
+                del self.postings[term]
+
+    def upsert(self, post_id: int, title: str, content: str) -> None:
+        counts = term_counts(title, content)
+        if post_id not in self.vectors:
+            # New post: count it in; an edit keeps the frequencies until the next rebuild
+            self.n_docs += 1
+            self.df.update(counts.keys())
+        self.remove(post_id)
+        self._index(post_id, self.vectorize(counts))
+
+    def similarities(self, post_id: int) -> dict[int, float]:
+        """Cosine to every post sharing a term with ``post_id`` (itself excluded)."""
+        acc: defaultdict[int, float] = defaultdict(float)
+        for term, w in self.vectors.get(post_id, {}).items():
+            for other, w_other in self.postings[term].items():
+                acc[other] += w * w_other
+        acc.pop(post_id, None)
+        return acc
+
+
+def top_k(scores: dict[int, float], k: int = RELATED_TOP_K) -> dict[int, float]:
+    best = heapq.nlargest(
+        k, ((i, s) for i, s in scores.items() if s >= RELATED_MIN_SCORE), key=itemgetter(1)
+    )
+    return dict(best)
+
+
+def _published(db: Session) -> RowReturningQuery[tuple[int, str, str]]:
+    return (
+        db.query(Post.id, Post.title, Post.content)
+        .filter(Post.status == "published")
+        .yield_per(1000)
+    )
+
+
+class _ModelHolder:
+    def __init__(self) -> None:
+        self.lock = threading.RLock()  # jobs run on several workers; one model update at a time
+        self.model: TfIdfModel | None = None
+
+    def get(self, db: Session) -> TfIdfModel:
+        if self.model is None or time.monotonic() - self.model.built_at > RELATED_MODEL_TTL:
+            self.model = TfIdfModel.build(_published(db))
+        return self.model
+
+    def clear(self) -> None:
+        with self.lock:
+            self.model = None
+
+
+related_model = _ModelHolder()
+
+
+# -- table ---------------------------------------------------------------------------------
+
+
+def _write_lists(db: Session, lists: dict[int, dict[int, float]]) -> None:
+    """Replace the stored lists of ``lists``' keys (caller commits)."""
+    ids = list(lists)
+    for i in range(0, len(ids), _IN_CHUNK):
+        db.query(PostRelated).filter(PostRelated.post_id.in_(ids[i : i + _IN_CHUNK])).delete(
+            synchronize_session=False
+        )
+    rows = [
+        {"post_id": post_id, "related_id": other, "score": score}
+        for post_id, best in lists.items()
+        for other, score in best.items()
+    ]
+    for i in range(0, len(rows), _INSERT_BATCH):
+        db.execute(insert(PostRelated), rows[i : i + _INSERT_BATCH])
+
+
+def _stored_lists(db: Session, post_ids: Iterable[int]) -> dict[int, dict[int, float]]:
+    ids = list(post_ids)
+    out: dict[int, dict[int, float]] = {i: {} for i in ids}
+    for i in range(0, len(ids), _IN_CHUNK):
+        for post_id, other, score in db.query(
+            PostRelated.post_id, PostRelated.related_id, PostRelated.score
+        ).filter(PostRelated.post_id.in_(ids[i : i + _IN_CHUNK])):
+            out[post_id][other] = score
+    return out
+
+
+def remove_posts(db: Session, post_ids: Iterable[int] | Query) -> None:
+    """Drop the lists of ``post_ids`` (ids or a subquery) and their entries in others' lists
+    (caller commits). Explicit: SQLite applies ON DELETE CASCADE only with foreign_keys on."""
+    db.query(PostRelated).filter(
+        PostRelated.post_id.in_(post_ids) | PostRelated.related_id.in_(post_ids)
+    ).delete(synchronize_session=False)
+
+
+def recompute(db: Session) -> int:
+    """Rebuild the model and every stored list; returns the number of posts."""
+    with related_model.lock:
+        model = TfIdfModel.build(_published(db))
+        db.rollback()  # the scan is done; keep the write transaction short
+        lists = {post_id: top_k(model.similarities(post_id)) for post_id in model.vectors}
+        db.query(PostRelated).delete(synchronize_session=False)
+        _write_lists(db, lists)
+        db.commit()
+        related_model.model = model
+    return len(lists)
+
+
+def refresh_post(db: Session, post_id: int) -> None:
+    """Bring the lists up to date after ``post_id`` was created, edited or (un)published."""
+    with related_model.lock:
+        model = related_model.get(db)
+        post = db.get(Post, post_id)
+        if post is None or post.status != "published":
+            model.remove(post_id)
+            remove_posts(db, [post_id])
+            db.commit()
+            return
+
+        model.upsert(post_id, post.title, post.content)
+        scores = model.similarities(post_id)
+        # Lists the post may enter, and lists it is already in (its score changed)
+        listing = {
+            r[0] for r in db.query(PostRelated.post_id).filter(PostRelated.related_id == post_id)
+        }
+        candidates = {i for i, s in scores.items() if s >= RELATED_MIN_SCORE} | listing
+        changed = {post_id: top_k(scores)}
+        for other, best in _stored_lists(db, candidates).items():
+            updated = dict(best)
+            updated.pop(post_id, None)
+            updated[post_id] = scores.get(other, 0.0)
+            updated = top_k(updated)
+            if updated != best:
+                changed[other] = updated
+        _write_lists(db, changed)
+        db.commit()
+
+
+def forget(post_id: int) -> None:
+    """Take a deleted post out of this process's model."""
+    with related_model.lock:
+        if related_model.model is not None:
+            related_model.model.remove(post_id)
+
+
+def related_ids(db: Session, post_id: int, limit: int = RELATED_TOP_K) -> list[tuple[int, float]]:
+    """(post id, score) of the stored neighbours, best first."""
+    rows = (
+        db.query(PostRelated.related_id, PostRelated.score)
+        .filter(PostRelated.post_id == post_id)
+        .order_by(PostRelated.score.desc())
+        .limit(limit)
+    )
+    return [(int(i), float(s)) for i, s in rows]
+
+
+# -- jobs ----------------------------------------------------------------------------------
+
+
+def enqueue_refresh(db: Session, post_id: int) -> None:
+    """Queue ``refresh_post`` (in the caller's transaction)."""
+    jobs.enqueue(db, "related", {"post_id": post_id})
+
+
+@jobs.handler("related")
+def _refresh_job(payload: dict) -> None:
+    from database.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        refresh_post(db, payload["post_id"])
+    finally:
+        db.close()
+
+
+@jobs.handler("related_rebuild")
+def _rebuild_job(payload: dict) -> None:
+    from database.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        recompute(db)
+    finally:
+        db.close()
+
+
+def schedule_rebuild(db: Session | None = None, *, only_if_empty: bool = False) -> bool:
+    """Queue ``related_rebuild`` unless one is already waiting; True if queued."""
+    from database.session import SessionLocal
+
+    own = db is None
+    db = SessionLocal() if db is None else db
+    try:
+        if db.query(Job.id).filter(Job.kind == "related_rebuild").first() is not None:
+            return False
+        if only_if_empty and (
+            db.query(PostRelated.post_id).first() is not None
+            or db.query(Post.id).filter(Post.status == "published").first() is None
+        ):
+            return False
+        jobs.enqueue(db, "related_rebuild", {})
+        db.commit()
+        return True
+    finally:
+        if own:
+            db.close()
+
+
+recompute_task = PeriodicTask("related-recompute", RELATED_RECOMPUTE_INTERVAL, schedule_rebuild)
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+import os
+
 from cachetools import TTLCache
 
 # Cache popular search queries (both posts and users)
 # Very simple in-memory cache; good enough for homework.
 posts_search_cache: TTLCache[str, list[int]] = TTLCache(maxsize=512, ttl=60)
 users_search_cache: TTLCache[str, list[int]] = TTLCache(maxsize=512, ttl=60)
+
+# Autocomplete answers per normalized prefix (services/suggest_service.py)
+suggest_cache: TTLCache[str, dict] = TTLCache(
+    maxsize=int(os.getenv("SUGGEST_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("SUGGEST_CACHE_TTL", "30")),
+)
@@ -0,0 +1,230 @@
+"""Slow-query log.
+
+Statements slower than ``SLOW_QUERY_MS`` are logged to ``blog.sql.slow`` with redacted
+parameters, the application frame that issued them and (SQLite, first occurrence of a
+statement shape) the ``EXPLAIN QUERY PLAN`` output. They are also aggregated in memory
+by fingerprint of the normalized statement: count, total/max time and p50/p95/p99 over
+the most recent samples, shown on the admin dashboard and at
+``/api/admin/slow-queries``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from types import FrameType
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.sql_metrics import current_stats, statement_shape
+
+logger = logging.getLogger("blog.sql.slow")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# redacted: strings/bytes replaced by their length; full: as is; none: omitted
+SLOW_QUERY_PARAMS = os.getenv("SLOW_QUERY_PARAMS", "redacted")
+MAX_FINGERPRINTS = 500
+SAMPLES_PER_FINGERPRINT = 200
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_DIRS = (os.sep + "site-packages" + os.sep, os.sep + "lib" + os.sep + "python")
+
+
+def redact(parameters: Any) -> Any:
+    if SLOW_QUERY_PARAMS == "none":
+        return None
+    if SLOW_QUERY_PARAMS == "full":
+        return parameters
+
+    def one(value: Any) -> Any:
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, (str, bytes)):
+            return f"<{type(value).__name__}:{len(value)}>"
+        return f"<{type(value).__name__}>"
+
+    if isinstance(parameters, dict):
+        return {k: one(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [one(v) for v in parameters]
+    return one(parameters)
+
+
+def caller_location() -> str | None:
+    """Innermost frame of this project (outside SQLAlchemy and this module)."""
+    f: FrameType | None = sys._getframe(1)
+    while f is not None:
+        filename = f.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_ROOT)
+            and filename != __file__
+            and not any(d in filename[len(_PROJECT_ROOT) :] for d in _SKIP_DIRS)
+        ):
+            return f"{os.path.relpath(filename, _PROJECT_ROOT)}:{f.f_lineno} in {f.f_code.co_name}"
+        f = f.f_back
+    return None
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+@dataclass
+class SlowQueryEntry:
+    fingerprint: str
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    samples: deque[float] = field(default_factory=lambda: deque(maxlen=SAMPLES_PER_FINGERPRINT))
+    last_seen: datetime | None = None
+    last_params: Any = None
+    callers: dict[str, int] = field(default_factory=dict)
+    requests: dict[str, int] = field(default_factory=dict)
+    plan: list[str] | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        s = sorted(self.samples)
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 2),
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": round(_percentile(s, 0.50), 2),
+            "p95_ms": round(_percentile(s, 0.95), 2),
+            "p99_ms": round(_percentile(s, 0.99), 2),
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+            "last_params": self.last_params,
+            "callers": dict(sorted(self.callers.items(), key=lambda kv: -kv[1])[:5]),
+            "requests": dict(sorted(self.requests.items(), key=lambda kv: -kv[1])[:5]),
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, explain: bool = True) -> None:
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._entries: OrderedDict[str, SlowQueryEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -- engine hooks --------------------------------------------------------------
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("slow_query_started")
+        if not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+        if self.threshold_ms < 0 or elapsed_ms < self.threshold_ms:
+            return
+        plan = None
+        if self.explain and not executemany and conn.dialect.name == "sqlite":
+            plan = self._explain_once(cursor, statement, parameters)
+        self.record(statement, elapsed_ms, parameters, caller_location(), plan)
+
+    def install(self, engine: Engine) -> None:
+        if not event.contains(engine, "before_cursor_execute", self._before):
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+
+    def _explain_once(self, cursor, statement: str, parameters: Any) -> list[str] | None:
+        head = statement.lstrip()[:6].upper()
+        if head not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+            return None
+        with self._lock:
+            entry = self._entries.get(fingerprint(statement_shape(statement)))
+            if entry is not None and entry.plan is not None:
+                return None
+        try:
+            rows = cursor.connection.execute(
+                "EXPLAIN QUERY PLAN " + statement, parameters or ()
+            ).fetchall()
+        except Exception:  # plans are best-effort
+            return None
+        return [row[-1] for row in rows]
+
+    # -- aggregation ---------------------------------------------------------------
+
+    def record(
+        self,
+        statement: str,
+        elapsed_ms: float,
+        parameters: Any = None,
+        caller: str | None = None,
+        plan: list[str] | None = None,
+    ) -> None:
+        shape = statement_shape(statement)
+        fp = fingerprint(shape)
+        params = redact(parameters)
+        stats = current_stats()
+        request = stats.request if stats is not None else None
+        with self._lock:
+            entry = self._entries.get(fp)
+            if entry is None:
+                entry = self._entries[fp] = SlowQueryEntry(fingerprint=fp, statement=shape)
+                while len(self._entries) > MAX_FINGERPRINTS:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(fp)
+            entry.count += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.samples.append(elapsed_ms)
+            entry.last_seen = datetime.now(timezone.utc)
+            entry.last_params = params
+            if caller:
+                entry.callers[caller] = entry.callers.get(caller, 0) + 1
+            if request:
+                entry.requests[request] = entry.requests.get(request, 0) + 1
+            if plan is not None:
+                entry.plan = plan
+        logger.warning(
+            "slow query %.1f ms [%s] at %s: %s | params=%s%s",
+            elapsed_ms,
+            fp,
+            caller or "?",
+            shape[:500],
+            params,
+            "".join(f"\n  plan: {step}" for step in plan) if plan else "",
+        )
+
+    def top(self, limit: int = 20, sort: str = "total_ms") -> list[dict[str, Any]]:
+        with self._lock:
+            items = [e.as_dict() for e in self._entries.values()]
+        return sorted(items, key=lambda e: e[sort], reverse=True)[:limit]
+
+    def get(self, fp: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(fp)
+            return entry.as_dict() if entry else None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def fingerprint(shape: str) -> str:
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,252 @@
+"""Who follows whom: paginated lists, counters, membership checks.
+
+Follower and following counts are denormalized into ``stats_rollups``
+(``followers:<id>`` / ``following:<id>`` totals), kept in step by the write queue and
+``delete_user``, so a profile never counts ``subscriptions`` rows. Lists are pages over
+the ``(user, subscribed_at, other user)`` covering indexes and take their total from
+those counters.
+
+"Does the viewer follow these users" is answered for just the users on screen (one
+primary-key ``IN`` query), never by loading the viewer's whole following set. Full
+adjacency sets are still needed by the following feed; those of heavy users (at least
+``SOCIAL_GRAPH_CACHE_MIN`` ids) are kept in an LRU cache of ``SOCIAL_GRAPH_CACHE_SIZE``
+entries, dropped by the write queue when a subscription of that user changes and
+expiring after ``SOCIAL_GRAPH_CACHE_TTL`` seconds (writes in other workers).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Iterable
+
+from cachetools import TTLCache
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from models.db_models import StatsRollup, Subscription, User
+
+SOCIAL_GRAPH_CACHE_SIZE = int(os.getenv("SOCIAL_GRAPH_CACHE_SIZE", "1024"))
+SOCIAL_GRAPH_CACHE_MIN = int(os.getenv("SOCIAL_GRAPH_CACHE_MIN", "200"))
+SOCIAL_GRAPH_CACHE_TTL = float(os.getenv("SOCIAL_GRAPH_CACHE_TTL", "300"))
+
+FOLLOWERS_METRIC = "followers:"
+FOLLOWING_METRIC = "following:"
+
+FOLLOWERS = "followers"
+FOLLOWING = "following"
+
+# direction -> (column holding the user, column holding the other side)
+_SIDES = {
+    FOLLOWERS: (Subscription.target_user_id, Subscription.subscriber_id),
+    FOLLOWING: (Subscription.subscriber_id, Subscription.target_user_id),
+}
+_IN_CHUNK = 500
+
+
+class AdjacencyCache:
+    """(direction, user id) -> frozenset of user ids, for heavy users only."""
+
+    def __init__(
+        self,
+        maxsize: int = SOCIAL_GRAPH_CACHE_SIZE,
+        ttl: float = SOCIAL_GRAPH_CACHE_TTL,
+        min_size: int = SOCIAL_GRAPH_CACHE_MIN,
+    ) -> None:
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        self._items: TTLCache[tuple[str, int], frozenset[int]] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, direction: str, user_id: int) -> frozenset[int] | None:
+        with self._lock:
+            ids: frozenset[int] | None = self._items.get((direction, user_id))
+            if ids is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return ids
+
+    def put(self, direction: str, user_id: int, ids: frozenset[int]) -> None:
+        if len(ids) < self.min_size:
+            return
+        with self._lock:
+            self._items[(direction, user_id)] = ids
+
+    def invalidate(self, subscriber_id: int, target_user_id: int) -> None:
+        """One subscription changed: drop both ends."""
+        with self._lock:
+            self._items.pop((FOLLOWING, subscriber_id), None)
+            self._items.pop((FOLLOWERS, target_user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+adjacency_cache = AdjacencyCache()
+
+
+# -- adjacency -------------------------------------------------------------------------
+
+
+def _adjacent(db: Session, direction: str, user_id: int) -> frozenset[int]:
+    ids = adjacency_cache.get(direction, user_id)
+    if ids is None:
+        own, other = _SIDES[direction]
+        ids = frozenset(r[0] for r in db.query(other).filter(own == user_id))
+        adjacency_cache.put(direction, user_id, ids)
+    return ids
+
+
+def following_ids(db: Session, user_id: int) -> frozenset[int]:
+    """Every user ``user_id`` follows."""
+    return _adjacent(db, FOLLOWING, user_id)
+
+
+def follower_ids(db: Session, user_id: int) -> frozenset[int]:
+    """Every user following ``user_id``."""
+    return _adjacent(db, FOLLOWERS, user_id)
+
+
+def following_among(db: Session, user_id: int, ids: Iterable[int]) -> set[int]:
+    """Those of ``ids`` that ``user_id`` follows (a primary-key lookup per id)."""
+    ids = set(ids)
+    if not ids:
+        return set()
+    cached = adjacency_cache.get(FOLLOWING, user_id)
+    if cached is not None:
+        return ids & cached
+    found: set[int] = set()
+    id_list = list(ids)
+    for i in range(0, len(id_list), _IN_CHUNK):
+        found.update(
+            r[0]
+            for r in db.query(Subscription.target_user_id).filter(
+                Subscription.subscriber_id == user_id,
+                Subscription.target_user_id.in_(id_list[i : i + _IN_CHUNK]),
+            )
+        )
+    return found
+
+
+# -- lists -----------------------------------------------------------------------------
+
+
+def _page(db: Session, direction: str, user_id: int, *, limit: int, offset: int) -> list[User]:
+    own, other = _SIDES[direction]
+    # Ordered by the covering index: newest subscriptions first, ties by user id
+    ids = [
+        r[0]
+        for r in db.query(other)
+        .filter(own == user_id)
+        .order_by(Subscription.subscribed_at.desc(), other.desc())
+        .offset(offset)
+        .limit(limit)
+    ]
+    if not ids:
+        return []
+    users = {u.id: u for u in db.query(User).filter(User.id.in_(ids))}
+    return [users[i] for i in ids if i in users]
+
+
+def list_followers(db: Session, user_id: int, *, limit: int = 20, offset: int = 0) -> list[User]:
+    return _page(db, FOLLOWERS, user_id, limit=limit, offset=offset)
+
+
+def list_following(db: Session, user_id: int, *, limit: int = 20, offset: int = 0) -> list[User]:
+    return _page(db, FOLLOWING, user_id, limit=limit, offset=offset)
+
+
+def graph_page(
+    db: Session, direction: str, user_id: int, *, page: int, per_page: int, viewer_id: int | None
+) -> dict[str, Any]:
+    """One API page of followers/following; ``followed`` is checked for just these users."""
+    users = _page(db, direction, user_id, limit=per_page, offset=(page - 1) * per_page)
+    followed = following_among(db, viewer_id, [u.id for u in users]) if viewer_id else set()
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total": counts(db, [user_id])[user_id][direction],
+        "items": [
+            {
+                "id": u.id,
+                "username": u.username,
+                "avatar_url": u.avatar_url,
+                "followed": u.id in followed,
+            }
+            for u in users
+        ],
+    }
+
+
+# -- counters --------------------------------------------------------------------------
+
+
+def count_deltas(changes: Iterable[tuple[int, int, int]]) -> dict[str, int]:
+    """(subscriber id, target id, +1/-1) per subscription change, as rollup deltas."""
+    deltas: dict[str, int] = {}
+    for subscriber_id, target_user_id, delta in changes:
+        for metric in (f"{FOLLOWING_METRIC}{subscriber_id}", f"{FOLLOWERS_METRIC}{target_user_id}"):
+            deltas[metric] = deltas.get(metric, 0) + delta
+    return deltas
+
+
+def counts(db: Session, user_ids: Iterable[int]) -> dict[int, dict[str, int]]:
+    """user id -> {"followers": n, "following": n}."""
+    out = {int(uid): {FOLLOWERS: 0, FOLLOWING: 0} for uid in user_ids}
+    if not out:
+        return out
+    metrics = [f"{prefix}{uid}" for uid in out for prefix in (FOLLOWERS_METRIC, FOLLOWING_METRIC)]
+    rows = db.query(StatsRollup.metric, StatsRollup.value).filter(
+        StatsRollup.metric.in_(metrics), StatsRollup.period == "total", StatsRollup.bucket == ""
+    )
+    for metric, value in rows:
+        direction, _, uid = metric.partition(":")
+        out[int(uid)][direction] = int(value)
+    return out
+
+
+def count_all(db: Session) -> dict[str, int]:
+    """Every counter straight from ``subscriptions`` (rollup backfill)."""
+    deltas: dict[str, int] = {}
+    for direction, prefix in ((FOLLOWERS, FOLLOWERS_METRIC), (FOLLOWING, FOLLOWING_METRIC)):
+        own, _ = _SIDES[direction]
+        for uid, n in db.query(own, func.count()).group_by(own):
+            deltas[f"{prefix}{uid}"] = int(n)
+    return deltas
+
+
+def user_removal_deltas(db: Session, user_id: int) -> dict[str, int]:
+    """Counter changes for the other ends of ``user_id``'s subscriptions (its own rows
+    are dropped by ``remove_user``).
+
+    Read from ``subscriptions``, not the adjacency cache: a cached set may miss changes
+    made by other workers, and the counters would drift.
+    """
+    rows = db.query(Subscription.subscriber_id, Subscription.target_user_id).filter(
+        or_(Subscription.subscriber_id == user_id, Subscription.target_user_id == user_id)
+    )
+    changes = [(subscriber_id, target_id, -1) for subscriber_id, target_id in rows]
+    deltas = count_deltas(changes)
+    deltas.pop(f"{FOLLOWERS_METRIC}{user_id}", None)
+    deltas.pop(f"{FOLLOWING_METRIC}{user_id}", None)
+    return deltas
+
+
+def remove_user(db: Session, user_id: int) -> None:
+    """Drop the user's subscriptions and counters (in the caller's transaction).
+
+    Explicit rather than left to ON DELETE CASCADE, which SQLite only applies with
+    ``PRAGMA foreign_keys=ON``.
+    """
+    db.query(Subscription).filter(
+        or_(Subscription.subscriber_id == user_id, Subscription.target_user_id == user_id)
+    ).delete(synchronize_session=False)
+    db.query(StatsRollup).filter(
+        StatsRollup.metric.in_([f"{FOLLOWERS_METRIC}{user_id}", f"{FOLLOWING_METRIC}{user_id}"])
+    ).delete(synchronize_session=False)
@@ -0,0 +1,181 @@
+"""Per-request SQL accounting.
+
+Engine ``before/after_cursor_execute`` hooks add every statement to the stats of the
+request being served (a ContextVar set by ``SQLMetricsMiddleware``; sync endpoints
+run in the threadpool with a copy of the context, so they see the same object). At
+the end of a request the query count and DB time are observed into Prometheus
+histograms labelled by route template, and a SELECT shape repeated at least
+``N_PLUS_ONE_THRESHOLD`` times is logged and counted as a suspected N+1.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("blog.sql")
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals and IN-list lengths folded, for grouping repeats."""
+    shape = _SPACE_RE.sub(" ", statement).strip()
+    shape = _IN_LIST_RE.sub("(?)", shape)
+    return _NUMBER_RE.sub("?", shape)
+
+
+@dataclass
+class RequestQueryStats:
+    request: str = ""  # "GET /path", for attributing statements in logs
+    queries: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+# HTTP requests seen by this process; background maintenance reads it as a load signal
+_requests_started = 0
+
+
+def requests_started() -> int:
+    return _requests_started
+
+
+def current_stats() -> RequestQueryStats | None:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("sql_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("sql_metrics_started")
+    if started:
+        stats.add(statement, time.perf_counter() - started.pop())
+
+
+def install(engine: Engine) -> None:
+    """Attach the hooks to ``engine`` (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@lru_cache(maxsize=1)
+def _prometheus() -> tuple[Any, Any, Any] | None:
+    # Registered once per process: the module survives app reloads, the registry is global
+    try:
+        from prometheus_client import Counter as PromCounter, Histogram
+    except Exception:  # pragma: no cover
+        return None
+    queries = Histogram(
+        "http_request_db_queries",
+        "SQL statements executed per HTTP request",
+        ["method", "route"],
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+    )
+    seconds = Histogram(
+        "http_request_db_seconds",
+        "Time spent in SQL statements per HTTP request",
+        ["method", "route"],
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+    n_plus_one = PromCounter(
+        "http_request_n_plus_one_total",
+        "Requests that repeated one SELECT shape at least N_PLUS_ONE_THRESHOLD times",
+        ["method", "route"],
+    )
+    return queries, seconds, n_plus_one
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class SQLMetricsMiddleware:
+    """Pure ASGI middleware: opens the per-request stats and reports them.
+
+    With ``server_timing`` the response carries ``Server-Timing: db;dur=..;desc="N queries"``
+    (only statements run before the headers are sent are included).
+    """
+
+    def __init__(
+        self, app: ASGIApp, *, prometheus: bool = True, server_timing: bool = False
+    ) -> None:
+        self.app = app
+        self.prometheus = prometheus
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _requests_started
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        _requests_started += 1
+        stats = RequestQueryStats(request=f"{scope.get('method', '')} {scope.get('path', '')}")
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if self.server_timing and message["type"] == "http.response.start":
+                value = (
+                    f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries", '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.2f}"
+                )
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"server-timing", value.encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: RequestQueryStats) -> None:
+        method, route = scope.get("method", ""), _route_label(scope)
+        repeated = stats.repeated()
+        for shape, n in repeated:
+            logger.warning("possible N+1 in %s %s: %d x %s", method, route, n, shape[:300])
+        metrics = _prometheus() if self.prometheus else None
+        if metrics is None:
+            return
+        queries, seconds, n_plus_one = metrics
+        queries.labels(method, route).observe(stats.queries)
+        seconds.labels(method, route).observe(stats.db_seconds)
+        if repeated:
+            n_plus_one.labels(method, route).inc()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+logger = logging.getLogger("blog.startup")
+
+
+class StartupReport:
+    """Wall-clock timings (ms) of process start phases: imports, init_db steps, ..."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.notes: dict[str, Any] = {}
+
+    def record(self, name: str, started: float) -> None:
+        self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def note(self, key: str, value: Any) -> None:
+        self.notes[key] = value
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phases_ms": dict(self.phases),
+            "total_ms": round(sum(self.phases.values()), 2),
+            **self.notes,
+        }
+
+    def log(self) -> None:
+        parts = ", ".join(f"{k}={v}ms" for k, v in self.phases.items())
+        logger.info("startup: %s (total %.2fms)", parts, sum(self.phases.values()))
+
+
+startup_report = StartupReport()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import String, cast, func, insert
+from sqlalchemy.orm import Session
+
+from database.upsert import upsert_add
+from models.db_models import Comment, Post, PostViewDay, PostViewHour, Reaction, StatsRollup, User
+from services import category_service, social_graph
+
+# Metrics with a time series; deletions only touch the 'total' row
+SERIES_METRICS = ("users", "posts", "posts_published", "comments", "reactions", "views")
+POST_STATUSES = ("draft", "published", "archived")
+
+
+def _upsert(db: Session, rows: list[dict[str, Any]]) -> None:
+    upsert_add(db, StatsRollup, rows, key=["metric", "period", "bucket"], add=["value"])
+
+
+def record(
+    db: Session,
+    deltas: dict[str, int],
+    *,
+    series: bool = True,
+    when: datetime | None = None,
+) -> None:
+    """Add deltas to the rollups in the caller's transaction (the caller commits).
+
+    series=True also bumps the day/month buckets of ``when`` (default: now, UTC).
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    when = when or datetime.now(timezone.utc)
+    day, month = when.strftime("%Y-%m-%d"), when.strftime("%Y-%m")
+    rows = []
+    for metric, delta in deltas.items():
+        rows.append({"metric": metric, "period": "total", "bucket": "", "value": delta})
+        if series:
+            rows.append({"metric": metric, "period": "day", "bucket": day, "value": delta})
+            rows.append({"metric": metric, "period": "month", "bucket": month, "value": delta})
+    _upsert(db, rows)
+
+
+def totals(db: Session) -> dict[str, int]:
+    rows = (
+        db.query(StatsRollup.metric, StatsRollup.value)
+        .filter(StatsRollup.period == "total", StatsRollup.bucket == "")
+        .all()
+    )
+    return {m: int(v) for m, v in rows}
+
+
+def series(
+    db: Session, metric: str, *, period: str = "day", points: int = 30
+) -> list[dict[str, Any]]:
+    """Last ``points`` buckets of a metric, oldest first, zero-filled."""
+    today = datetime.now(timezone.utc).date()
+    if period == "day":
+        buckets = [(today - timedelta(days=i)).isoformat() for i in range(points - 1, -1, -1)]
+    elif period == "month":
+        y, m = today.year, today.month
+        months = []
+        for _ in range(points):
+            months.append(f"{y:04d}-{m:02d}")
+            y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+        buckets = list(reversed(months))
+    else:
+        raise ValueError("period must be 'day' or 'month'")
+
+    rows = (
+        db.query(StatsRollup.bucket, StatsRollup.value)
+        .filter(
+            StatsRollup.metric == metric,
+            StatsRollup.period == period,
+            StatsRollup.bucket >= buckets[0],
+        )
+        .all()
+    )
+    values = {b: int(v) for b, v in rows}
+    return [{"bucket": b, "value": values.get(b, 0)} for b in buckets]
+
+
+def _day(col):
+    # 'YYYY-MM-DD ...' prefix works for SQLite text timestamps and PostgreSQL casts alike
+    return func.substr(cast(col, String), 1, 10)
+
+
+def backfill(db: Session) -> dict[str, int]:
+    """Recompute every rollup from the base tables (one GROUP BY per table)."""
+    db.query(StatsRollup).delete()
+
+    by_day: dict[tuple[str, str], int] = {}
+
+    def add_days(metric: str, col, *filters) -> None:
+        q = db.query(_day(col), func.count()).filter(*filters).group_by(_day(col))
+        for day, cnt in q.all():
+            if day:
+                by_day[(metric, day)] = by_day.get((metric, day), 0) + int(cnt)
+
+    add_days("users", User.created_at)
+    add_days("posts", Post.created_at)
+    add_days(
+        "posts_published",
+        func.coalesce(Post.published_at, Post.created_at),
+        Post.status == "published",
+    )
+    add_days("comments", Comment.created_at)
+    add_days("reactions", Reaction.reacted_at)
+    # Views from the per-post history (hours since the epoch, whole days once downsampled);
+    # views from before that history existed only count towards the total
+    hour_day = PostViewHour.hour // 24
+    for day, cnt in [
+        *db.query(hour_day, func.sum(PostViewHour.views)).group_by(hour_day),
+        *db.query(PostViewDay.day, func.sum(PostViewDay.views)).group_by(PostViewDay.day),
+    ]:
+        key = ("views", datetime.fromtimestamp(int(day) * 86400, timezone.utc).strftime("%Y-%m-%d"))
+        by_day[key] = by_day.get(key, 0) + int(cnt)
+
+    rows: list[dict[str, Any]] = []
+    by_month: dict[tuple[str, str], int] = {}
+    for (metric, day), cnt in by_day.items():
+        rows.append({"metric": metric, "period": "day", "bucket": day, "value": cnt})
+        by_month[(metric, day[:7])] = by_month.get((metric, day[:7]), 0) + cnt
+    for (metric, month), cnt in by_month.items():
+        rows.append({"metric": metric, "period": "month", "bucket": month, "value": cnt})
+
+    current = {
+        "users": db.query(func.count(User.id)).scalar() or 0,
+        "posts": db.query(func.count(Post.id)).scalar() or 0,
+        "comments": db.query(func.count(Comment.id)).scalar() or 0,
+        "reactions": db.query(func.count()).select_from(Reaction).scalar() or 0,
+        "views": db.query(func.coalesce(func.sum(Post.view_count), 0)).scalar() or 0,
+    }
+    for status in POST_STATUSES:
+        current[f"posts_{status}"] = 0
+    for status, cnt in db.query(Post.status, func.count(Post.id)).group_by(Post.status).all():
+        current[f"posts_{status}"] = int(cnt)
+    for metric, value in current.items():
+        rows.append({"metric": metric, "period": "total", "bucket": "", "value": int(value)})
+    for metric, value in category_service.count_deltas(
+        category_service.count_published(db)
+    ).items():
+        rows.append({"metric": metric, "period": "total", "bucket": "", "value": value})
+    for metric, value in social_graph.count_all(db).items():
+        rows.append({"metric": metric, "period": "total", "bucket": "", "value": value})
+    from services import notification_service  # imports this module
+
+    for metric, value in notification_service.count_unread(db).items():
+        rows.append({"metric": metric, "period": "total", "bucket": "", "value": value})
+
+    if rows:
+        db.execute(insert(StatsRollup), rows)
+    db.commit()
+    return {k: int(v) for k, v in current.items()}
+
+
+def backfill_if_empty(db: Session) -> None:
+    if db.query(StatsRollup.metric).first() is None:
+        backfill(db)
+
+
+if __name__ == "__main__":
+    # python -m services.stats_service backfill
+    import sys
+
+    from database.session import SessionLocal
+
+    if sys.argv[1:] != ["backfill"]:
+        print("usage: python -m services.stats_service backfill")
+        sys.exit(2)
+    session = SessionLocal()
+    try:
+        print(backfill(session))
+    finally:
+        session.close()
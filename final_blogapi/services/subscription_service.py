@@ -10,16 +10,3 @@ def is_subscribed(db: Session, *, subscriber_id: int, target_user_id: int) -> bo
         db.get(Subscription, {"subscriber_id": subscriber_id, "target_user_id": target_user_id})
         is not None
     )
-
-
-def toggle_subscription(db: Session, *, subscriber_id: int, target_user_id: int) -> bool:
-    existing = db.get(
-        Subscription, {"subscriber_id": subscriber_id, "target_user_id": target_user_id}
-    )
-    if existing:
-        db.delete(existing)
-        db.commit()
-        return False
-    db.add(Subscription(subscriber_id=subscriber_id, target_user_id=target_user_id))
-    db.commit()
-    return True
@@ -0,0 +1,90 @@
+"""Search-box autocomplete: post titles, categories (tags) and authors by prefix.
+
+Each kind has its own FTS5 label table with 2- and 3-character prefix indexes
+(``SUGGEST_SOURCES`` in ``database/init_db.py``), kept in step by triggers on posts,
+categories and users. Every word typed must start a word of the label
+(``"пут сов"`` matches "Советы путешественнику"); the newest rows come first, so a
+lookup reads only as many index entries as it returns.
+
+Answers are cached per normalized prefix for ``SUGGEST_CACHE_TTL`` seconds and dropped
+when this process writes a post, category or user. Other databases fall back to a
+``LIKE 'prefix%'`` on the label column.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models.db_models import Category, Post, User
+from services.category_service import category_registry
+from services.search_cache import suggest_cache
+
+SUGGEST_LIMIT = int(os.getenv("SUGGEST_LIMIT", "5"))
+SUGGEST_MIN_PREFIX = int(os.getenv("SUGGEST_MIN_PREFIX", "2"))
+
+_WORD_RE = re.compile(r"\w+")
+
+# response key -> (FTS table, label column for the non-SQLite fallback, extra filter)
+KINDS = {
+    "titles": ("suggest_titles", Post.title, Post.status == "published"),
+    "tags": ("suggest_tags", Category.name, None),
+    "authors": ("suggest_authors", User.username, User.is_active.is_(True)),
+}
+
+
+def normalize(q: str) -> list[str]:
+    """Lower-cased words of ``q`` (punctuation dropped)."""
+    return _WORD_RE.findall(q.lower())
+
+
+def _match_expr(words: list[str]) -> str:
+    # Quoted, so user input is never parsed as FTS5 syntax
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _lookup(db: Session, kind: str, words: list[str], limit: int) -> list[tuple[int, str]]:
+    table, column, extra = KINDS[kind]
+    if db.get_bind().dialect.name == "sqlite":
+        rows = db.execute(
+            text(
+                f"SELECT rowid, label FROM {table} WHERE {table} MATCH :q "
+                "ORDER BY rowid DESC LIMIT :n"
+            ),
+            {"q": _match_expr(words), "n": limit},
+        )
+        return [(int(r[0]), r[1]) for r in rows]
+    entity = column.class_
+    q = db.query(entity.id, column).filter(column.ilike(f"{' '.join(words)}%"))
+    if extra is not None:
+        q = q.filter(extra)
+    return [(int(i), label) for i, label in q.order_by(entity.id.desc()).limit(limit)]
+
+
+def suggest(db: Session, q: str, limit: int = SUGGEST_LIMIT) -> dict[str, list[dict[str, Any]]]:
+    """Up to ``limit`` titles, tags and authors starting with the words of ``q``."""
+    words = normalize(q)
+    if not words or len("".join(words)) < SUGGEST_MIN_PREFIX:
+        return {kind: [] for kind in KINDS}
+    key = f"{' '.join(words)}|{limit}"
+    cached: dict[str, list[dict[str, Any]]] | None = suggest_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = {kind: _lookup(db, kind, words, limit) for kind in KINDS}
+    tags = []
+    for category_id, name in result["tags"]:
+        info = category_registry.get(db, category_id)
+        if info is not None:
+            tags.append({"id": category_id, "name": name, "slug": info.slug})
+    out = {
+        "titles": [{"id": i, "title": label} for i, label in result["titles"]],
+        "tags": tags,
+        "authors": [{"id": i, "username": label} for i, label in result["authors"]],
+    }
+    suggest_cache[key] = out
+    return out
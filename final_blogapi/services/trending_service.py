@@ -0,0 +1,163 @@
+"""Hot-score ranking for ``feed=trending``.
+
+Scores use forward decay: an event of weight ``w`` at time ``t`` adds
+``w * 2 ** ((t - EPOCH) / HALF_LIFE)`` to a post's sum, and the stored key is the
+log2 of that sum. Every post decays by the same factor as time passes, so the
+ordering of stored keys is always the ordering of decayed-to-now scores: nothing has
+to be rewritten for decay, and the trending page is an index scan on ``score``.
+A removal (unlike, unfavorite) subtracts the weight at the time of the event it undoes,
+which cancels that event exactly. A periodic ``recompute`` rebuilds keys from recent
+activity to correct drift from concurrent updates and float rounding.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy.orm import Query, Session
+
+from models.db_models import Comment, Favorite, Post, PostHotScore, PostViewHour, Reaction
+from services.periodic import PeriodicTask
+
+HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "12"))
+RECOMPUTE_INTERVAL = float(os.getenv("TRENDING_RECOMPUTE_INTERVAL", "900"))
+# Contributions older than this are < 2**-10 of a fresh one and are ignored by recompute
+LOOKBACK_HOURS = HALF_LIFE_HOURS * 10
+
+WEIGHTS = {
+    "publish": 3.0,
+    "like": 1.0,
+    "dislike": -0.5,
+    "favorite": 2.0,
+    "comment": 3.0,
+    "view": 0.1,
+}
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+FLOOR = -1e9  # "no engagement"
+
+
+def _exponent(when: datetime) -> float:
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return (when - EPOCH).total_seconds() / 3600.0 / HALF_LIFE_HOURS
+
+
+def _log_add(key: float, weight: float, when: datetime) -> float:
+    """log2(2**key + weight * 2**exponent(when)), clamped at FLOOR."""
+    if weight == 0:
+        return key
+    term = math.log2(abs(weight)) + _exponent(when)
+    if weight > 0:
+        hi, lo = max(key, term), min(key, term)
+        return hi + math.log2(1.0 + 2.0 ** (lo - hi))
+    if term >= key:
+        return FLOOR
+    return key + math.log2(1.0 - 2.0 ** (term - key))
+
+
+def current_score(key: float, now: datetime | None = None) -> float:
+    """Decayed engagement as of ``now`` (for display; ordering only needs ``key``)."""
+    if key <= FLOOR:
+        return 0.0
+    return float(2.0 ** (key - _exponent(now or datetime.now(timezone.utc))))
+
+
+def bump_many(db: Session, events: Iterable[tuple[int, float, datetime | None]]) -> None:
+    """Apply (post_id, weight, when) events in the caller's transaction (caller commits).
+
+    ``when`` defaults to now. A negative weight undoing an earlier event must carry that
+    event's time: subtracted at now it would remove more than the event still adds.
+    """
+    now = datetime.now(timezone.utc)
+    rows: dict[int, PostHotScore] = {}  # pending rows are not visible to db.get without autoflush
+    for post_id, weight, when in events:
+        row = rows.get(post_id) or db.get(PostHotScore, post_id)
+        if row is None:
+            row = PostHotScore(post_id=post_id, score=FLOOR)
+            db.add(row)
+        rows[post_id] = row
+        row.score = _log_add(row.score, weight, when or now)
+
+
+def bump(
+    db: Session, post_id: int, event: str, *, sign: int = 1, when: datetime | None = None
+) -> None:
+    if sign < 0 and when is None:
+        raise ValueError("undoing an event needs the time it happened")
+    bump_many(db, [(post_id, sign * WEIGHTS[event], when)])
+
+
+def remove_posts(db: Session, post_ids: Iterable[int] | Query) -> None:
+    """Drop the keys of deleted posts (caller commits); SQLite reuses their ids for new posts.
+    Explicit: SQLite applies ON DELETE CASCADE only with foreign_keys on."""
+    db.query(PostHotScore).filter(PostHotScore.post_id.in_(post_ids)).delete(
+        synchronize_session=False
+    )
+
+
+def recompute(db: Session, lookback_hours: float = LOOKBACK_HOURS) -> int:
+    """Rebuild keys of every post with activity in the lookback window."""
+    since = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
+    keys: dict[int, float] = defaultdict(lambda: FLOOR)
+
+    def add(post_id: int, weight: float, when: datetime | None) -> None:
+        if when is not None:
+            keys[post_id] = _log_add(keys[post_id], weight, when)
+
+    for post_id, when in db.query(Post.id, Post.published_at).filter(
+        Post.status == "published", Post.published_at >= since
+    ):
+        add(post_id, WEIGHTS["publish"], when)
+    for post_id, kind, when in db.query(
+        Reaction.post_id, Reaction.reaction_type, Reaction.reacted_at
+    ).filter(Reaction.reacted_at >= since):
+        add(post_id, WEIGHTS[kind], when)
+    for post_id, when in db.query(Favorite.post_id, Favorite.saved_at).filter(
+        Favorite.saved_at >= since
+    ):
+        add(post_id, WEIGHTS["favorite"], when)
+    for post_id, when in db.query(Comment.post_id, Comment.created_at).filter(
+        Comment.created_at >= since, Comment.is_approved == True  # noqa: E712
+    ):
+        add(post_id, WEIGHTS["comment"], when)
+    since_hour = int(since.timestamp()) // 3600
+    for post_id, hour, views in db.query(
+        PostViewHour.post_id, PostViewHour.hour, PostViewHour.views
+    ).filter(PostViewHour.hour >= since_hour):
+        add(
+            post_id,
+            views * WEIGHTS["view"],
+            datetime.fromtimestamp(hour * 3600 + 1800, timezone.utc),
+        )
+
+    existing = (
+        {r.post_id: r for r in db.query(PostHotScore).filter(PostHotScore.post_id.in_(list(keys)))}
+        if keys
+        else {}
+    )
+    for post_id, key in keys.items():
+        row = existing.get(post_id)
+        if row is None:
+            db.add(PostHotScore(post_id=post_id, score=key))
+        else:
+            row.score = key
+    db.commit()
+    return len(keys)
+
+
+def _recompute_job() -> None:
+    from database.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        recompute(db)
+    finally:
+        db.close()
+
+
+recompute_task = PeriodicTask("trending-recompute", RECOMPUTE_INTERVAL, _recompute_job)
@@ -2,11 +2,21 @@ from __future__ import annotations
 
 from typing import Optional
 
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
-from models.db_models import User
-from services.search_cache import users_search_cache
+from models.db_models import Comment, Favorite, Post, PostCategory, Reaction, User
+from services import (
+    category_service,
+    notification_service,
+    related_service,
+    social_graph,
+    stats_service,
+    trending_service,
+    view_analytics,
+)
+from services.facet_index import facet_index
+from services.search_cache import suggest_cache, users_search_cache
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -20,12 +30,69 @@ def get_user_by_username(db: Session, username: str) -> Optional[User]:
 def create_user(db: Session, *, email: str, username: str, password_hash: str) -> User:
     user = User(email=email, username=username, password_hash=password_hash, role="user", is_active=True)
     db.add(user)
+    stats_service.record(db, {"users": 1})
     db.commit()
     db.refresh(user)
     users_search_cache.clear()
+    suggest_cache.clear()
     return user
 
 
+def delete_user(db: Session, user: User) -> None:
+    # Posts and comments go with the ORM cascade, the rest is deleted explicitly below
+    # (SQLite applies ON DELETE CASCADE only with foreign_keys on); keep the totals in step
+    deltas: dict[str, int] = {"users": -1}
+    own_posts = db.query(Post.id).filter(Post.author_id == user.id)
+    for status, cnt in (
+        db.query(Post.status, func.count(Post.id))
+        .filter(Post.author_id == user.id)
+        .group_by(Post.status)
+    ):
+        deltas["posts"] = deltas.get("posts", 0) - int(cnt)
+        deltas[f"posts_{status}"] = -int(cnt)
+    deltas["comments"] = -(
+        db.query(func.count(Comment.id))
+        .filter(or_(Comment.author_id == user.id, Comment.post_id.in_(own_posts)))
+        .scalar()
+        or 0
+    )
+    deltas["reactions"] = -(
+        db.query(func.count())
+        .select_from(Reaction)
+        .filter(or_(Reaction.user_id == user.id, Reaction.post_id.in_(own_posts)))
+        .scalar()
+        or 0
+    )
+    published_cats = (
+        db.query(PostCategory.category_id, func.count())
+        .join(Post, Post.id == PostCategory.post_id)
+        .filter(Post.author_id == user.id, Post.status == "published")
+        .group_by(PostCategory.category_id)
+    )
+    deltas.update(category_service.count_deltas({cid: -int(n) for cid, n in published_cats}))
+    deltas.update(social_graph.user_removal_deltas(db, user.id))
+    stats_service.record(db, deltas, series=False)
+    for model in (Reaction, Favorite):
+        db.query(model).filter(or_(model.user_id == user.id, model.post_id.in_(own_posts))).delete(
+            synchronize_session=False
+        )
+    social_graph.remove_user(db, user.id)
+    notification_service.remove_user(db, user.id)
+    related_service.remove_posts(db, own_posts)
+    trending_service.remove_posts(db, own_posts)
+    view_analytics.remove_posts(db, own_posts)
+    user_id = user.id
+    post_ids = [pid for (pid,) in own_posts]
+    db.delete(user)
+    db.commit()
+    users_search_cache.clear()
+    suggest_cache.clear()
+    social_graph.adjacency_cache.clear()
+    related_service.related_model.clear()
+    facet_index.remove_author(user_id)
+    view_analytics.view_aggregator.discard(post_ids)
+
+
 def update_user(
     db: Session,
     *,
@@ -46,6 +113,7 @@ def update_user(
     db.commit()
     db.refresh(user)
     users_search_cache.clear()
+    suggest_cache.clear()
     return user
 
 
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from database.upsert import upsert_add
+from models.db_models import Post, PostViewDay, PostViewHour
+from services import trending_service
+from services.periodic import PeriodicTask
+
+FLUSH_INTERVAL = float(os.getenv("VIEWS_FLUSH_INTERVAL", "5"))
+# Hourly buckets older than this are folded into daily ones
+HOURLY_RETENTION_DAYS = int(os.getenv("VIEWS_HOURLY_RETENTION_DAYS", "7"))
+DOWNSAMPLE_EVERY = 3600.0
+
+
+def hour_of(when: datetime) -> int:
+    return int(when.timestamp()) // 3600
+
+
+def _as_utc(when: datetime) -> datetime:
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+class ViewAggregator:
+    """Counts views in memory per (post, hour) and writes them out in batches."""
+
+    def __init__(self) -> None:
+        self._pending: Counter[tuple[int, int]] = Counter()
+        self._lock = threading.Lock()
+        self._last_downsample = 0.0
+        self._flusher = PeriodicTask("views-flush", FLUSH_INTERVAL, self._tick)
+
+    def record(self, post_id: int, when: datetime | None = None) -> None:
+        hour = hour_of(when or datetime.now(timezone.utc))
+        with self._lock:
+            self._pending[(post_id, hour)] += 1
+
+    def discard(self, post_ids: Iterable[int]) -> None:
+        """Forget unflushed views of deleted posts (a later post may reuse the id)."""
+        gone = set(post_ids)
+        with self._lock:
+            for bucket in [b for b in self._pending if b[0] in gone]:
+                del self._pending[bucket]
+
+    def pending(self) -> dict[tuple[int, int], int]:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        """Write pending buckets in one transaction; returns the number of views written."""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+
+        from database.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            rows = [{"post_id": p, "hour": h, "views": n} for (p, h), n in batch.items()]
+            upsert_add(db, PostViewHour, rows, key=["post_id", "hour"], add=["views"])
+            trending_service.bump_many(
+                db,
+                (
+                    (
+                        p,
+                        n * trending_service.WEIGHTS["view"],
+                        datetime.fromtimestamp(h * 3600 + 1800, timezone.utc),
+                    )
+                    for (p, h), n in batch.items()
+                ),
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the views back so the next flush retries them
+            with self._lock:
+                self._pending.update(batch)
+            raise
+        finally:
+            db.close()
+        return sum(batch.values())
+
+    def _maybe_downsample(self) -> None:
+        now = time.monotonic()
+        if now - self._last_downsample < DOWNSAMPLE_EVERY:
+            return
+        self._last_downsample = now
+        from database.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            downsample(db)
+        finally:
+            db.close()
+
+    def _tick(self) -> None:
+        self.flush()
+        self._maybe_downsample()
+
+    def start(self) -> None:
+        self._flusher.start()
+
+    async def stop(self) -> None:
+        await self._flusher.stop()
+        self.flush()
+
+
+view_aggregator = ViewAggregator()
+
+
+def downsample(db: Session, retention_days: int = HOURLY_RETENTION_DAYS) -> int:
+    """Fold hourly buckets older than the retention window into daily buckets."""
+    cutoff = hour_of(datetime.now(timezone.utc) - timedelta(days=retention_days))
+    # Only whole days move, so a day never has both hourly and daily rows
+    cutoff -= cutoff % 24
+    day = PostViewHour.hour // 24
+    old = (
+        db.query(PostViewHour.post_id, day, func.sum(PostViewHour.views))
+        .filter(PostViewHour.hour < cutoff)
+        .group_by(PostViewHour.post_id, day)
+        .all()
+    )
+    rows = [{"post_id": p, "day": int(d), "views": int(n)} for p, d, n in old]
+    upsert_add(db, PostViewDay, rows, key=["post_id", "day"], add=["views"])
+    db.query(PostViewHour).filter(PostViewHour.hour < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return len(rows)
+
+
+def remove_posts(db: Session, post_ids: Iterable[int] | Query) -> None:
+    """Drop the view history of deleted posts (caller commits, then ``discard``s pending views).
+    Explicit: SQLite applies ON DELETE CASCADE only with foreign_keys on."""
+    for model in (PostViewHour, PostViewDay):
+        db.query(model).filter(model.post_id.in_(post_ids)).delete(synchronize_session=False)
+
+
+def _window(start: datetime | None, end: datetime | None) -> tuple[int, int]:
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(days=7)
+    return hour_of(start), hour_of(end) + 1
+
+
+def post_series(
+    db: Session,
+    post_id: int,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    granularity: str = "hour",
+) -> list[dict[str, Any]]:
+    """Views of one post in [start, end], bucketed by hour or day (pending views included).
+
+    Hours older than the retention window only exist as daily totals: with
+    ``granularity="hour"`` they come back as one point per day marked ``"downsampled"``.
+    """
+    h0, h1 = _window(start, end)
+    buckets: Counter[int] = Counter()
+    for hour, views in (
+        db.query(PostViewHour.hour, PostViewHour.views)
+        .filter(PostViewHour.post_id == post_id, PostViewHour.hour >= h0, PostViewHour.hour < h1)
+        .all()
+    ):
+        buckets[hour] += views
+    for (p, hour), views in view_aggregator.pending().items():
+        if p == post_id and h0 <= hour < h1:
+            buckets[hour] += views
+    days: Counter[int] = Counter()
+    for day, views in (
+        db.query(PostViewDay.day, PostViewDay.views)
+        .filter(
+            PostViewDay.post_id == post_id,
+            PostViewDay.day >= h0 // 24,
+            PostViewDay.day < -(-h1 // 24),
+        )
+        .all()
+    ):
+        days[day] += views
+
+    if granularity == "day":
+        for hour, views in buckets.items():
+            days[hour // 24] += views
+        return [
+            {"start": datetime.fromtimestamp(d * 86400, timezone.utc), "views": n}
+            for d, n in sorted(days.items())
+        ]
+    # Downsampling moves whole days, so a day never has both kinds of point
+    points = [
+        {"start": datetime.fromtimestamp(h * 3600, timezone.utc), "views": n}
+        for h, n in buckets.items()
+    ]
+    points += [
+        {"start": datetime.fromtimestamp(d * 86400, timezone.utc), "views": n, "downsampled": True}
+        for d, n in days.items()
+    ]
+    return sorted(points, key=lambda p: p["start"])
+
+
+def top_posts(
+    db: Session,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 10,
+) -> list[dict[str, Any]]:
+    """Most viewed posts in a window (recent hours exact, older data at day precision)."""
+    h0, h1 = _window(start, end)
+    totals: Counter[int] = Counter()
+    for post_id, views in (
+        db.query(PostViewHour.post_id, func.sum(PostViewHour.views))
+        .filter(PostViewHour.hour >= h0, PostViewHour.hour < h1)
+        .group_by(PostViewHour.post_id)
+        .all()
+    ):
+        totals[post_id] += int(views)
+    for post_id, views in (
+        db.query(PostViewDay.post_id, func.sum(PostViewDay.views))
+        .filter(PostViewDay.day >= h0 // 24, PostViewDay.day < -(-h1 // 24))
+        .group_by(PostViewDay.post_id)
+        .all()
+    ):
+        totals[post_id] += int(views)
+    for (post_id, hour), views in view_aggregator.pending().items():
+        if h0 <= hour < h1:
+            totals[post_id] += views
+
+    top = totals.most_common(limit)
+    titles: dict[int, str] = (
+        {p: t for p, t in db.query(Post.id, Post.title).filter(Post.id.in_([p for p, _ in top]))}
+        if top
+        else {}
+    )
+    return [{"post_id": p, "title": titles.get(p), "views": n} for p, n in top if p in titles]
@@ -0,0 +1,292 @@
+"""Group commit for reactions, favorites and follows.
+
+Each of these writes touches one row, and committing them one by one makes every
+like a separate SQLite write transaction fighting for the database lock. Here they
+are queued instead: a flusher thread wakes on the first pending write, waits
+``WRITE_QUEUE_WINDOW_MS`` for more to arrive, and applies the whole batch in one
+transaction. Writes to the same (user, target) key are folded in order against the
+stored state, so only the last intent is written while every caller still gets the
+result of its own operation (a toggle returns the state right after it). Callers
+await a future that resolves after the commit, which keeps read-your-writes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models.db_models import Favorite, Post, Reaction, Subscription, User
+from services import social_graph, stats_service, trending_service
+
+logger = logging.getLogger("blog.write_queue")
+
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE_ENABLED", "1") == "1"
+WINDOW = float(os.getenv("WRITE_QUEUE_WINDOW_MS", "5")) / 1000
+MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "2000"))
+
+TOGGLE = "toggle"
+_KEY_CHUNK = 400  # two bound parameters per key; SQLite allows 999 per statement
+
+
+class TargetNotFound(LookupError):
+    """The post or user a write refers to does not exist."""
+
+
+# kind -> (model, key columns, target model/column checked for existence)
+KINDS: dict[str, tuple[Any, tuple[str, str], Any]] = {
+    "reaction": (Reaction, ("user_id", "post_id"), Post),
+    "favorite": (Favorite, ("user_id", "post_id"), Post),
+    "subscription": (Subscription, ("subscriber_id", "target_user_id"), User),
+}
+
+Op = tuple[Any, Future]
+Batch = dict[tuple[str, tuple[int, int]], list[Op]]
+
+
+def _apply(op: Any, state: Any) -> Any:
+    """New state after one op: TOGGLE flips presence, anything else is set as is."""
+    if op == TOGGLE:
+        return not state
+    return op
+
+
+def _load_rows(db: Session, kind: str, keys: list[tuple[int, int]]) -> dict[tuple[int, int], Any]:
+    """Stored rows of ``keys``; keys without a row are absent."""
+    model, (left, right), _ = KINDS[kind]
+    cols = (getattr(model, left), getattr(model, right))
+    rows: dict[tuple[int, int], Any] = {}
+    for i in range(0, len(keys), _KEY_CHUNK):
+        for row in db.query(model).filter(tuple_(*cols).in_(keys[i : i + _KEY_CHUNK])):
+            rows[(getattr(row, left), getattr(row, right))] = row
+    return rows
+
+
+def _state(kind: str, row: Any) -> Any:
+    if row is None:
+        return None if kind == "reaction" else False
+    return row.reaction_type if kind == "reaction" else True
+
+
+def _existing_targets(db: Session, kind: str, ids: set[int]) -> set[int]:
+    target = KINDS[kind][2]
+    found: set[int] = set()
+    id_list = list(ids)
+    for i in range(0, len(id_list), _KEY_CHUNK * 2):
+        found.update(
+            r[0] for r in db.query(target.id).filter(target.id.in_(id_list[i : i + _KEY_CHUNK * 2]))
+        )
+    return found
+
+
+def apply_batch(db: Session, batch: Batch) -> list[tuple[Future, Any]]:
+    """Fold ``batch`` into the caller's transaction; returns per-op results (caller commits)."""
+    by_kind: dict[str, list[tuple[int, int]]] = {}
+    for kind, key in batch:
+        by_kind.setdefault(kind, []).append(key)
+
+    results: list[tuple[Future, Any]] = []
+    stats_delta = 0
+    now = datetime.now(timezone.utc)
+    # Removals carry the time of the event they undo (see trending_service.bump_many)
+    trending: list[tuple[int, float, datetime]] = []
+    graph: list[tuple[int, int, int]] = []
+    for kind, keys in by_kind.items():
+        model, (left, right), _ = KINDS[kind]
+        rows = _load_rows(db, kind, keys)
+        # Only writes that can create a row need the target to exist (removals are no-ops)
+        creating = {
+            k[1]
+            for k in keys
+            if any(op is not None and op is not False for op, _ in batch[(kind, k)])
+        }
+        targets = _existing_targets(db, kind, creating) if creating else set()
+        for key in keys:
+            ops = batch[(kind, key)]
+            row: Any = rows.get(key)
+            before = _state(kind, row)
+            state = before
+            for op, fut in ops:
+                new = _apply(op, state)
+                if new and not before and key[1] not in targets:
+                    results.append((fut, TargetNotFound(f"{kind} target {key[1]} not found")))
+                    continue
+                state = new
+                results.append((fut, state))
+            if state == before:
+                continue
+            ident = {left: key[0], right: key[1]}
+            if kind == "reaction":
+                if row is None:
+                    db.add(Reaction(**ident, reaction_type=state, reacted_at=now))
+                    stats_delta += 1
+                    trending.append((key[1], trending_service.WEIGHTS[state], now))
+                elif state is None:
+                    db.delete(row)
+                    stats_delta -= 1
+                    trending.append((key[1], -trending_service.WEIGHTS[before], row.reacted_at))
+                else:
+                    # A switch keeps reacted_at, as recompute will: re-weigh the event in place
+                    row.reaction_type = state
+                    trending.append((key[1], -trending_service.WEIGHTS[before], row.reacted_at))
+                    trending.append((key[1], trending_service.WEIGHTS[state], row.reacted_at))
+            elif state:
+                if kind == "favorite":
+                    db.add(Favorite(**ident, saved_at=now))
+                    trending.append((key[1], trending_service.WEIGHTS["favorite"], now))
+                else:
+                    db.add(model(**ident))
+                    graph.append((key[0], key[1], 1))
+            else:
+                db.delete(row)
+                if kind == "favorite":
+                    trending.append((key[1], -trending_service.WEIGHTS["favorite"], row.saved_at))
+                else:
+                    graph.append((key[0], key[1], -1))
+
+    if stats_delta > 0:
+        stats_service.record(db, {"reactions": stats_delta})
+    elif stats_delta < 0:
+        stats_service.record(db, {"reactions": stats_delta}, series=False)
+    if trending:
+        trending_service.bump_many(db, trending)
+    if graph:
+        stats_service.record(db, social_graph.count_deltas(graph), series=False)
+    return results
+
+
+def _resolve(results: list[tuple[Future, Any]]) -> None:
+    for fut, value in results:
+        if isinstance(value, BaseException):
+            fut.set_exception(value)
+        else:
+            fut.set_result(value)
+
+
+class WriteQueue:
+    def __init__(self, window: float = WINDOW, max_batch: int = MAX_BATCH) -> None:
+        self.window = window
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: Batch = {}
+        self._size = 0
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self.batches = 0
+        self.ops = 0
+
+    # -- producer side -------------------------------------------------------------
+
+    def submit(self, kind: str, key: tuple[int, int], op: Any) -> Future:
+        fut: Future = Future()
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+            self._pending.setdefault((kind, key), []).append((op, fut))
+            self._size += 1
+            if self._size == 1 or self._size >= self.max_batch:
+                self._cond.notify()
+        return fut
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush what is pending and stop the flusher (app shutdown)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # -- flusher -------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Collect for one window unless the batch is already full
+                deadline = time.monotonic() + self.window
+                while self._size < self.max_batch and not self._stopping:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._cond.wait(left)
+                batch, self._pending, self._size = self._pending, {}, 0
+            self.flush(batch)
+
+    def flush(self, batch: Batch) -> None:
+        from database.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            try:
+                results = apply_batch(db, batch)
+                db.commit()
+            except SQLAlchemyError:
+                db.rollback()
+                if len(batch) == 1:
+                    raise
+                # One bad key must not fail everybody: retry key by key
+                logger.exception("write batch of %d keys failed, retrying one by one", len(batch))
+                for key, ops in batch.items():
+                    self.flush({key: ops})
+                return
+            # After the commit, so a concurrent reader cannot cache the old adjacency
+            for kind, pair in batch:
+                if kind == "subscription":
+                    social_graph.adjacency_cache.invalidate(*pair)
+            self.batches += 1
+            self.ops += sum(len(ops) for ops in batch.values())
+            _resolve(results)
+        except BaseException as e:
+            for ops in batch.values():
+                for _, fut in ops:
+                    if not fut.done():
+                        fut.set_exception(e)
+        finally:
+            db.close()
+
+    # -- API -----------------------------------------------------------------------
+
+    async def run(self, kind: str, key: tuple[int, int], op: Any) -> Any:
+        if WRITE_QUEUE_ENABLED:
+            return await asyncio.wrap_future(self.submit(kind, key, op))
+        from fastapi.concurrency import run_in_threadpool
+
+        fut: Future = Future()
+        await run_in_threadpool(self.flush, {(kind, key): [(op, fut)]})
+        return fut.result()
+
+    async def set_reaction(self, *, user_id: int, post_id: int, reaction_type: str | None) -> None:
+        """``reaction_type=None`` removes the reaction."""
+        await self.run("reaction", (user_id, post_id), reaction_type)
+
+    async def toggle_favorite(self, *, user_id: int, post_id: int) -> bool:
+        return bool(await self.run("favorite", (user_id, post_id), TOGGLE))
+
+    async def toggle_subscription(self, *, subscriber_id: int, target_user_id: int) -> bool:
+        return bool(await self.run("subscription", (subscriber_id, target_user_id), TOGGLE))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "ops": self.ops,
+            "pending": self._size,
+            "ops_per_batch": round(self.ops / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+write_queue = WriteQueue()
@@ -73,6 +73,32 @@
     });
   }
 
+  // Search autocomplete: titles, categories and authors by prefix
+  const searchInput = document.querySelector('input[data-suggest]');
+  if (searchInput && searchInput.list) {
+    let timer = null;
+    let last = '';
+    searchInput.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(async () => {
+        const q = searchInput.value.trim();
+        if (q.length < 2 || q === last) return;
+        last = q;
+        try {
+          const data = await api(`/api/search/suggest?q=${encodeURIComponent(q)}`);
+          const labels = [
+            ...data.titles.map((t) => t.title),
+            ...data.tags.map((t) => t.name),
+            ...data.authors.map((a) => a.username),
+          ];
+          searchInput.list.replaceChildren(...labels.map((label) => new Option(label)));
+        } catch (err) {
+          // Suggestions are optional; plain search still works
+        }
+      }, 120);
+    });
+  }
+
   // WebSocket notifications
   const wsStatus = document.getElementById('wsStatus');
   function setWs(text) { if (wsStatus) wsStatus.textContent = text; }
@@ -24,4 +24,6 @@ def client(tmp_path: Path):
     importlib.reload(main_mod)
 
     with TestClient(main_mod.app) as c:
+        # Seeding (categories + admin) is an explicit step, not part of startup
+        init_db_mod.seed_db()
         yield c
@@ -0,0 +1,54 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+    return {"Cookie": f"access_token={r.cookies.get('access_token')}"}
+
+
+def _create(client, headers, title):
+    r = client.post(
+        "/api/posts",
+        headers=headers,
+        json={"title": title, "content": "body", "status": "published", "category_ids": [1]},
+    )
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def test_batch_returns_posts_in_requested_order(client):
+    headers = _login(client)
+    a, b = _create(client, headers, "First post"), _create(client, headers, "Second post")
+    client.post(f"/api/posts/{b}/like", headers=headers)
+
+    r = client.get(f"/api/posts/batch?ids={b},{a},999,{b}")
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert [p["id"] for p in data["items"]] == [b, a]
+    assert data["missing"] == [999]
+    assert data["items"][0]["likes"] == 1
+    assert data["items"][0]["author_username"] == "admin"
+    assert data["items"][1]["categories"][0]["id"] == 1
+    # Batch reads are not views
+    assert data["items"][0]["view_count"] == 0
+
+    assert client.get("/api/posts/batch?ids=1,x").status_code == 422
+    assert (
+        client.get("/api/posts/batch?ids=" + ",".join(map(str, range(1, 102)))).status_code == 422
+    )
+
+
+def test_viewer_state(client):
+    headers = _login(client)
+    a, b = _create(client, headers, "First post"), _create(client, headers, "Second post")
+    client.post(f"/api/posts/{a}/dislike", headers=headers)
+    client.post(f"/api/posts/{b}/favorite", headers=headers)
+
+    client.cookies.clear()
+    assert client.get(f"/api/posts/viewer-state?ids={a}").status_code == 401
+    r = client.get(f"/api/posts/viewer-state?ids={a},{b},999", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["items"] == [
+        {"post_id": a, "reaction": "dislike", "favorited": False, "following_author": False},
+        {"post_id": b, "reaction": None, "favorited": True, "following_author": False},
+    ]
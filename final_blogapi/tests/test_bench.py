@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+def test_query_count_middleware_reports_queries(client):
+    import main
+    from bench.loadtest import QUERY_HEADER, QueryCountMiddleware, _count_query
+    from database import session as db_session
+
+    event.listen(db_session.engine, "before_cursor_execute", _count_query)
+    try:
+        # No lifespan: the ``client`` fixture already started the app
+        r = TestClient(QueryCountMiddleware(main.app)).get("/api/posts")
+    finally:
+        event.remove(db_session.engine, "before_cursor_execute", _count_query)
+    assert r.status_code == 200
+    assert int(r.headers[QUERY_HEADER]) >= 1
+
+
+def test_summary_percentiles():
+    from bench.loadtest import _summary_ms
+
+    s = _summary_ms([i / 1000 for i in range(1, 101)])
+    assert s["p50_ms"] == 50
+    assert s["p95_ms"] == 95
+    assert s["p99_ms"] == 99
@@ -0,0 +1,83 @@
+from sqlalchemy import event
+
+
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def _counts(client):
+    return {c["slug"]: c["published_posts"] for c in client.get("/api/categories").json()}
+
+
+def test_registry_is_loaded_once_and_invalidated_by_the_api(client):
+    from database import session as db_session
+    from services.category_service import category_registry
+
+    _login(client)
+    client.get("/api/categories")
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_session.engine, "before_cursor_execute", before)
+    try:
+        client.get("/api/categories")
+        client.post(
+            "/api/posts", json={"title": "Hello", "content": "body", "category_ids": [1, 2, 2, 999]}
+        )
+    finally:
+        event.remove(db_session.engine, "before_cursor_execute", before)
+    assert not any("FROM categories" in s for s in statements)
+
+    loads = category_registry.loads
+    r = client.post("/api/categories", json={"name": "Новая", "slug": "new-cat"})
+    assert r.status_code == 200, r.text
+    assert "new-cat" in _counts(client)
+    assert category_registry.loads == loads + 1
+
+
+def test_published_counts_follow_post_changes(client):
+    _login(client)
+    base = _counts(client)
+    slugs = {c["id"]: c["slug"] for c in client.get("/api/categories").json()}
+    a, b = sorted(slugs)[:2]
+
+    r = client.post(
+        "/api/posts",
+        json={"title": "Draft", "content": "body", "status": "draft", "category_ids": [a]},
+    )
+    post_id = r.json()["id"]
+    assert _counts(client) == base
+
+    client.patch(f"/api/posts/{post_id}", json={"status": "published"})
+    assert _counts(client)[slugs[a]] == base[slugs[a]] + 1
+
+    client.patch(f"/api/posts/{post_id}", json={"category_ids": [b]})
+    counts = _counts(client)
+    assert counts[slugs[a]] == base[slugs[a]]
+    assert counts[slugs[b]] == base[slugs[b]] + 1
+
+    client.delete(f"/api/posts/{post_id}")
+    assert _counts(client) == base
+
+    # The rollup agrees with a recount from the base tables
+    from database import session as db_session
+    from services import category_service, stats_service
+
+    client.post(
+        "/api/posts",
+        json={"title": "Kept", "content": "body", "status": "published", "category_ids": [a, b]},
+    )
+    kept = _counts(client)
+    db = db_session.SessionLocal()
+    try:
+        maintained = {k: v for k, v in category_service.published_counts(db).items() if v}
+        assert maintained == category_service.count_published(db)
+        stats_service.backfill(db)
+    finally:
+        db.close()
+    assert _counts(client) == kept
@@ -0,0 +1,44 @@
+def test_generate_fills_tables_with_skewed_engagement(client):
+    from bench.dataset import generate
+    from database import session as db_session
+
+    data = generate(
+        db_session.engine,
+        users=50,
+        posts=200,
+        comments=600,
+        reactions=1500,
+        favorites=300,
+        subscriptions=400,
+    )
+    rows = data["load"]["rows"]
+    assert rows["users"] == 50
+    assert rows["posts"] == 200
+    assert rows["comments"] == 600
+    assert 0 < rows["reactions"] <= 1500
+
+    with db_session.engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM posts_fts").scalar() == 200
+        per_post = [
+            r[0]
+            for r in conn.exec_driver_sql(
+                "SELECT COUNT(*) AS n FROM reactions GROUP BY post_id ORDER BY n DESC"
+            )
+        ]
+        # Zipf-like: the most popular post gets far more than the median one
+        assert per_post[0] >= 5 * per_post[len(per_post) // 2]
+        # Triggers are back: new posts are searchable again
+        conn.exec_driver_sql(
+            "INSERT INTO posts (author_id, title, content, status, view_count) "
+            "VALUES (1, 'zzqx unique', 'body', 'published', 0)"
+        )
+        assert (
+            conn.exec_driver_sql(
+                "SELECT COUNT(*) FROM posts_fts WHERE posts_fts MATCH 'zzqx'"
+            ).scalar()
+            == 1
+        )
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() != 0
+
+    r = client.get("/api/posts", params={"q": data["words"][0]})
+    assert r.status_code == 200
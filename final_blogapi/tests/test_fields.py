@@ -0,0 +1,57 @@
+from sqlalchemy import event
+
+
+def _create_posts(client, n):
+    from services.jobs import job_executor
+
+    client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    for i in range(n):
+        r = client.post(
+            "/api/posts", json={"title": f"Post {i}", "content": "x" * 5000, "status": "published"}
+        )
+        assert r.status_code == 201
+    # Post-write jobs (related posts) read posts.content in the background
+    assert job_executor.wait_idle()
+
+
+def _selects(fn):
+    from database import session as db_session
+
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if "FROM posts" in statement:
+            statements.append(statement)
+
+    event.listen(db_session.engine, "before_cursor_execute", before)
+    try:
+        result = fn()
+    finally:
+        event.remove(db_session.engine, "before_cursor_execute", before)
+    return result, statements
+
+
+def test_list_defaults_to_summary_without_content(client):
+    _create_posts(client, 3)
+    r, statements = _selects(lambda: client.get("/api/posts"))
+    item = r.json()["items"][0]
+    assert "content" not in item
+    assert item["excerpt"] and item["author_username"] == "admin"
+    assert not any("posts.content" in s for s in statements)
+
+    post_id = item["id"]
+    assert len(client.get(f"/api/posts/{post_id}").json()["content"]) == 5000
+
+
+def test_fields_parameter(client):
+    _create_posts(client, 2)
+    r = client.get("/api/posts?fields=title,likes")
+    assert r.status_code == 200
+    assert all(set(item) == {"id", "title", "likes"} for item in r.json()["items"])
+
+    r = client.get("/api/posts?fields=title,content")
+    assert len(r.json()["items"][0]["content"]) == 5000
+
+    assert client.get("/api/posts?fields=title,password_hash").status_code == 422
@@ -0,0 +1,65 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def _fts(sql):
+    from database import session as db_session
+
+    with db_session.engine.connect() as conn:
+        return conn.exec_driver_sql(sql).fetchall()
+
+
+def _match(word):
+    return [r[0] for r in _fts(f"SELECT rowid FROM posts_fts WHERE posts_fts MATCH '{word}'")]
+
+
+def test_index_follows_text_changes_only(client):
+    from database import session as db_session
+
+    _login(client)
+    post_id = client.post(
+        "/api/posts",
+        json={"title": "Walrus notes", "content": "tusks and ice", "status": "published"},
+    ).json()["id"]
+    assert _match("walrus") == [post_id]
+
+    segments = _fts("SELECT id, block FROM posts_fts_data")
+    client.get(f"/api/posts/{post_id}")  # view counter
+    client.patch(f"/api/posts/{post_id}", json={"status": "draft"})
+    assert _fts("SELECT id, block FROM posts_fts_data") == segments
+
+    client.patch(f"/api/posts/{post_id}", json={"title": "Narwhal notes"})
+    assert _match("walrus") == []
+    assert _match("narwhal") == [post_id]
+    assert _match("tusks") == [post_id]
+
+    client.delete(f"/api/posts/{post_id}")
+    assert _match("narwhal") == []
+    with db_session.engine.connect() as conn:
+        # rank=1: also compare the index against the text in posts
+        conn.exec_driver_sql("INSERT INTO posts_fts(posts_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_legacy_index_is_rebuilt_as_external_content(client):
+    from database import init_db as init_db_mod
+    from database import session as db_session
+
+    _login(client)
+    client.post(
+        "/api/posts", json={"title": "Old index", "content": "platypus", "status": "published"}
+    )
+    with db_session.engine.begin() as conn:
+        init_db_mod.drop_fts_triggers(conn)
+        conn.exec_driver_sql("DROP TABLE posts_fts")
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE posts_fts USING fts5(title, content, post_id UNINDEXED)"
+        )
+
+    assert init_db_mod.init_db(force=True)
+    [(sql,)] = _fts("SELECT sql FROM sqlite_master WHERE name = 'posts_fts'")
+    assert "content='posts'" in sql
+    assert len(_match("platypus")) == 1
+    assert "Old index" in client.get("/?q=platypus").text
@@ -0,0 +1,149 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def _sql(sql, params=None):
+    from database import session as db_session
+
+    with db_session.engine.begin() as conn:
+        result = conn.exec_driver_sql(sql, params or ())
+        return result.fetchall() if result.returns_rows else None
+
+
+def _add_post(title, content="body"):
+    _sql(
+        "INSERT INTO posts (author_id, title, content, status, view_count) "
+        "VALUES (1, ?, ?, 'published', 0)",
+        (title, content),
+    )
+
+
+def _match(word):
+    return sorted(r[0] for r in _sql(f"SELECT rowid FROM posts_fts WHERE posts_fts MATCH '{word}'"))
+
+
+def test_merge_and_integrity_from_admin_api(client):
+    from services.fts_maintenance import fts_maintenance
+
+    for i in range(12):
+        _add_post(f"Segment post {i}")  # one transaction, one segment each
+    _login(client)
+    before = client.get("/api/admin/fts").json()
+    assert before["segments"] >= 4
+
+    merged = client.post("/api/admin/fts/merge").json()
+    assert merged["steps"] >= 1
+    assert merged["segments"] < before["segments"]
+    assert client.post("/api/admin/fts/optimize").json()["segments"] == 1
+    assert client.post("/api/admin/fts/integrity-check").json() == {"ok": True, "error": None}
+    assert len(_match("segment")) == 12
+
+    idle_rps = fts_maintenance.idle_rps
+    fts_maintenance.idle_rps = -1  # any traffic counts as busy
+    try:
+        skips = fts_maintenance.busy_skips
+        fts_maintenance.tick()
+        assert fts_maintenance.busy_skips == skips + 1
+    finally:
+        fts_maintenance.idle_rps = idle_rps
+    config = dict(
+        _sql(
+            "SELECT k, v FROM posts_fts_config WHERE k IN ('automerge', 'crisismerge', 'usermerge')"
+        )
+    )
+    assert config == {"automerge": 8, "crisismerge": 32, "usermerge": 4}
+
+    status = client.get("/api/admin/fts").json()
+    assert status["last"]["integrity"]["outcome"] == "ok"
+
+
+def test_online_rebuild_keeps_writes_made_while_copying(client, monkeypatch):
+    from database import session as db_session
+    from services import fts_maintenance
+
+    for word in ("alpha", "bravo", "charlie", "delta"):
+        _add_post(f"{word} post")
+    [a, b, c, d] = [r[0] for r in _sql("SELECT id FROM posts ORDER BY id")]
+    batches = []
+
+    def between_batches(_):
+        batches.append(_match("alpha") + _match("narwhal"))  # the live index still answers
+        if len(batches) == 1:  # after copying the first post only
+            _sql("UPDATE posts SET title = 'narwhal post' WHERE id = ?", (a,))
+            _sql("UPDATE posts SET title = 'walrus post' WHERE id = ?", (c,))
+            _sql("DELETE FROM posts WHERE id = ?", (b,))
+            _add_post("echo post")
+
+    monkeypatch.setattr(
+        fts_maintenance,
+        "time",
+        SimpleNamespace(time=time.time, perf_counter=time.perf_counter, sleep=between_batches),
+    )
+    result = fts_maintenance.rebuild(db_session.engine, batch=1)
+
+    assert result["posts"] == 3  # b was deleted before its turn
+    assert batches[:2] == [[a], [a]]
+    assert _match("narwhal") == [a]
+    assert _match("alpha") == _match("bravo") == _match("charlie") == []
+    assert _match("walrus") == [c]
+    assert len(_match("echo")) == 1 and _match("delta") == [d]
+    assert fts_maintenance.integrity_check(db_session.engine) is None
+    assert _sql("SELECT name FROM sqlite_master WHERE name LIKE 'posts_fts_rebuild%'") == []
+
+    _add_post("foxtrot post")  # the regular triggers are back
+    assert len(_match("foxtrot")) == 1
+
+
+def test_rebuild_endpoint_runs_as_a_job(client):
+    from services.jobs import job_executor
+
+    _add_post("golf post")
+    _login(client)
+    assert client.post("/api/admin/fts/rebuild").json() == {"queued": True}
+    assert job_executor.wait_idle()
+    assert client.get("/api/admin/fts").json()["last"]["rebuild"]["outcome"] == "ok"
+    assert len(_match("golf")) == 1
+
+
+def test_second_rebuild_leaves_a_running_one_alone(client, monkeypatch):
+    from database import session as db_session
+    from services import fts_maintenance
+
+    for word in ("hotel", "india"):
+        _add_post(f"{word} post")
+    engine = db_session.engine
+    calls = []
+
+    def between_batches(_):
+        calls.append(1)
+        if len(calls) == 1:
+            # A redelivered job (lease expired) runs while the first copy is halfway
+            with pytest.raises(fts_maintenance.RebuildRunning):
+                fts_maintenance.rebuild(engine)
+            fts_maintenance._rebuild_job({})  # dropped quietly
+
+    monkeypatch.setattr(
+        fts_maintenance,
+        "time",
+        SimpleNamespace(time=time.time, perf_counter=time.perf_counter, sleep=between_batches),
+    )
+    assert fts_maintenance.rebuild(engine, batch=1)["posts"] == 2
+    assert _match("hotel") != [] and _match("india") != []
+    assert fts_maintenance.integrity_check(engine) is None
+    assert _sql("SELECT key FROM app_meta WHERE key = 'fts_rebuild_lock'") == []
+
+    # A lock its owner stopped renewing is taken over
+    _sql(
+        "INSERT INTO app_meta (key, value) VALUES ('fts_rebuild_lock', ?)",
+        (f"{time.time() - 1} x",),
+    )
+    assert fts_maintenance.rebuild(engine)["posts"] == 2
@@ -0,0 +1,114 @@
+import time
+
+
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def _enqueue(kind, payload):
+    from database import session as db_session
+    from services import jobs
+
+    db = db_session.SessionLocal()
+    try:
+        jobs.enqueue(db, kind, payload)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_jobs_run_after_commit_and_not_after_rollback(client):
+    from database import session as db_session
+    from services import jobs
+
+    seen: list[dict] = []
+    jobs.HANDLERS["test-record"] = seen.append
+    try:
+        db = db_session.SessionLocal()
+        try:
+            jobs.enqueue(db, "test-record", {"n": 1})
+            db.rollback()
+        finally:
+            db.close()
+        _enqueue("test-record", {"n": 2})
+        assert jobs.job_executor.wait_idle()
+        assert seen == [{"n": 2}]
+        assert jobs.job_executor.stats()["queued"] == 0
+    finally:
+        del jobs.HANDLERS["test-record"]
+
+
+def test_failing_job_is_retried_then_dead_lettered(client):
+    from services import jobs
+
+    executor = jobs.job_executor
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) <= 2:
+            raise RuntimeError("boom")
+
+    jobs.HANDLERS["test-flaky"] = flaky
+    retry_base, max_attempts = executor.retry_base, executor.max_attempts
+    executor.retry_base, executor.max_attempts = 0.0, 2
+    try:
+        _enqueue("test-flaky", {"id": 7})
+        deadline = time.monotonic() + 10
+        while executor.depth()["dead"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(calls) == 2
+
+        _login(client)
+        body = client.get("/api/admin/jobs").json()
+        assert body["queued"] == 0
+        [dead] = body["dead_jobs"]
+        assert (dead["kind"], dead["payload"], dead["attempts"]) == ("test-flaky", {"id": 7}, 2)
+        assert "boom" in dead["error"]
+
+        assert client.post(f"/api/admin/jobs/dead/{dead['id']}/retry").json() == {"ok": True}
+        assert client.post(f"/api/admin/jobs/dead/{dead['id']}/retry").status_code == 404
+        assert executor.wait_idle()
+        assert len(calls) == 3
+        assert client.get("/api/admin/jobs").json()["dead"] == 0
+    finally:
+        executor.retry_base, executor.max_attempts = retry_base, max_attempts
+        del jobs.HANDLERS["test-flaky"]
+
+
+def test_dead_letters_survive_reused_job_ids(client):
+    from database import session as db_session
+    from services import jobs
+
+    executor = jobs.job_executor
+
+    def fail(payload):
+        raise RuntimeError("boom")
+
+    jobs.HANDLERS["test-fail"] = fail
+    max_attempts, executor.max_attempts = executor.max_attempts, 1
+    try:
+        for n in (1, 2):
+            # The queue is empty before each enqueue, so SQLite hands out the same id
+            assert executor.wait_idle()
+            _enqueue("test-fail", {"n": n})
+            deadline = time.monotonic() + 10
+            while executor.depth()["dead"] < n and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert executor.wait_idle()
+
+        db = db_session.SessionLocal()
+        try:
+            dead = jobs.list_dead(db)
+        finally:
+            db.close()
+        assert executor.depth()["queued"] == 0
+        assert [d["payload"] for d in dead] == [{"n": 2}, {"n": 1}]
+        assert dead[0]["job_id"] == dead[1]["job_id"]
+        assert dead[0]["id"] != dead[1]["id"]
+    finally:
+        executor.max_attempts = max_attempts
+        del jobs.HANDLERS["test-fail"]
@@ -0,0 +1,132 @@
+def _login(client, email="admin@blog.com", password="admin123"):
+    client.cookies.clear()
+    r = client.post("/login", data={"email": email, "password": password}, follow_redirects=False)
+    assert r.status_code == 302
+
+
+def _users(n):
+    from database import session as db_session
+    from services import user_service
+    from services.auth_service import get_password_hash
+
+    db = db_session.SessionLocal()
+    try:
+        return [
+            user_service.create_user(
+                db,
+                email=f"u{i}@example.com",
+                username=f"user{i}",
+                password_hash=get_password_hash("secret123"),
+            ).id
+            for i in range(n)
+        ]
+    finally:
+        db.close()
+
+
+def _drain():
+    from services.jobs import job_executor
+
+    assert job_executor.wait_idle()
+
+
+def test_inbox_fan_out_pages_and_read_state(client):
+    u1, u2 = _users(2)
+    _login(client, "u1@example.com", "secret123")
+    assert (
+        client.put("/api/subscriptions/1", json={"notifications_enabled": False}).status_code == 404
+    )
+    client.post("/api/users/1/follow")
+    assert client.put("/api/subscriptions/1", json={"notifications_enabled": False}).json() == {
+        "target_user_id": 1,
+        "notifications_enabled": False,
+    }
+    _login(client, "u0@example.com", "secret123")
+    client.post("/api/users/1/follow")
+
+    _login(client)
+    posts = []
+    for i in range(3):
+        r = client.post(
+            "/api/posts", json={"title": f"Post {i}", "content": "body", "status": "published"}
+        )
+        posts.append(r.json()["id"])
+        _drain()  # one fan-out at a time, so inbox order follows post order
+    draft = client.post(
+        "/api/posts", json={"title": "Draft", "content": "body", "status": "draft"}
+    ).json()["id"]
+    _drain()
+
+    _login(client, "u0@example.com", "secret123")
+    page = client.get("/api/notifications", params={"limit": 2}).json()
+    assert page["unread"] == 3
+    assert [n["post_id"] for n in page["items"]] == [posts[2], posts[1]]
+    assert page["items"][0]["kind"] == "post"
+    assert page["items"][0]["actor_username"] == "admin"
+    assert page["items"][0]["post_title"] == "Post 2"
+    page = client.get(
+        "/api/notifications", params={"limit": 2, "cursor": page["next_cursor"]}
+    ).json()
+    assert [n["post_id"] for n in page["items"]] == [posts[0]]
+    assert page["next_cursor"] is None
+    comment_id = client.post(
+        f"/api/posts/{posts[0]}/comments", json={"content": "Nice post"}
+    ).json()["id"]
+
+    _login(client, "u1@example.com", "secret123")  # notifications turned off
+    assert client.get("/api/notifications/unread-count").json() == {"unread": 0}
+
+    _login(client)
+    client.post(
+        f"/api/posts/{posts[0]}/comments",
+        json={"content": "Thanks!", "parent_comment_id": comment_id},
+    )
+    client.patch(f"/api/posts/{draft}", json={"status": "published"})
+    _drain()
+    inbox = client.get("/api/notifications").json()
+    assert [(n["kind"], n["comment_id"], n["actor_id"]) for n in inbox["items"]] == [
+        ("comment", comment_id, u1)
+    ]
+
+    _login(client, "u0@example.com", "secret123")
+    items = client.get("/api/notifications").json()["items"]
+    assert sorted(n["kind"] for n in items[:2]) == ["post", "reply"]  # delivered by parallel jobs
+    reply = next(n for n in items if n["kind"] == "reply")
+    assert client.post("/api/notifications/read", json={"ids": [reply["id"]]}).json() == {
+        "updated": 1,
+        "unread": 4,
+    }
+    unread = client.get("/api/notifications", params={"unread": True}).json()["items"]
+    assert [n["kind"] for n in unread] == ["post"] * 4
+    assert client.post("/api/notifications/read", json={}).json() == {"updated": 4, "unread": 0}
+
+    _login(client)
+    client.delete(f"/api/posts/{posts[0]}")
+    assert client.get("/api/notifications/unread-count").json() == {"unread": 0}
+
+    from database import session as db_session
+    from services import notification_service
+
+    db = db_session.SessionLocal()
+    try:
+        recount = notification_service.count_unread(db)
+        assert {uid: notification_service.unread_count(db, uid) for uid in (1, u1, u2)} == {
+            uid: recount.get(f"notifications_unread:{uid}", 0) for uid in (1, u1, u2)
+        }
+    finally:
+        db.close()
+
+
+def test_fan_out_batches_and_is_idempotent(client):
+    from services import notification_service
+    from services.write_queue import TOGGLE, write_queue
+
+    users = _users(5)
+    for uid in users:
+        write_queue.submit("subscription", (uid, 1), TOGGLE).result(timeout=5)
+    _login(client)
+    post_id = client.post("/api/posts", json={"title": "Draft", "content": "body"}).json()["id"]
+
+    event = notification_service.Event(notification_service.POST, post_id, post_id, 1)
+    assert notification_service.fan_out(event, batch=2) == 5
+    assert notification_service.fan_out(event, batch=2) == 0
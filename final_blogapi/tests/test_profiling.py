@@ -0,0 +1,55 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    return {"Cookie": f"access_token={r.cookies.get('access_token')}"}
+
+
+def test_profiling_requires_admin(client):
+    assert client.get("/api/admin/profile/cpu", params={"seconds": 0.1}).status_code in (401, 403)
+    assert client.post("/api/admin/profile/memory/start").status_code in (401, 403)
+
+
+def test_cpu_profile_collapsed_and_json(client):
+    headers = _login(client)
+    r = client.get(
+        "/api/admin/profile/cpu", headers=headers, params={"seconds": 0.2, "include_idle": True}
+    )
+    assert r.status_code == 200
+    lines = r.text.splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) >= 1 and ";" in stack
+
+    r = client.get(
+        "/api/admin/profile/cpu", headers=headers, params={"seconds": 0.2, "format": "json"}
+    )
+    assert r.status_code == 200
+    assert r.json()["samples"] >= 1
+
+
+def test_memory_snapshot_and_diff(client):
+    headers = _login(client)
+    assert client.post("/api/admin/profile/memory/snapshot", headers=headers).status_code == 409
+    try:
+        assert (
+            client.post("/api/admin/profile/memory/start", headers=headers).json()["tracing"]
+            is True
+        )
+        base = client.post("/api/admin/profile/memory/snapshot", headers=headers).json()
+        assert base["id"]
+        hoard = [bytearray(1024) for _ in range(2000)]  # noqa: F841
+        r = client.get(
+            "/api/admin/profile/memory/diff", headers=headers, params={"base": base["id"]}
+        )
+        assert r.status_code == 200
+        assert r.json()["size_diff_kb"] > 1000
+        assert any(s["file"].endswith("test_profiling.py") for s in r.json()["top"])
+        assert (
+            client.get(
+                "/api/admin/profile/memory/diff", headers=headers, params={"base": "nope"}
+            ).status_code
+            == 404
+        )
+    finally:
+        client.post("/api/admin/profile/memory/stop", headers=headers)
@@ -0,0 +1,139 @@
+"""EXPLAIN QUERY PLAN regression suite.
+
+Every SELECT issued by the hot service functions is re-run under
+``EXPLAIN QUERY PLAN``; a plan step that scans a real table without an index
+(``SCAN posts``) fails the test. Index scans (``SCAN t USING INDEX ...``),
+searches and FTS virtual-table lookups are fine.
+"""
+
+import re
+
+import pytest
+from sqlalchemy import event
+
+from models.db_base import Base
+
+# Statements that cannot use a B-tree index by design: '%q%' substring search
+ALLOWED_SCANS = {
+    "search_users": {"users"},
+}
+
+SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+CASE_NAMES = [
+    "list_posts_default",
+    "list_posts_author",
+    "list_posts_category",
+    "list_posts_following",
+    "list_posts_trending",
+    "list_posts_search",
+    "get_post",
+    "get_post_counts",
+    "get_post_categories",
+    "list_favorites",
+    "is_favorited",
+    "get_user_reaction",
+    "get_posts",
+    "get_posts_counts",
+    "get_posts_categories",
+    "get_viewer_state",
+    "list_comments",
+    "get_user_by_email",
+    "get_user_by_username",
+    "search_users",
+    "is_subscribed",
+    "list_followers",
+    "list_following",
+    "following_among",
+    "social_counts",
+    "list_notifications",
+]
+
+
+def _cases():
+    # Imported lazily: the client fixture reloads the app modules first
+    from services import (
+        comment_service,
+        notification_service,
+        post_service,
+        social_graph,
+        subscription_service,
+        user_service,
+    )
+
+    return {
+        "list_posts_default": lambda db: post_service.list_posts(db),
+        "list_posts_author": lambda db: post_service.list_posts(db, author_id=1),
+        "list_posts_category": lambda db: post_service.list_posts(db, category_slug="programming"),
+        "list_posts_following": lambda db: post_service.list_posts(
+            db, feed="following", viewer_id=1
+        ),
+        "list_posts_trending": lambda db: post_service.list_posts(db, feed="trending"),
+        "list_posts_search": lambda db: post_service.list_posts(db, q="alpha"),
+        "get_post": lambda db: post_service.get_post(db, 1),
+        "get_post_counts": lambda db: post_service.get_post_counts(db, 1),
+        "get_post_categories": lambda db: post_service.get_post_categories(db, 1),
+        "list_favorites": lambda db: post_service.list_favorites(db, user_id=1),
+        "is_favorited": lambda db: post_service.is_favorited(db, user_id=1, post_id=1),
+        "get_user_reaction": lambda db: post_service.get_user_reaction(db, user_id=1, post_id=1),
+        "get_posts": lambda db: post_service.get_posts(db, [1, 2, 3]),
+        "get_posts_counts": lambda db: post_service.get_posts_counts(db, [1, 2, 3]),
+        "get_posts_categories": lambda db: post_service.get_posts_categories(db, [1, 2, 3]),
+        "get_viewer_state": lambda db: post_service.get_viewer_state(
+            db, user_id=1, post_ids=[1, 2, 3]
+        ),
+        "list_comments": lambda db: comment_service.list_comments(db, post_id=1),
+        "get_user_by_email": lambda db: user_service.get_user_by_email(db, "admin@blog.com"),
+        "get_user_by_username": lambda db: user_service.get_user_by_username(db, "admin"),
+        "search_users": lambda db: user_service.search_users(db, "adm"),
+        "is_subscribed": lambda db: subscription_service.is_subscribed(
+            db, subscriber_id=1, target_user_id=2
+        ),
+        "list_followers": lambda db: social_graph.list_followers(db, 1),
+        "list_following": lambda db: social_graph.list_following(db, 1),
+        "following_among": lambda db: social_graph.following_among(db, 1, [2, 3]),
+        "social_counts": lambda db: social_graph.counts(db, [1, 2]),
+        "list_notifications": lambda db: notification_service.list_notifications(db, 1, before=100),
+    }
+
+
+def _capture_selects(engine, fn):
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+    return statements
+
+
+@pytest.mark.parametrize("name", CASE_NAMES)
+def test_service_query_uses_indexes(client, name):
+    from database import session as db_session
+    from services.search_cache import posts_search_cache, users_search_cache
+
+    posts_search_cache.clear()
+    users_search_cache.clear()
+    tables = set(Base.metadata.tables)
+    engine = db_session.engine
+    db = db_session.SessionLocal()
+    try:
+        selects = _capture_selects(engine, lambda: _cases()[name](db))
+    finally:
+        db.close()
+    assert selects, f"{name} issued no SELECT"
+
+    with engine.connect() as conn:
+        for statement, params in selects:
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params).fetchall()
+            for row in plan:
+                m = SCAN_RE.match(row[-1])
+                if m and m.group(1) in tables and m.group(1) not in ALLOWED_SCANS.get(name, set()):
+                    pytest.fail(
+                        f"{name}: full scan of {m.group(1)}\n{statement}\n{[r[-1] for r in plan]}"
+                    )
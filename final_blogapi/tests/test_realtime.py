@@ -0,0 +1,26 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def test_new_posts_and_comments_are_broadcast_by_the_writing_process(client):
+    _login(client)
+    with client.websocket_connect("/ws") as ws:
+        r = client.post(
+            "/api/posts", json={"title": "Hello sockets", "content": "body", "status": "published"}
+        )
+        assert r.status_code == 201
+        post_id = r.json()["id"]
+        assert ws.receive_json() == {
+            "type": "post_created",
+            "post": {"id": post_id, "title": "Hello sockets", "author": "admin"},
+        }
+        r = client.post(f"/api/posts/{post_id}/comments", json={"content": "First!"})
+        assert r.status_code == 201
+        assert ws.receive_json() == {
+            "type": "comment_created",
+            "post_id": post_id,
+            "author": "admin",
+        }
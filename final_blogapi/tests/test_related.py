@@ -0,0 +1,125 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def _drain():
+    from services.jobs import job_executor
+
+    assert job_executor.wait_idle()
+
+
+TEXTS = {
+    "sqlite": (
+        "SQLite indexes",
+        "Covering indexes make sqlite queries fast; explain query plan shows the index.",
+    ),
+    "sqlite2": (
+        "Tuning SQLite",
+        "Pragma settings, indexes and query plan checks for a faster sqlite database.",
+    ),
+    "bread": (
+        "Sourdough bread",
+        "Flour, water and salt: a sourdough starter needs feeding before baking bread.",
+    ),
+    "bread2": (
+        "Baking rye bread",
+        "Rye flour absorbs more water; let the sourdough dough proof overnight.",
+    ),
+}
+
+
+def _related(client, post_id):
+    r = client.get(f"/api/posts/{post_id}/related")
+    assert r.status_code == 200
+    return [item["id"] for item in r.json()["items"]]
+
+
+def test_related_posts_follow_creates_edits_and_deletes(client):
+    from database import session as db_session
+    from services import related_service
+
+    related_service.related_model.clear()
+    _login(client)
+    ids = {}
+    for key, (title, content) in TEXTS.items():
+        r = client.post(
+            "/api/posts", json={"title": title, "content": content, "status": "published"}
+        )
+        ids[key] = r.json()["id"]
+        _drain()
+    draft = client.post(
+        "/api/posts",
+        json={"title": "Sourdough notes", "content": "sourdough bread flour", "status": "draft"},
+    ).json()["id"]
+    _drain()
+
+    assert _related(client, ids["sqlite"]) == [ids["sqlite2"]]
+    assert _related(client, ids["bread"]) == [ids["bread2"]]
+    item = client.get(f"/api/posts/{ids['bread2']}/related").json()["items"][0]
+    assert item["title"] == "Sourdough bread" and 0 < item["score"] <= 1 and "content" not in item
+    assert "Sourdough bread" in client.get(f"/post/{ids['bread2']}").text
+
+    # Publishing the draft puts it into the lists it resembles
+    client.patch(f"/api/posts/{draft}", json={"status": "published"})
+    _drain()
+    assert draft in _related(client, ids["bread"])
+    assert ids["bread"] in _related(client, draft)
+
+    # Rewritten about databases: it leaves the bread lists and joins the sqlite ones
+    client.patch(
+        f"/api/posts/{ids['bread2']}",
+        json={
+            "title": "SQLite query plan",
+            "content": "Check the query plan when adding sqlite indexes.",
+        },
+    )
+    _drain()
+    assert ids["bread2"] not in _related(client, ids["bread"])
+    assert ids["bread2"] in _related(client, ids["sqlite"])
+
+    client.delete(f"/api/posts/{ids['sqlite2']}")
+    assert ids["sqlite2"] not in _related(client, ids["sqlite"])
+    assert client.get("/api/posts/999999/related").status_code == 404
+
+    # Incremental updates match a full recompute
+    stored = {
+        pid: _related(client, pid) for pid in (ids["sqlite"], ids["bread"], ids["bread2"], draft)
+    }
+    db = db_session.SessionLocal()
+    try:
+        related_service.recompute(db)
+    finally:
+        db.close()
+    assert {pid: _related(client, pid) for pid in stored} == stored
+
+
+def test_rebuild_is_queued_once_when_the_table_is_empty(client):
+    from services import jobs, related_service
+
+    _login(client)
+    for title, content in (TEXTS["bread"], TEXTS["bread2"]):
+        client.post("/api/posts", json={"title": title, "content": content, "status": "published"})
+    _drain()
+    assert related_service.schedule_rebuild(only_if_empty=True) is False  # lists already exist
+
+    calls: list[dict] = []
+    original = jobs.HANDLERS["related_rebuild"]
+    jobs.HANDLERS["related_rebuild"] = calls.append
+    try:
+        from database import session as db_session
+        from models.db_models import PostRelated
+
+        db = db_session.SessionLocal()
+        try:
+            db.query(PostRelated).delete()
+            db.commit()
+        finally:
+            db.close()
+        assert related_service.schedule_rebuild(only_if_empty=True) is True
+        _drain()
+        assert calls == [{}]
+    finally:
+        jobs.HANDLERS["related_rebuild"] = original
@@ -0,0 +1,45 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    return {"Cookie": f"access_token={r.cookies.get('access_token')}"}
+
+
+def test_slow_queries_are_aggregated_with_plan_and_caller(client):
+    from services.slow_query_log import redact, slow_query_log
+
+    headers = _login(client)
+    old = slow_query_log.threshold_ms
+    slow_query_log.threshold_ms = 0  # everything is "slow"
+    slow_query_log.reset()
+    try:
+        # Different terms: same fingerprint, no search-cache hit
+        client.get("/api/users", params={"q": "adm"}, headers=headers)
+        client.get("/api/users", params={"q": "dmi"}, headers=headers)
+    finally:
+        slow_query_log.threshold_ms = old
+
+    items = client.get("/api/admin/slow-queries", params={"limit": 500}, headers=headers).json()[
+        "items"
+    ]
+    search = next(i for i in items if "FROM users" in i["statement"] and "LIKE" in i["statement"])
+    assert len(items) <= 10  # all of them fit on the dashboard
+    assert search["count"] >= 2
+    assert search["p95_ms"] >= search["p50_ms"] >= 0
+    assert search["plan"] and any("users" in step for step in search["plan"])
+    assert any(c.startswith("services/user_service.py:") for c in search["callers"])
+    assert "GET /api/users" in search["requests"]
+    # Search term is a string parameter: redacted to its type and length
+    assert "%adm%" not in str(search["last_params"])
+
+    r = client.get(f"/api/admin/slow-queries/{search['fingerprint']}", headers=headers)
+    assert r.json()["fingerprint"] == search["fingerprint"]
+    assert redact(("secret", 3, None)) == ["<str:6>", 3, None]
+
+    page = client.get("/admin", headers=headers)
+    assert page.status_code == 200
+    assert "Медленные запросы" in page.text
+    assert search["fingerprint"] in page.text
+
+    client.delete("/api/admin/slow-queries", headers=headers)
+    assert client.get("/api/admin/slow-queries", headers=headers).json()["items"] == []
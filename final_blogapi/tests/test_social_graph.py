@@ -0,0 +1,137 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def _users(n):
+    from database import session as db_session
+    from services import user_service
+
+    db = db_session.SessionLocal()
+    try:
+        return [
+            user_service.create_user(
+                db, email=f"u{i}@example.com", username=f"user{i}", password_hash="x"
+            ).id
+            for i in range(n)
+        ]
+    finally:
+        db.close()
+
+
+def _follow(subscriber_id, target_id):
+    from services.write_queue import TOGGLE, write_queue
+
+    write_queue.submit("subscription", (subscriber_id, target_id), TOGGLE).result(timeout=5)
+
+
+def test_pages_counts_and_membership(client):
+    _login(client)
+    u1, u2, u3 = _users(3)
+    for uid in (u1, u2, u3):
+        assert client.post(f"/api/users/{uid}/follow").json() == {"following": True}
+    _follow(u1, 1)
+
+    me = client.get("/api/users/1").json()
+    assert (me["followers"], me["following"]) == (1, 3)
+
+    page = client.get("/api/subscriptions/me", params={"per_page": 2}).json()
+    assert page["total"] == 3
+    assert [u["id"] for u in page["items"]] == [u3, u2]
+    assert all(u["followed"] for u in page["items"])
+    page = client.get("/api/subscriptions/me", params={"per_page": 2, "page": 2}).json()
+    assert [u["id"] for u in page["items"]] == [u1]
+
+    followers = client.get("/api/users/1/followers").json()
+    assert followers["total"] == 1
+    assert followers["items"] == [
+        {"id": u1, "username": "user0", "avatar_url": None, "followed": True}
+    ]
+    assert client.get(f"/api/users/{u1}/followers").json()["items"][0]["followed"] is False
+    assert client.get("/api/users/999999/following").status_code == 404
+
+    client.post(f"/api/users/{u2}/follow")
+    assert client.get("/api/users/1").json()["following"] == 2
+    assert client.get(f"/api/users/{u2}").json()["followers"] == 0
+
+    client.delete(f"/api/users/{u1}")
+    me = client.get("/api/users/1").json()
+    assert (me["followers"], me["following"]) == (0, 1)
+
+    # The counters agree with a recount from subscriptions
+    from database import session as db_session
+    from services import social_graph
+
+    db = db_session.SessionLocal()
+    try:
+        stored = social_graph.counts(db, [1, u2, u3])
+        recount = social_graph.count_all(db)
+    finally:
+        db.close()
+    for uid, c in stored.items():
+        assert c["followers"] == recount.get(f"followers:{uid}", 0)
+        assert c["following"] == recount.get(f"following:{uid}", 0)
+
+
+def test_heavy_adjacency_is_cached_until_a_toggle(client):
+    from database import session as db_session
+    from services import social_graph
+
+    _login(client)
+    u1, u2 = _users(2)
+    client.post(f"/api/users/{u1}/follow")
+    cache = social_graph.adjacency_cache
+    cache.clear()
+    min_size, cache.min_size = cache.min_size, 1
+    try:
+        db = db_session.SessionLocal()
+        try:
+            assert social_graph.following_ids(db, 1) == {u1}
+            hits = cache.hits
+            assert social_graph.following_among(db, 1, [u1, u2]) == {u1}
+            assert cache.hits == hits + 1
+        finally:
+            db.close()
+
+        client.post(f"/api/users/{u2}/follow")
+        assert cache.get(social_graph.FOLLOWING, 1) is None
+        assert "Отписаться" in client.get("/users", params={"q": "user1"}).text
+    finally:
+        cache.min_size = min_size
+        cache.clear()
+
+
+def test_user_removal_deltas_ignore_stale_cache(client):
+    from database import session as db_session
+    from models.db_models import Subscription
+    from services import social_graph, stats_service
+
+    _login(client)
+    u1, u2 = _users(2)
+    client.post(f"/api/users/{u1}/follow")
+    cache = social_graph.adjacency_cache
+    cache.clear()
+    min_size, cache.min_size = cache.min_size, 1
+    db = db_session.SessionLocal()
+    try:
+        assert social_graph.follower_ids(db, u1) == {1}
+        # Another worker: user 1 unfollows u1 and u2 follows u1, this cache never hears
+        db.query(Subscription).filter(Subscription.target_user_id == u1).delete()
+        db.add(Subscription(subscriber_id=u2, target_user_id=u1))
+        deltas = social_graph.count_deltas([(1, u1, -1), (u2, u1, 1)])
+        stats_service.record(db, deltas, series=False)
+        db.commit()
+        assert social_graph.follower_ids(db, u1) == {1}  # stale
+
+        client.delete(f"/api/users/{u1}")
+        stored = social_graph.counts(db, [1, u2])
+        recount = social_graph.count_all(db)
+    finally:
+        cache.min_size = min_size
+        cache.clear()
+        db.close()
+    assert stored == {1: {"followers": 0, "following": 0}, u2: {"followers": 0, "following": 0}}
+    for uid, c in stored.items():
+        assert c["following"] == recount.get(f"following:{uid}", 0)
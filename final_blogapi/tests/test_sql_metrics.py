@@ -0,0 +1,68 @@
+import logging
+
+
+def _create_posts(client, n):
+    client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    for i in range(n):
+        r = client.post(
+            "/api/posts", json={"title": f"Post {i}", "content": "body", "status": "published"}
+        )
+        assert r.status_code == 201
+
+
+def test_statement_shape_folds_literals_and_in_lists():
+    from services.sql_metrics import statement_shape
+
+    assert (
+        statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)  LIMIT 10")
+        == "SELECT * FROM t WHERE id IN (?) LIMIT ?"
+    )
+
+
+def test_db_metrics_exported_per_route(client):
+    client.get("/api/posts")
+    body = client.get("/metrics").text
+    assert 'http_request_db_queries_count{method="GET",route="/api/posts"}' in body
+    assert 'http_request_db_seconds_sum{method="GET",route="/api/posts"}' in body
+
+
+def test_n_plus_one_is_logged(client, caplog):
+    import main
+    from database import session as db_session
+    from services import post_service
+
+    _create_posts(client, 6)
+
+    @main.app.get("/test/n-plus-one")
+    def n_plus_one():
+        with db_session.SessionLocal() as db:
+            posts, _ = post_service.list_posts(db)
+            return [post_service.get_post_counts(db, p.id) for p in posts]
+
+    with caplog.at_level(logging.WARNING, logger="blog.sql"):
+        assert client.get("/test/n-plus-one").status_code == 200
+    assert any("possible N+1 in GET /test/n-plus-one:" in r.getMessage() for r in caplog.records)
+
+
+def test_feeds_have_no_n_plus_one(client, caplog):
+    _create_posts(client, 6)
+    with caplog.at_level(logging.WARNING, logger="blog.sql"):
+        client.get("/api/posts")
+        client.get("/")
+    assert not any("possible N+1" in r.getMessage() for r in caplog.records)
+
+
+def test_server_timing_header_in_debug(client):
+    import main
+    from fastapi.testclient import TestClient
+    from services.sql_metrics import SQLMetricsMiddleware
+
+    # No lifespan: the ``client`` fixture already started the app
+    r = TestClient(SQLMetricsMiddleware(main.app, prometheus=False, server_timing=True)).get(
+        "/api/posts"
+    )
+    assert r.headers["server-timing"].startswith("db;dur=")
+    assert "queries" in r.headers["server-timing"]
+    assert "server-timing" not in client.get("/api/posts").headers
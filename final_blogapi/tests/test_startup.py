@@ -0,0 +1,14 @@
+def test_init_db_is_noop_when_schema_unchanged(client):
+    import database.init_db as init_db_mod
+
+    # The app startup already applied the schema and recorded its fingerprint
+    assert init_db_mod.init_db() is False
+    assert init_db_mod.init_db(force=True) is True
+
+
+def test_startup_report(client):
+    r = client.get("/health/startup")
+    assert r.status_code == 200
+    data = r.json()
+    assert "import" in data["phases_ms"]
+    assert "init_db.check" in data["phases_ms"]
@@ -0,0 +1,59 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+
+
+def _suggest(client, q):
+    r = client.get("/api/search/suggest", params={"q": q})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_suggest_titles_tags_and_authors_by_prefix(client):
+    from database import session as db_session
+    from services import user_service
+    from services.auth_service import get_password_hash
+
+    db = db_session.SessionLocal()
+    try:
+        user_service.create_user(
+            db,
+            email="py@example.com",
+            username="pythonista",
+            password_hash=get_password_hash("secret123"),
+        )
+    finally:
+        db.close()
+    _login(client)
+    tips = client.post(
+        "/api/posts", json={"title": "Python tips", "content": "body", "status": "published"}
+    ).json()
+    draft = client.post(
+        "/api/posts", json={"title": "Python draft", "content": "body", "status": "draft"}
+    ).json()
+
+    body = _suggest(client, "pyt")
+    assert body["titles"] == [{"id": tips["id"], "title": "Python tips"}]
+    assert [a["username"] for a in body["authors"]] == ["pythonista"]
+    assert _suggest(client, "ПРОГ")["tags"] == [
+        {"id": 1, "name": "Программирование", "slug": "programming"}
+    ]
+    assert _suggest(client, "tip py")["titles"] == [{"id": tips["id"], "title": "Python tips"}]
+
+    # Writes through the services show up at once (index triggers + cache reset)
+    client.patch(f"/api/posts/{draft['id']}", json={"status": "published"})
+    assert [t["id"] for t in _suggest(client, "pyt")["titles"]] == [draft["id"], tips["id"]]
+    client.patch(f"/api/posts/{tips['id']}", json={"title": "Ruby tips"})
+    assert [t["id"] for t in _suggest(client, "pyt")["titles"]] == [draft["id"]]
+    client.delete(f"/api/posts/{draft['id']}")
+    assert _suggest(client, "pyt")["titles"] == []
+
+
+def test_suggest_ignores_short_and_fts_syntax_input(client):
+    empty: dict[str, list] = {"titles": [], "tags": [], "authors": []}
+    assert _suggest(client, "a") == empty
+    assert _suggest(client, "  ") == empty
+    assert _suggest(client, 'ad" OR NEAR(') == _suggest(client, "ad or near")
+    assert _suggest(client, "adm")["authors"] == [{"id": 1, "username": "admin"}]
@@ -0,0 +1,41 @@
+def test_index_and_post_pages_are_streamed(client):
+    r = client.get("/")
+    assert r.status_code == 200
+    assert "content-length" not in r.headers
+    assert r.headers["content-type"].startswith("text/html")
+    assert "MuhaBlog" in r.text
+
+    # The post page renders ORM objects (author, comments, related) after the handler returns
+    from services.jobs import job_executor
+
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    assert r.status_code == 302
+    text = "Sourdough bread needs flour, water, salt and a lively starter."
+    post = client.post(
+        "/api/posts", json={"title": "Sourdough bread", "content": text, "status": "published"}
+    ).json()
+    other = client.post(
+        "/api/posts", json={"title": "Rye sourdough bread", "content": text, "status": "published"}
+    ).json()
+    for comment in ("First comment", "Second comment"):
+        r = client.post(f"/api/posts/{post['id']}/comments", json={"content": comment})
+        assert r.status_code == 201
+    assert job_executor.wait_idle()
+
+    r = client.get(f"/post/{post['id']}")
+    assert r.status_code == 200
+    assert "content-length" not in r.headers
+    assert r.headers["content-type"].startswith("text/html")
+    assert '<h1 class="post__title">Sourdough bread</h1>' in r.text
+    assert r.text.index("First comment") < r.text.index("Second comment")
+    assert r.text.count("<strong>admin</strong>") == 3  # post header + two comments
+    assert f'<a href="/post/{other["id"]}">Rye sourdough bread</a>' in r.text
+    assert r.text.rstrip().endswith("</html>")
+
+
+def test_precompile_templates():
+    from routers.templating import precompile_templates
+
+    assert precompile_templates() >= 10
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+
+
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    return {"Cookie": f"access_token={r.cookies.get('access_token')}"}
+
+
+def test_log_add_matches_decayed_sum():
+    from services import trending_service as ts
+
+    now = datetime.now(timezone.utc)
+    earlier = now - timedelta(hours=ts.HALF_LIFE_HOURS)
+    key = ts._log_add(ts.FLOOR, 4.0, earlier)
+    key = ts._log_add(key, 1.0, now)
+    # 4 one half-life ago is worth 2 now
+    assert abs(ts.current_score(key, now) - 3.0) < 1e-9
+    key = ts._log_add(key, -1.0, now)
+    assert abs(ts.current_score(key, now) - 2.0) < 1e-9
+
+
+def test_removal_at_event_time_cancels_only_that_event():
+    from services import trending_service as ts
+
+    now = datetime.now(timezone.utc)
+    published = now - timedelta(days=2)
+    key = ts._log_add(ts.FLOOR, ts.WEIGHTS["publish"], published)
+    for _ in range(10):
+        key = ts._log_add(key, ts.WEIGHTS["like"], published)
+    before = ts.current_score(key, now)
+    # Undo one like: subtracted at its own time, not at now
+    key = ts._log_add(key, -ts.WEIGHTS["like"], published)
+    assert abs(ts.current_score(key, now) - before * 12 / 13) < 1e-9
+    # Everything undone -> no engagement left
+    for _ in range(9):
+        key = ts._log_add(key, -ts.WEIGHTS["like"], published)
+    key = ts._log_add(key, -ts.WEIGHTS["publish"], published)
+    assert ts.current_score(key, now) < 1e-9
+
+
+def test_trending_feed_orders_by_engagement(client):
+    from database import session as db_session
+    from services import trending_service
+
+    headers = _login(client)
+    ids = []
+    for title in ("Quiet post", "Busy post"):
+        r = client.post(
+            "/api/posts",
+            headers=headers,
+            json={"title": title, "content": "x", "status": "published"},
+        )
+        ids.append(r.json()["id"])
+    quiet, busy = ids
+    client.post(f"/api/posts/{busy}/like", headers=headers)
+    client.post(f"/api/posts/{busy}/favorite", headers=headers)
+    client.post(f"/api/posts/{busy}/comments", headers=headers, json={"content": "wow"})
+
+    r = client.get("/api/posts", params={"feed": "trending"})
+    assert [p["id"] for p in r.json()["items"]] == [busy, quiet]
+
+    # Recompute from raw activity keeps the same order
+    db = db_session.SessionLocal()
+    try:
+        assert trending_service.recompute(db) == 2
+    finally:
+        db.close()
+    r = client.get("/api/posts", params={"feed": "trending"})
+    assert [p["id"] for p in r.json()["items"]] == [busy, quiet]
+
+    r = client.get("/?feed=trending")
+    assert r.text.index("Busy post") < r.text.index("Quiet post")
+
+
+def test_deleted_post_score_is_not_inherited(client):
+    from database import session as db_session
+    from models.db_models import PostHotScore
+
+    headers = _login(client)
+
+    def create() -> int:
+        r = client.post(
+            "/api/posts",
+            headers=headers,
+            json={"title": "Reused id", "content": "x", "status": "published"},
+        )
+        return int(r.json()["id"])
+
+    def score(post_id: int) -> float:
+        db = db_session.SessionLocal()
+        try:
+            row = db.get(PostHotScore, post_id)
+            assert row is not None
+            return row.score
+        finally:
+            db.close()
+
+    fresh = score(create())
+    old = create()
+    client.post(f"/api/posts/{old}/like", headers=headers)
+    assert score(old) > fresh
+    assert client.delete(f"/api/posts/{old}", headers=headers).status_code == 200
+    # SQLite hands the freed id to the next post
+    new = create()
+    assert new == old
+    assert abs(score(new) - fresh) < 1e-3
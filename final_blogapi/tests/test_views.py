@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+
+
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    return {"Cookie": f"access_token={r.cookies.get('access_token')}"}
+
+
+def test_view_buckets_flush_and_downsample(client):
+    from database import session as db_session
+    from services.view_analytics import downsample, view_aggregator
+
+    headers = _login(client)
+    r = client.post(
+        "/api/posts",
+        headers=headers,
+        json={"title": "Viewed", "content": "x", "status": "published"},
+    )
+    post_id = r.json()["id"]
+    for _ in range(3):
+        client.get(f"/post/{post_id}")
+    # An old view that should end up in the daily table
+    view_aggregator.record(post_id, datetime.now(timezone.utc) - timedelta(days=10))
+
+    # Pending (not yet flushed) views are already visible
+    r = client.get(f"/api/posts/{post_id}/stats")
+    assert r.json()["window_views"] == 3
+
+    assert view_aggregator.flush() == 4
+    db = db_session.SessionLocal()
+    try:
+        assert downsample(db) == 1
+    finally:
+        db.close()
+
+    start = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+    r = client.get(f"/api/posts/{post_id}/stats", params={"start": start, "granularity": "day"})
+    assert r.status_code == 200
+    assert r.json()["window_views"] == 4
+    assert len(r.json()["points"]) == 2
+
+    # Hourly series over the same window: the old day is one flagged point
+    r = client.get(f"/api/posts/{post_id}/stats", params={"start": start})
+    assert r.json()["window_views"] == 4
+    old, recent = r.json()["points"]
+    assert old["downsampled"] is True and old["views"] == 1
+    assert recent["views"] == 3 and "downsampled" not in recent
+
+    r = client.get("/api/admin/top-posts", headers=headers)
+    assert r.json()["items"][0] == {"post_id": post_id, "title": "Viewed", "views": 3}
+
+
+def test_deleted_post_views_are_not_inherited(client):
+    from services.view_analytics import view_aggregator
+
+    headers = _login(client)
+
+    def create() -> int:
+        r = client.post(
+            "/api/posts",
+            headers=headers,
+            json={"title": "Reused id", "content": "x", "status": "published"},
+        )
+        return int(r.json()["id"])
+
+    old = create()
+    for _ in range(2):
+        client.get(f"/post/{old}")
+    assert view_aggregator.flush() == 2
+    client.get(f"/post/{old}")  # still pending at delete time
+    assert client.delete(f"/api/posts/{old}", headers=headers).status_code == 200
+    assert view_aggregator.flush() == 0
+
+    new = create()
+    assert new == old
+    r = client.get(f"/api/posts/{new}/stats", params={"granularity": "day"})
+    assert r.json()["total_views"] == 0
+    assert r.json()["window_views"] == 0
+
+
+def test_upsert_add_splits_large_batches(client, monkeypatch):
+    from sqlalchemy import event
+
+    from database import session as db_session
+    from database import upsert
+    from models.db_models import PostViewHour
+
+    monkeypatch.setattr(upsert, "MAX_BIND_PARAMS", 7)  # two 3-column rows per statement
+    sizes = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO post_view_hours"):
+            sizes.append(len(parameters))
+
+    event.listen(db_session.engine, "before_cursor_execute", count)
+    try:
+        db = db_session.SessionLocal()
+        try:
+            rows = [{"post_id": 1, "hour": h, "views": 1} for h in range(5)]
+            upsert.upsert_add(db, PostViewHour, rows, key=["post_id", "hour"], add=["views"])
+            upsert.upsert_add(db, PostViewHour, rows, key=["post_id", "hour"], add=["views"])
+            db.commit()
+            stored = db.query(PostViewHour.hour, PostViewHour.views).order_by(PostViewHour.hour)
+            assert [tuple(r) for r in stored] == [(h, 2) for h in range(5)]
+        finally:
+            db.close()
+    finally:
+        event.remove(db_session.engine, "before_cursor_execute", count)
+    assert sizes == [6, 6, 3] * 2
@@ -0,0 +1,117 @@
+def _login(client):
+    r = client.post(
+        "/login", data={"email": "admin@blog.com", "password": "admin123"}, follow_redirects=False
+    )
+    return {"Cookie": f"access_token={r.cookies.get('access_token')}"}
+
+
+def _post(client, headers):
+    r = client.post(
+        "/api/posts",
+        headers=headers,
+        json={"title": "Queued", "content": "body", "status": "published"},
+    )
+    return r.json()["id"]
+
+
+def test_endpoints_read_their_writes(client):
+    headers = _login(client)
+    post_id = _post(client, headers)
+
+    assert client.post(f"/api/posts/{post_id}/like", headers=headers).json() == {"ok": True}
+    assert client.get(f"/api/posts/{post_id}").json()["likes"] == 1
+    assert client.post(f"/api/posts/{post_id}/dislike", headers=headers).status_code == 200
+    post = client.get(f"/api/posts/{post_id}").json()
+    assert (post["likes"], post["dislikes"]) == (0, 1)
+    client.post(f"/api/posts/{post_id}/unreact", headers=headers)
+    assert client.get(f"/api/posts/{post_id}").json()["dislikes"] == 0
+
+    assert client.post(f"/api/posts/{post_id}/favorite", headers=headers).json() == {
+        "favorited": True
+    }
+    assert client.post(f"/api/posts/{post_id}/favorite", headers=headers).json() == {
+        "favorited": False
+    }
+
+    assert client.post("/api/posts/999999/like", headers=headers).status_code == 404
+    assert client.post("/api/users/999999/follow", headers=headers).status_code == 404
+
+
+def test_batch_folds_ops_per_key_in_order(client):
+    from database import session as db_session
+    from models.db_models import Favorite, Reaction
+    from services.write_queue import TOGGLE, TargetNotFound, WriteQueue
+
+    headers = _login(client)
+    post_id = _post(client, headers)
+    queue = WriteQueue(window=0.05)
+    toggles = [queue.submit("favorite", (1, post_id), TOGGLE) for _ in range(3)]
+    reactions = [queue.submit("reaction", (1, post_id), kind) for kind in ("like", None, "dislike")]
+    missing = queue.submit("reaction", (1, 999999), "like")
+
+    assert [f.result(timeout=5) for f in toggles] == [True, False, True]
+    assert [f.result(timeout=5) for f in reactions] == ["like", None, "dislike"]
+    try:
+        missing.result(timeout=5)
+        raise AssertionError("expected TargetNotFound")
+    except TargetNotFound:
+        pass
+    assert queue.stats()["batches"] == 1
+    queue.stop()
+
+    db = db_session.SessionLocal()
+    try:
+        assert db.get(Favorite, {"user_id": 1, "post_id": post_id}) is not None
+        reaction = db.get(Reaction, {"user_id": 1, "post_id": post_id})
+        assert reaction is not None
+        assert reaction.reaction_type == "dislike"
+    finally:
+        db.close()
+    assert (
+        client.get("/api/admin/stats", params={"metric": "reactions"}, headers=headers).json()[
+            "total"
+        ]
+        == 1
+    )
+
+
+def test_removals_undo_trending_weight_at_event_time(client):
+    from datetime import datetime, timedelta, timezone
+
+    from database import session as db_session
+    from models.db_models import Favorite, Post, PostHotScore, Reaction
+    from services import trending_service
+
+    headers = _login(client)
+    post_id = _post(client, headers)
+    client.post(f"/api/posts/{post_id}/like", headers=headers)
+    client.post(f"/api/posts/{post_id}/favorite", headers=headers)
+
+    def score() -> float:
+        db = db_session.SessionLocal()
+        try:
+            row = db.get(PostHotScore, post_id)
+            assert row is not None
+            return trending_service.current_score(row.score)
+        finally:
+            db.close()
+
+    # Everything happened two days ago: publish 3 + like 1 + favorite 2, decayed
+    db = db_session.SessionLocal()
+    try:
+        then = datetime.now(timezone.utc) - timedelta(days=2)
+        db.query(Post).filter(Post.id == post_id).update({"published_at": then})
+        db.query(Reaction).filter(Reaction.post_id == post_id).update({"reacted_at": then})
+        db.query(Favorite).filter(Favorite.post_id == post_id).update({"saved_at": then})
+        db.commit()
+        trending_service.recompute(db)
+    finally:
+        db.close()
+    full = score()
+
+    client.post(f"/api/posts/{post_id}/dislike", headers=headers)
+    assert abs(score() - full * 4.5 / 6) < 1e-6 * full
+    client.post(f"/api/posts/{post_id}/unreact", headers=headers)
+    assert abs(score() - full * 5 / 6) < 1e-6 * full
+    client.post(f"/api/posts/{post_id}/favorite", headers=headers)
+    assert abs(score() - full * 3 / 6) < 1e-6 * full